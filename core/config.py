@@ -3,6 +3,7 @@
 支持YAML和JSON格式的配置文件
 """
 
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -12,6 +13,71 @@ import yaml
 
 from .logger import LoggerMixin
 
+# 优先使用 libyaml 提供的 C 实现，未编译 libyaml 时回退到纯 Python 实现
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# YAML解析结果的JSON缓存目录，放在用户缓存目录下（Windows 为 %LOCALAPPDATA%），
+# 与工作目录无关，也不在用户配置文件旁边生成文件
+_YAML_CACHE_DIR = Path(os.environ.get('LOCALAPPDATA') or Path.home() / '.cache') / 'xiaoxin_rpa' / 'yaml_cache'
+
+
+def _load_yaml_cached(path: Path) -> Any:
+    """
+    加载YAML文件，并将解析结果缓存为缓存目录下的JSON文件
+    
+    缓存文件名取源文件绝对路径的哈希，内容以源文件的修改时间和大小为键，
+    源文件变化后自动重新解析。
+    
+    Args:
+        path: YAML文件路径
+    
+    Returns:
+        解析后的数据
+    """
+    digest = hashlib.sha1(str(path.resolve()).encode('utf-8')).hexdigest()
+    cache_path = _YAML_CACHE_DIR / f"{digest}.json"
+    stat = path.stat()
+    source_key = [stat.st_mtime_ns, stat.st_size]
+    
+    try:
+        raw = cache_path.read_bytes()
+        cached = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+        if cached['source'] == source_key:
+            return cached['data']
+    except (OSError, ValueError, KeyError, TypeError):
+        # 缓存不存在或已损坏，重新解析
+        pass
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=SafeLoader)
+    
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        payload = json.dumps({'source': source_key, 'data': data}, ensure_ascii=False)
+        # 日期、非字符串键等无法经JSON原样还原的数据不缓存
+        if json.loads(payload)['data'] != data:
+            return data
+        _YAML_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(payload, encoding='utf-8')
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        # 目录不可写等情况下仅跳过缓存
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+    
+    return data
+
 
 class Config(LoggerMixin):
     """配置管理类"""
@@ -33,13 +99,13 @@ class Config(LoggerMixin):
             raise FileNotFoundError(f"配置文件不存在: {self.config_path}")
         
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                if self.config_path.suffix.lower() in ['.yaml', '.yml']:
-                    self._data = yaml.safe_load(f) or {}
-                elif self.config_path.suffix.lower() == '.json':
+            if self.config_path.suffix.lower() in ['.yaml', '.yml']:
+                self._data = _load_yaml_cached(self.config_path) or {}
+            elif self.config_path.suffix.lower() == '.json':
+                with open(self.config_path, 'r', encoding='utf-8') as f:
                     self._data = json.load(f)
-                else:
-                    raise ValueError(f"不支持的配置文件格式: {self.config_path.suffix}")
+            else:
+                raise ValueError(f"不支持的配置文件格式: {self.config_path.suffix}")
             
             self.logger.info(f"配置文件加载成功: {self.config_path}")
             
@@ -92,7 +158,7 @@ class Config(LoggerMixin):
         try:
             with open(self.config_path, 'w', encoding='utf-8') as f:
                 if self.config_path.suffix.lower() in ['.yaml', '.yml']:
-                    yaml.safe_dump(self._data, f, default_flow_style=False, allow_unicode=True)
+                    yaml.dump(self._data, f, Dumper=SafeDumper, default_flow_style=False, allow_unicode=True)
                 elif self.config_path.suffix.lower() == '.json':
                     json.dump(self._data, f, indent=2, ensure_ascii=False)
             
@@ -196,7 +262,8 @@ def create_default_config(config_path: Union[str, Path]) -> None:
         },
         'window': {
             'search_timeout': 5.0,
-            'activate_timeout': 2.0
+            'activate_timeout': 2.0,
+            'cache_ttl': 0.25
         },
         'workflow': {
             'step_delay': 0.5,
@@ -215,6 +282,6 @@ def create_default_config(config_path: Union[str, Path]) -> None:
     
     with open(config_path, 'w', encoding='utf-8') as f:
         if config_path.suffix.lower() in ['.yaml', '.yml']:
-            yaml.safe_dump(default_config, f, default_flow_style=False, allow_unicode=True)
+            yaml.dump(default_config, f, Dumper=SafeDumper, default_flow_style=False, allow_unicode=True)
         else:
             json.dump(default_config, f, indent=2, ensure_ascii=False)
\ No newline at end of file
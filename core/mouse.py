@@ -3,10 +3,13 @@
 基于PyAutoGUI实现鼠标点击、拖拽、滚动等操作
 """
 
+import ctypes
+import threading
 import time
-from typing import Optional, Tuple, Union
+from typing import List, Optional, Tuple, Union
 from enum import Enum
 
+import numpy as np
 import pyautogui
 
 from .logger import LoggerMixin
@@ -21,14 +24,58 @@ try:
 except ImportError:
     HAS_WIN32 = False
 
+# SendInput 一次注入多个鼠标事件（仅Windows）
+try:
+    _user32 = ctypes.windll.user32
+    HAS_SENDINPUT = True
+except AttributeError:
+    HAS_SENDINPUT = False
+
+_MOUSEEVENTF_MOVE = 0x0001
+_MOUSEEVENTF_LEFTDOWN = 0x0002
+_MOUSEEVENTF_LEFTUP = 0x0004
+_MOUSEEVENTF_RIGHTDOWN = 0x0008
+_MOUSEEVENTF_RIGHTUP = 0x0010
+_MOUSEEVENTF_MIDDLEDOWN = 0x0020
+_MOUSEEVENTF_MIDDLEUP = 0x0040
+_MOUSEEVENTF_VIRTUALDESK = 0x4000
+_MOUSEEVENTF_ABSOLUTE = 0x8000
+_SM_XVIRTUALSCREEN, _SM_YVIRTUALSCREEN, _SM_CXVIRTUALSCREEN, _SM_CYVIRTUALSCREEN = 76, 77, 78, 79
+
+# 同一位置左键连点达到该次数时改用 click_burst，不再逐次经过 PyAutoGUI
+_BURST_CLICKS = 32
+
+
+class _MOUSEINPUT(ctypes.Structure):
+    _fields_ = [('dx', ctypes.c_long),
+                ('dy', ctypes.c_long),
+                ('mouseData', ctypes.c_ulong),
+                ('dwFlags', ctypes.c_ulong),
+                ('time', ctypes.c_ulong),
+                ('dwExtraInfo', ctypes.c_size_t)]
 
-class MouseButton(Enum):
-    """鼠标按键枚举"""
+
+class _INPUT(ctypes.Structure):
+    # MOUSEINPUT 是 INPUT 联合体中最大的成员，只声明它即可保证结构体大小一致
+    _fields_ = [('type', ctypes.c_ulong),
+                ('mi', _MOUSEINPUT)]
+
+
+class MouseButton(str, Enum):
+    """鼠标按键枚举（成员本身即为字符串，可直接与 'left' 等比较）"""
     LEFT = 'left'
     RIGHT = 'right'
     MIDDLE = 'middle'
 
 
+# 各按键 (按下, 抬起) 对应的 SendInput 事件标志
+_BUTTON_FLAGS = {
+    MouseButton.LEFT: (_MOUSEEVENTF_LEFTDOWN, _MOUSEEVENTF_LEFTUP),
+    MouseButton.RIGHT: (_MOUSEEVENTF_RIGHTDOWN, _MOUSEEVENTF_RIGHTUP),
+    MouseButton.MIDDLE: (_MOUSEEVENTF_MIDDLEDOWN, _MOUSEEVENTF_MIDDLEUP),
+}
+
+
 class MouseController(LoggerMixin):
     """鼠标控制器"""
     
@@ -109,6 +156,8 @@ class MouseController(LoggerMixin):
         try:
             if x is not None and y is not None:
                 self.logger.debug(f"点击位置: ({x}, {y}), 按键: {button.value}, 次数: {clicks}")
+                if HAS_SENDINPUT and button == MouseButton.LEFT and clicks >= _BURST_CLICKS:
+                    return self.click_burst(x, y, clicks, interval)
                 pyautogui.click(x, y, clicks=clicks, interval=interval, button=button.value)
             else:
                 current_pos = self.get_position()
@@ -121,6 +170,199 @@ class MouseController(LoggerMixin):
             self.logger.error(f"鼠标点击失败: {e}")
             return False
     
+    def click_many(self, points: List[Tuple[int, int]], interval: Optional[float] = None,
+                   stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        依次左键点击多个位置
+        
+        Windows 下且间隔为0时，所有移动、按下、抬起事件打包为一次 SendInput 调用；
+        有间隔时每次点击各用一次 SendInput，按开始时间排定每次点击的时刻，间隔误差不会累积。
+        启用失败保护时，每次注入前检查鼠标是否在屏幕角落。
+        
+        Args:
+            points: 点击位置列表 [(x, y), ...]
+            interval: 相邻两次点击的间隔（秒），None 时与单次点击一样使用 click_delay
+            stop_event: 停止事件，等待间隔时被设置则中止点击
+        
+        Returns:
+            操作是否成功，被停止时返回False
+        """
+        if not points:
+            return True
+        if interval is None:
+            interval = self.click_delay
+        
+        try:
+            self.logger.debug(f"批量点击 {len(points)} 个位置")
+            
+            if HAS_SENDINPUT and interval <= 0:
+                if self._fail_safe_triggered():
+                    return False
+                return self._send_clicks(points)
+            
+            start = time.perf_counter()
+            for i, (x, y) in enumerate(points):
+                if i and interval > 0:
+                    delay = start + i * interval - time.perf_counter()
+                    if stop_event is not None:
+                        if stop_event.wait(max(delay, 0)):
+                            self.logger.info(f"批量点击被停止，已点击 {i}/{len(points)} 次")
+                            return False
+                    elif delay > 0:
+                        time.sleep(delay)
+                
+                if self._fail_safe_triggered():
+                    return False
+                if HAS_SENDINPUT:
+                    if not self._send_clicks([(x, y)]):
+                        return False
+                else:
+                    pyautogui.click(x, y, _pause=False)
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"批量点击失败: {e}")
+            return False
+    
+    def click_burst(self, x: int, y: int, clicks: int, interval: float = 0.0,
+                    stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        在同一位置连续左键点击多次，见 click_many
+        
+        Args:
+            x: 点击位置x坐标
+            y: 点击位置y坐标
+            clicks: 点击次数
+            interval: 相邻两次点击的间隔（秒）
+            stop_event: 停止事件，等待间隔时被设置则中止点击
+        
+        Returns:
+            操作是否成功，被停止时返回False
+        """
+        return self.click_many([(x, y)] * clicks, interval, stop_event)
+    
+    def press_sequence(self, x: int, y: int, events: List[Tuple[MouseButton, bool]],
+                       interval: float = 0.05, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        在同一位置按顺序按下、抬起鼠标按键
+        
+        Windows 下移动和每个按键事件直接用 SendInput 注入，不经过 PyAutoGUI 的移动和暂停；
+        按开始时间排定每个事件的时刻。启用失败保护时每个事件前检查鼠标是否在屏幕角落，
+        被停止或触发失败保护时抬起仍按着的按键再返回。
+        
+        Args:
+            x: 位置x坐标
+            y: 位置y坐标
+            events: 按键事件列表 [(按键, 是否按下), ...]
+            interval: 相邻两个事件的间隔（秒）
+            stop_event: 停止事件，等待间隔时被设置则中止
+        
+        Returns:
+            操作是否成功，被停止时返回False
+        """
+        pressed: List[MouseButton] = []
+        try:
+            start = time.perf_counter()
+            for i, (button, down) in enumerate(events):
+                if i and interval > 0:
+                    delay = start + i * interval - time.perf_counter()
+                    if stop_event is not None:
+                        if stop_event.wait(max(delay, 0)):
+                            self.logger.info(f"按键序列被停止，已执行 {i}/{len(events)} 个事件")
+                            self._release_buttons(pressed)
+                            return False
+                    elif delay > 0:
+                        time.sleep(delay)
+                
+                if self._fail_safe_triggered():
+                    self._release_buttons(pressed)
+                    return False
+                if not self._send_button(button, down, (x, y) if i == 0 else None):
+                    return False
+                if down:
+                    pressed.append(button)
+                elif button in pressed:
+                    pressed.remove(button)
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"按键序列执行失败: {e}")
+            return False
+    
+    def _release_buttons(self, pressed: List[MouseButton]) -> None:
+        """按与按下相反的顺序抬起仍按着的按键"""
+        for held in reversed(pressed):
+            self._send_button(held, False)
+    
+    def _fail_safe_triggered(self) -> bool:
+        """启用失败保护时检查鼠标是否在屏幕角落（SendInput 不经过 PyAutoGUI 的检查）"""
+        if not pyautogui.FAILSAFE:
+            return False
+        try:
+            pyautogui.failSafeCheck()
+        except pyautogui.FailSafeException:
+            self.logger.warning("鼠标位于屏幕角落，触发失败保护，停止操作")
+            return True
+        return False
+    
+    def _send_button(self, button: MouseButton, down: bool,
+                     position: Optional[Tuple[int, int]] = None) -> bool:
+        """按下或抬起一个按键，指定位置时先移动到该位置"""
+        if not HAS_SENDINPUT:
+            if position is not None:
+                pyautogui.moveTo(*position, _pause=False)
+            if down:
+                pyautogui.mouseDown(button=button.value, _pause=False)
+            else:
+                pyautogui.mouseUp(button=button.value, _pause=False)
+            return True
+        
+        inputs = (_INPUT * (2 if position is not None else 1))()
+        if position is not None:
+            self._fill_move(inputs[0], *position, self._virtual_desktop())
+        inputs[-1].mi.dwFlags = _BUTTON_FLAGS[button][0 if down else 1]
+        return self._send_inputs(inputs)
+    
+    @staticmethod
+    def _virtual_desktop() -> Tuple[int, int, int, int]:
+        """虚拟桌面（多显示器）的左上角和归一化用的宽高"""
+        return (_user32.GetSystemMetrics(_SM_XVIRTUALSCREEN),
+                _user32.GetSystemMetrics(_SM_YVIRTUALSCREEN),
+                max(_user32.GetSystemMetrics(_SM_CXVIRTUALSCREEN) - 1, 1),
+                max(_user32.GetSystemMetrics(_SM_CYVIRTUALSCREEN) - 1, 1))
+    
+    @staticmethod
+    def _fill_move(event: _INPUT, x: int, y: int, desktop: Tuple[int, int, int, int]) -> None:
+        """把事件设为移动到 (x, y)，绝对坐标归一化到 0~65535，覆盖整个虚拟桌面"""
+        left, top, width, height = desktop
+        event.mi.dx = ((x - left) * 65535 + width // 2) // width
+        event.mi.dy = ((y - top) * 65535 + height // 2) // height
+        event.mi.dwFlags = _MOUSEEVENTF_MOVE | _MOUSEEVENTF_ABSOLUTE | _MOUSEEVENTF_VIRTUALDESK
+    
+    def _send_clicks(self, points: List[Tuple[int, int]]) -> bool:
+        """把多个左键点击打包为一次 SendInput 调用"""
+        desktop = self._virtual_desktop()
+        
+        # 每个点击依次为 移动、按下、抬起 三个事件（type 默认即为 INPUT_MOUSE）
+        inputs = (_INPUT * (3 * len(points)))()
+        for i, (x, y) in enumerate(points):
+            move, down, up = inputs[3 * i:3 * i + 3]
+            self._fill_move(move, x, y, desktop)
+            down.mi.dwFlags = _MOUSEEVENTF_LEFTDOWN
+            up.mi.dwFlags = _MOUSEEVENTF_LEFTUP
+        
+        return self._send_inputs(inputs)
+    
+    def _send_inputs(self, inputs: ctypes.Array) -> bool:
+        """调用 SendInput 注入事件数组，全部注入才算成功"""
+        sent = _user32.SendInput(len(inputs), inputs, ctypes.sizeof(_INPUT))
+        if sent != len(inputs):
+            self.logger.error(f"SendInput 只注入了 {sent}/{len(inputs)} 个事件")
+            return False
+        return True
+    
     def double_click(self, x: Optional[int] = None, y: Optional[int] = None) -> bool:
         """
         双击鼠标
@@ -419,22 +661,32 @@ class MouseController(LoggerMixin):
             self.logger.error(f"点击并拖拽失败: {e}")
             return False
     
-    def is_position_safe(self, x: int, y: int) -> bool:
+    def is_position_safe(self,
+                         x: Union[int, np.ndarray],
+                         y: Union[int, np.ndarray]) -> Union[bool, np.ndarray]:
         """
         检查位置是否安全（不会触发失败保护）
         
         Args:
-            x: x坐标
-            y: y坐标
+            x: x坐标，传入数组时批量检查
+            y: y坐标，传入数组时批量检查
         
         Returns:
-            位置是否安全
+            位置是否安全；传入数组时返回布尔数组
         """
+        batch = isinstance(x, np.ndarray) or isinstance(y, np.ndarray)
+        
         if not pyautogui.FAILSAFE:
-            return True
+            return np.ones(np.broadcast(x, y).shape, dtype=bool) if batch else True
         
         screen_size = pyautogui.size()
         
+        # 批量检查，一次向量化比较代替逐点调用
+        if batch:
+            x = np.asarray(x)
+            y = np.asarray(y)
+            return (x > 0) & (y > 0) & (x < screen_size.width - 1) & (y < screen_size.height - 1)
+        
         # 检查是否在屏幕边界附近
         if x <= 0 or y <= 0 or x >= screen_size.width - 1 or y >= screen_size.height - 1:
             return False
@@ -0,0 +1,151 @@
+"""
+通用工作流步骤
+各工作流共用的模板等待和点击步骤
+"""
+
+from .mouse import MouseController
+from .template import TemplateManager
+from .vision import VisionEngine, MatchResult
+from .workflow import WorkflowStep
+
+
+class WaitForTemplateStep(WorkflowStep):
+    """等待模板出现步骤"""
+    
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager}
+    
+    def __init__(self, name: str, config: dict):
+        super().__init__(name, config)
+        self.template_name = config.get('template_name')
+        self.timeout = config.get('timeout', 10.0)
+        self.region = config.get('region')
+        self.prefetch = config.get('prefetch', False)  # 匹配当前帧时由后台线程截取下一帧
+        self.sticky = config.get('sticky', False)  # 模板已在上次出现的位置时只校验该位置，跳过等待和整屏匹配
+        
+        self._sticky_match = None
+    
+    def invalidate(self) -> None:
+        """清除缓存的模板项和粘性匹配结果"""
+        super().invalidate()
+        self._sticky_match = None
+    
+    def execute(self, context: dict) -> bool:
+        """执行步骤"""
+        vision_engine = self._vision_engine
+        
+        # 获取模板
+        template_item = self._get_template(self.template_name)
+        if not template_item:
+            return False
+        
+        if self.sticky and self._sticky_match is not None and \
+                vision_engine.verify_match(self._sticky_match, vision_engine.prepare_template_item(template_item)):
+            # 模板仍在上次的位置
+            context['last_match'] = self._sticky_match
+            return True
+        
+        # 等待模板出现，先密集检查再逐步放宽间隔
+        result = vision_engine.wait_for_template_adaptive(
+            template_item,
+            timeout=self.timeout,
+            region=self.region or context.get('window_rect'),
+            prefetch=self.prefetch
+        )
+        
+        if self.sticky:
+            self._sticky_match = result
+        
+        if result:
+            context['last_match'] = result
+            return True
+        
+        return False
+
+
+class ClickTemplateStep(WorkflowStep):
+    """点击模板步骤"""
+    
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager, 'mouse_controller': MouseController}
+    
+    def __init__(self, name: str, config: dict):
+        super().__init__(name, config)
+        self.template_name = config.get('template_name')
+        self.use_last_match = config.get('use_last_match', False)
+        self.method = config.get('method', 'template')  # 'template' 灰度模板匹配，'pyramid' 金字塔模板匹配，'orb' 特征点匹配
+        self.first_match = config.get('first_match', False)  # 模板匹配时取自上而下第一个达到阈值的位置
+        self.match_method = config.get('match_method', 'TM_CCOEFF_NORMED')  # 'TM_SQDIFF' 更快但对亮度变化更敏感
+        self.sticky = config.get('sticky', False)  # 目标位置不变时只校验上次匹配位置，跳过整屏匹配
+        
+        self._sticky_match = None
+        
+        # 按配置选定执行路径，execute 不再逐次判断是否复用上次匹配结果
+        if self.use_last_match:
+            self.execute = self._execute_last_match
+    
+    def invalidate(self) -> None:
+        """清除缓存的模板项和粘性匹配结果"""
+        super().invalidate()
+        self._sticky_match = None
+    
+    def execute(self, context: dict) -> bool:
+        """执行步骤"""
+        vision_engine = self._vision_engine
+        
+        # 获取模板
+        template_item = self._get_template(self.template_name)
+        if not template_item:
+            return False
+        
+        # 已激活窗口时只在窗口区域内查找
+        region = context.get('window_rect')
+        
+        if self.method == 'orb':
+            # 特征点匹配，模板特征缓存在模板项上
+            match_result = vision_engine.find_on_screen_orb(template_item, region)
+        elif self.method == 'pyramid':
+            # 由粗到细匹配，解码结果按路径和修改时间缓存在视觉引擎中，这里只重建几层小图
+            try:
+                template_pyramid = vision_engine.prepare_template_pyramid(template_item.path)
+            except Exception as e:
+                self.logger.error(f"加载模板失败: {e}")
+                return False
+            
+            match_result = vision_engine.find_on_screen_pyramid(template_pyramid, region)
+        else:
+            # 灰度模板缓存在模板项上，重复点击同一模板时不再读取文件
+            try:
+                template = vision_engine.prepare_template_item(template_item)
+            except Exception as e:
+                self.logger.error(f"加载模板失败: {e}")
+                return False
+            
+            if self.sticky and self._sticky_match is not None and \
+                    vision_engine.verify_match(self._sticky_match, template):
+                # 目标仍在上次的位置
+                match_result = self._sticky_match
+            else:
+                # 查找模板
+                match_result = vision_engine.find_image_on_screen(template, region, self.match_method,
+                                                                  first_match=self.first_match)
+                if self.sticky:
+                    self._sticky_match = match_result
+        
+        if not match_result:
+            return False
+        
+        return self._click(context, match_result)
+    
+    def _execute_last_match(self, context: dict) -> bool:
+        """复用上次匹配结果点击，没有上次结果时查找模板"""
+        if 'last_match' not in context:
+            return type(self).execute(self, context)
+        
+        return self._click(context, context['last_match'])
+    
+    def _click(self, context: dict, match_result: MatchResult) -> bool:
+        """点击模板中心并记录点击位置"""
+        success = self._mouse_controller.click_match_result(match_result)
+        if success:
+            context['last_click'] = match_result.center
+        
+        return success
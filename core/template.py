@@ -7,7 +7,7 @@ import json
 import os
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 
 import pyautogui
 
@@ -42,6 +42,10 @@ class TemplateItem:
     path: Path
     resolution: str
     config: TemplateConfig
+    # VisionEngine.find_on_screen_orb 首次使用时计算的 (灰度模板, 关键点, 描述子)
+    orb_features: Optional[Tuple[Any, Any, Any]] = field(default=None, compare=False)
+    # VisionEngine.prepare_template_item 首次使用时解码的灰度模板
+    gray: Optional[Any] = field(default=None, compare=False)
     
     def __repr__(self) -> str:
         return f"TemplateItem(path={self.path}, resolution={self.resolution})"
@@ -298,6 +302,29 @@ class TemplateManager(LoggerMixin):
         
         return sorted(template_names)
     
+    def get_templates(self, workflow_name: Optional[str] = None,
+                      resolution: Optional[str] = None) -> Dict[str, TemplateItem]:
+        """
+        获取多个模板，每个模板按 get_template 的规则选择分辨率
+        
+        Args:
+            workflow_name: 工作流名称，None则获取所有
+            resolution: 分辨率，None则使用当前分辨率
+        
+        Returns:
+            模板名称到模板项的映射
+        """
+        if resolution is None:
+            resolution = self.get_current_resolution()
+        
+        templates = {}
+        for template_name in self.list_templates(workflow_name):
+            template_item = self.get_template(template_name, resolution)
+            if template_item:
+                templates[template_name] = template_item
+        
+        return templates
+    
     def list_resolutions(self, template_name: str) -> List[str]:
         """
         列出模板支持的分辨率
@@ -4,16 +4,56 @@
 """
 
 import cv2
+import threading
+import time
 import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Tuple, Union
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import pyautogui
 
 from .logger import LoggerMixin
 
+if TYPE_CHECKING:
+    from .template import TemplateItem
+
+# DXGI桌面复制截图（可选，仅Windows）
+try:
+    import dxcam
+    HAS_DXCAM = True
+except ImportError:
+    HAS_DXCAM = False
+
+# 按路径加载的模板图像最多缓存的数量
+_TEMPLATE_CACHE_SIZE = 64
+
+# 非极大值抑制时不超过该数量的匹配结果一次算出两两交并比矩阵，更多时逐行计算以节省内存
+_NMS_MATRIX_MAX = 256
+
+# TM_SQDIFF 按模板能量归一化，模板每个像素分量的平均能量低于该值（均方根亮度约64）时
+# 暗背景也会得到高置信度，此时改用 TM_CCOEFF_NORMED 计算
+_SQDIFF_MIN_MEAN_ENERGY = 64.0 ** 2
+
+# 仅当OpenCV编译了CUDA且存在可用设备时才能使用GPU模板匹配
+try:
+    HAS_CUDA = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    HAS_CUDA = False
+
+# OpenCL（T-API）可用时 matchTemplate 可通过 UMat 在集成显卡或独立显卡上计算
+try:
+    HAS_OPENCL = cv2.ocl.haveOpenCL()
+except (AttributeError, cv2.error):
+    HAS_OPENCL = False
+
 
 class MatchResult:
     """匹配结果类"""
+    # 查找所有匹配时会一次创建大量实例，不使用实例字典
+    __slots__ = ('x', 'y', 'width', 'height', 'confidence')
     
     def __init__(self, x: int, y: int, width: int, height: int, confidence: float):
         """
@@ -51,42 +91,222 @@ class MatchResult:
         return f"MatchResult(center={self.center}, confidence={self.confidence:.3f})"
 
 
+def _extract_peaks(
+    result: np.ndarray,
+    threshold: float,
+    sqdiff: bool = False,
+    min_distance: int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    从匹配结果矩阵中提取达到阈值的位置，按置信度降序排列
+    
+    Args:
+        result: matchTemplate输出的得分矩阵
+        threshold: 置信度阈值
+        sqdiff: 是否为SQDIFF类方法（值越小越好）
+        min_distance: 非极大值抑制距离，0表示保留所有位置
+    
+    Returns:
+        (xs, ys, confidences) 三个等长数组
+    """
+    if sqdiff:
+        ys, xs = np.nonzero(result <= (1.0 - threshold))
+        scores = 1.0 - result[ys, xs]
+    else:
+        ys, xs = np.nonzero(result >= threshold)
+        scores = result[ys, xs]
+    
+    # 稳定排序，同分时保持行优先顺序
+    order = np.argsort(-scores, kind='stable')
+    xs, ys, scores = xs[order], ys[order], scores[order]
+    
+    if min_distance > 0 and len(scores) > 1:
+        # 贪心抑制：按置信度从高到低保留，丢弃落在已保留点邻域内的位置
+        suppressed = np.zeros(len(scores), dtype=bool)
+        keep = []
+        for i in range(len(scores)):
+            if suppressed[i]:
+                continue
+            keep.append(i)
+            suppressed |= ((np.abs(xs - xs[i]) < min_distance) &
+                           (np.abs(ys - ys[i]) < min_distance))
+        xs, ys, scores = xs[keep], ys[keep], scores[keep]
+    
+    return xs, ys, scores
+
+
 class VisionEngine(LoggerMixin):
     """图像识别引擎"""
     
-    def __init__(self, confidence_threshold: float = 0.8):
+    # 支持的匹配方法（所有实例共享，只读）
+    match_methods = MappingProxyType({
+        'TM_CCOEFF': cv2.TM_CCOEFF,
+        'TM_CCOEFF_NORMED': cv2.TM_CCOEFF_NORMED,
+        'TM_CCORR': cv2.TM_CCORR,
+        'TM_CCORR_NORMED': cv2.TM_CCORR_NORMED,
+        'TM_SQDIFF': cv2.TM_SQDIFF,
+        'TM_SQDIFF_NORMED': cv2.TM_SQDIFF_NORMED
+    })
+    
+    def __init__(self, confidence_threshold: float = 0.8, use_gpu: bool = False,
+                 capture_backend: str = 'dxcam', use_opencl: bool = False):
         """
         初始化图像识别引擎
         
         Args:
             confidence_threshold: 置信度阈值
+            use_gpu: 是否在CUDA可用时使用GPU进行灰度模板匹配
+            capture_backend: 截图后端，'dxcam' 在安装了dxcam时使用DXGI桌面复制，否则使用 'pyautogui'
+            use_opencl: 是否在OpenCL可用时通过UMat进行模板匹配（未启用CUDA时生效）
         """
         self.confidence_threshold = confidence_threshold
+        self.default_method = cv2.TM_CCOEFF_NORMED
+        self.use_gpu = use_gpu and HAS_CUDA
+        self.use_opencl = use_opencl and HAS_OPENCL
         
-        # 支持的匹配方法
-        self.match_methods = {
-            'TM_CCOEFF': cv2.TM_CCOEFF,
-            'TM_CCOEFF_NORMED': cv2.TM_CCOEFF_NORMED,
-            'TM_CCORR': cv2.TM_CCORR,
-            'TM_CCORR_NORMED': cv2.TM_CCORR_NORMED,
-            'TM_SQDIFF': cv2.TM_SQDIFF,
-            'TM_SQDIFF_NORMED': cv2.TM_SQDIFF_NORMED
-        }
+        # 截图后端，DXGI截图失败时自动切换为pyautogui
+        self.capture_backend = capture_backend if HAS_DXCAM else 'pyautogui'
+        self._dxcam = None
+        self._dxcam_last: Optional[Tuple[Optional[Tuple[int, int, int, int]], np.ndarray]] = None
+        self._last_capture_backend: Optional[str] = None
         
-        self.default_method = cv2.TM_CCOEFF_NORMED
+        # 已解码的模板图像，键为 (路径, 修改时间)，文件被替换后自动重新读取
+        self._template_cache: 'OrderedDict[Tuple[str, int], np.ndarray]' = OrderedDict()
+        self._template_cache_lock = threading.Lock()  # warmup_templates 可能在后台线程加载
+        
+        # shared_screenshot 作用域内复用的截图，键为 (区域, 是否灰度)；作用域外为None
+        self._frame_cache: Optional[Dict[Tuple[Optional[Tuple[int, int, int, int]], bool], np.ndarray]] = None
+        
+        # prefetch_screenshot 预先截取的全屏灰度帧 (过期时刻, 帧)，下一次截图时取用一次
+        self._prefetched: Optional[Tuple[float, np.ndarray]] = None
+        
+        # 后台截图线程，流水线等待模板时首次使用创建
+        self._capture_pool: Optional[ThreadPoolExecutor] = None
+        
+        # GPU匹配器按匹配方法懒创建；截图缓冲区复用，最近一次上传的模板保留在显存中
+        self._gpu_matchers = {}
+        self._gpu_screen = None
+        self._gpu_template = None
+        
+        # OpenCL匹配时最近一次上传的截图和模板，同一帧匹配多个模板时截图只上传一次
+        self._ocl_screen = None
+        self._ocl_template = None
+        
+        # ORB特征检测器，首次使用时创建；多模板索引由 build_orb_index 建立
+        self._orb = None
+        self._orb_matcher = None
+        self._orb_index = None
         
         self.logger.info(f"图像识别引擎初始化完成，置信度阈值: {confidence_threshold}")
     
-    def take_screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+    def take_screenshot(self, region: Optional[Tuple[int, int, int, int]] = None,
+                        grayscale: bool = False) -> np.ndarray:
         """
         截取屏幕图像
         
         Args:
             region: 截取区域 (x, y, width, height)
+            grayscale: 是否直接返回灰度图，省去中间的BGR整帧拷贝
+        
+        Returns:
+            截取的图像数组，shared_screenshot 作用域内返回的是只读的共享帧
+        """
+        if self._frame_cache is None:
+            return self._capture(region, grayscale)
+        
+        key = (tuple(region) if region else None, grayscale)
+        frame = self._frame_cache.get(key)
+        if frame is None:
+            frame = self._capture(region, grayscale)
+            frame.flags.writeable = False
+            self._frame_cache[key] = frame
+        return frame
+    
+    @contextmanager
+    def shared_screenshot(self) -> Iterator[None]:
+        """
+        在作用域内复用同一帧截图
+        
+        连续查找多个模板且中间没有点击、滚动等改变屏幕的操作时使用，
+        作用域内相同区域和颜色格式的截图只截取一次。退出作用域后缓存即失效，
+        因此操作屏幕之后的查找应放在作用域之外。可以嵌套，以最外层为准。
+        """
+        if self._frame_cache is not None:
+            yield
+            return
+        
+        self._frame_cache = {}
+        try:
+            yield
+        finally:
+            self._frame_cache = None
+    
+    def prefetch_screenshot(self, ttl: float) -> None:
+        """
+        预先截取一帧全屏灰度图，供下一次截图直接取用
+        
+        在延迟等待的空闲时间里提前截图，等待结束后的第一次灰度截图在有效期内
+        直接从这一帧裁剪，省去一次截图。无论是否取用，预取帧只对下一次截图有效。
+        
+        Args:
+            ttl: 有效期（秒），从现在起计算
+        """
+        self._prefetched = None
+        try:
+            frame = self._capture(None, grayscale=True)
+        except Exception as e:
+            self.logger.warning(f"预取截图失败: {e}")
+            return
+        self._prefetched = (time.perf_counter() + ttl, frame)
+    
+    def _take_prefetched(self, region: Optional[Tuple[int, int, int, int]], grayscale: bool) -> Optional[np.ndarray]:
+        """
+        取出预取帧，过期、颜色格式不符或区域超出屏幕时返回None
+        
+        Args:
+            region: 截取区域 (x, y, width, height)
+            grayscale: 是否需要灰度图
+        
+        Returns:
+            从预取帧裁剪出的图像拷贝
+        """
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is None or not grayscale:
+            return None
+        
+        expires, frame = prefetched
+        if time.perf_counter() > expires:
+            return None
+        if not region:
+            return frame
+        
+        x, y, w, h = region
+        if x < 0 or y < 0 or y + h > frame.shape[0] or x + w > frame.shape[1]:
+            return None
+        return frame[y:y + h, x:x + w].copy()
+    
+    def _capture(self, region: Optional[Tuple[int, int, int, int]], grayscale: bool) -> np.ndarray:
+        """
+        实际截取屏幕图像
+        
+        Args:
+            region: 截取区域 (x, y, width, height)
+            grayscale: 是否直接返回灰度图
         
         Returns:
             截取的图像数组
         """
+        if self._prefetched is not None:
+            frame = self._take_prefetched(region, grayscale)
+            if frame is not None:
+                return frame
+        
+        if self.capture_backend == 'dxcam':
+            screenshot_cv = self._grab_dxcam(region)
+            if screenshot_cv is not None:
+                self._log_capture_backend('dxcam')
+                return cv2.cvtColor(screenshot_cv, cv2.COLOR_BGR2GRAY) if grayscale else screenshot_cv
+        
         try:
             if region:
                 screenshot = pyautogui.screenshot(region=region)
@@ -94,43 +314,265 @@ class VisionEngine(LoggerMixin):
                 screenshot = pyautogui.screenshot()
             
             # 转换为OpenCV格式
-            screenshot_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+            screenshot_cv = cv2.cvtColor(np.asarray(screenshot),
+                                         cv2.COLOR_RGB2GRAY if grayscale else cv2.COLOR_RGB2BGR)
             
+            self._log_capture_backend('pyautogui')
             return screenshot_cv
             
         except Exception as e:
             self.logger.error(f"截图失败: {e}")
             raise
     
+    def _grab_dxcam(self, region: Optional[Tuple[int, int, int, int]]) -> Optional[np.ndarray]:
+        """
+        使用DXGI桌面复制截图
+        
+        屏幕没有变化时 dxcam 不返回新帧，此时复用同一区域的上一帧。
+        
+        Args:
+            region: 截取区域 (x, y, width, height)
+        
+        Returns:
+            BGR图像数组，无可用帧或失败时返回None
+        """
+        try:
+            if self._dxcam is None:
+                self._dxcam = dxcam.create(output_idx=0, output_color='BGR')
+            
+            if region:
+                x, y, width, height = region
+                frame = self._dxcam.grab(region=(x, y, x + width, y + height))
+            else:
+                frame = self._dxcam.grab()
+            
+        except Exception as e:
+            self.logger.warning(f"DXGI截图失败，改用pyautogui: {e}")
+            self.capture_backend = 'pyautogui'
+            return None
+        
+        if frame is not None:
+            self._dxcam_last = (region, frame)
+            return frame
+        
+        if self._dxcam_last is not None and self._dxcam_last[0] == region:
+            return self._dxcam_last[1]
+        
+        return None
+    
+    def _log_capture_backend(self, backend: str) -> None:
+        """截图后端变化时记录日志"""
+        if backend != self._last_capture_backend:
+            self._last_capture_backend = backend
+            self.logger.info(f"截图后端: {backend}")
+    
     def load_template(self, template_path: Union[str, Path]) -> np.ndarray:
         """
-        加载模板图像
+        加载模板图像，解码结果按路径和修改时间缓存
         
         Args:
             template_path: 模板图像路径
         
         Returns:
-            模板图像数组
+            模板图像数组（只读，与其它调用方共享）
         """
         template_path = Path(template_path)
         
-        if not template_path.exists():
+        try:
+            cache_key = (str(template_path), template_path.stat().st_mtime_ns)
+        except OSError:
             raise FileNotFoundError(f"模板文件不存在: {template_path}")
         
+        with self._template_cache_lock:
+            template = self._template_cache.get(cache_key)
+            if template is not None:
+                self._template_cache.move_to_end(cache_key)
+                return template
+        
         # 加载图像
         template = cv2.imread(str(template_path))
         if template is None:
             raise ValueError(f"无法读取模板图像: {template_path}")
         
+        template.flags.writeable = False
+        with self._template_cache_lock:
+            self._template_cache[cache_key] = template
+            if len(self._template_cache) > _TEMPLATE_CACHE_SIZE:
+                self._template_cache.popitem(last=False)
+        
         self.logger.debug(f"加载模板图像: {template_path}, 尺寸: {template.shape}")
         return template
     
+    def prepare_template(self, template_path: Union[str, Path], grayscale: bool = True) -> np.ndarray:
+        """
+        加载模板并预先转换为灰度图，供 find_image_on_screen 重复使用
+        
+        Args:
+            template_path: 模板图像路径
+            grayscale: 是否转换为灰度图
+        
+        Returns:
+            模板图像数组（grayscale为True时为单通道）
+        """
+        template = self.load_template(template_path)
+        if grayscale:
+            template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        return template
+    
+    def prepare_template_item(self, template_item: 'TemplateItem') -> np.ndarray:
+        """
+        获取模板项的灰度模板，首次解码后缓存在模板项上
+        
+        Args:
+            template_item: 模板项
+        
+        Returns:
+            单通道灰度模板图像
+        """
+        if template_item.gray is None:
+            template_item.gray = self.prepare_template(template_item.path)
+        return template_item.gray
+    
+    def warmup_templates(self, template_items: Iterable['TemplateItem']) -> int:
+        """
+        预先解码模板，供工作流启动时在后台线程调用，等待窗口或用户操作期间完成解码
+        
+        解码完成后用其中一个模板做一次小尺寸的CPU匹配，提前完成OpenCV匹配实现的初始化。
+        GPU和OpenCL的缓冲区与前台查找共用，这里不做预热。
+        
+        Args:
+            template_items: 模板项
+        
+        Returns:
+            成功解码的模板数量
+        """
+        count = 0
+        template = None
+        for template_item in template_items:
+            try:
+                template = self.prepare_template_item(template_item)
+                count += 1
+            except Exception as e:
+                self.logger.debug(f"预加载模板失败: {template_item.path}, {e}")
+        
+        if template is not None:
+            canvas = np.zeros((template.shape[0] * 2, template.shape[1] * 2), dtype=np.uint8)
+            cv2.matchTemplate(canvas, template, self.default_method)
+        
+        self.logger.debug(f"预加载模板完成: {count} 个")
+        return count
+    
+    def prepare_template_pyramid(self, template_path: Union[str, Path], levels: int = 3) -> List[np.ndarray]:
+        """
+        加载灰度模板并构建图像金字塔，供 find_on_screen_pyramid 重复使用
+        
+        Args:
+            template_path: 模板图像路径
+            levels: 金字塔最大层数，模板过小时自动减少
+        
+        Returns:
+            由原始尺寸到最粗层的灰度模板列表
+        """
+        return self._build_pyramid(self.prepare_template(template_path), levels)
+    
+    @staticmethod
+    def _build_pyramid(image: np.ndarray, levels: int, min_size: int = 8) -> List[np.ndarray]:
+        """逐层 pyrDown 构建金字塔，下一层短边小于 min_size 时停止"""
+        pyramid = [image]
+        while len(pyramid) < levels and min(pyramid[-1].shape[:2]) // 2 >= min_size:
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid
+    
+    def match_template_pyramid(
+        self,
+        screenshot: np.ndarray,
+        template_pyramid: List[np.ndarray],
+        top_k: int = 3,
+        margin: int = 4
+    ) -> Optional[MatchResult]:
+        """
+        由粗到细的金字塔模板匹配（TM_CCOEFF_NORMED）
+        
+        在最粗层对整幅截图匹配并取前 top_k 个候选，逐层放大到下一层，
+        只在候选位置周围 margin 像素的小窗口内重新匹配，最后在原始分辨率上确认。
+        
+        Args:
+            screenshot: 屏幕截图
+            template_pyramid: prepare_template_pyramid 返回的灰度模板金字塔
+            top_k: 最粗层保留的候选数量
+            margin: 逐层细化时搜索窗口向外扩展的像素数
+        
+        Returns:
+            匹配结果
+        """
+        try:
+            screen = screenshot if screenshot.ndim == 2 else cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+            screen_pyramid = self._build_pyramid(screen, len(template_pyramid), min_size=1)
+            levels = min(len(template_pyramid), len(screen_pyramid))
+            if levels == 1:
+                return self.match_template(screen, template_pyramid[0])
+            
+            # 最粗层：全图匹配，取前 top_k 个峰值，每取一个就抑制其邻域
+            coarse_template = template_pyramid[levels - 1]
+            result = self._match(screen_pyramid[levels - 1], coarse_template, cv2.TM_CCOEFF_NORMED)
+            th, tw = coarse_template.shape[:2]
+            candidates = []
+            for _ in range(top_k):
+                _, max_val, _, max_loc = cv2.minMaxLoc(result)
+                if max_val <= -1.0:
+                    break
+                candidates.append(max_loc)
+                x, y = max_loc
+                result[max(y - th // 2, 0):y + th // 2 + 1, max(x - tw // 2, 0):x + tw // 2 + 1] = -1.0
+            
+            # 逐层细化：坐标放大2倍，只在候选附近的小窗口内匹配
+            best_score = -1.0
+            for level in range(levels - 2, -1, -1):
+                level_screen = screen_pyramid[level]
+                level_template = template_pyramid[level]
+                th, tw = level_template.shape[:2]
+                refined = []
+                best_score = -1.0
+                
+                for x, y in candidates:
+                    x0 = max(x * 2 - margin, 0)
+                    y0 = max(y * 2 - margin, 0)
+                    x1 = min(x * 2 + tw + margin, level_screen.shape[1])
+                    y1 = min(y * 2 + th + margin, level_screen.shape[0])
+                    if x1 - x0 < tw or y1 - y0 < th:
+                        continue
+                    
+                    roi_result = self._match(level_screen[y0:y1, x0:x1], level_template, cv2.TM_CCOEFF_NORMED)
+                    _, max_val, _, max_loc = cv2.minMaxLoc(roi_result)
+                    refined.append((x0 + max_loc[0], y0 + max_loc[1], max_val))
+                
+                if not refined:
+                    return None
+                
+                refined.sort(key=lambda item: item[2], reverse=True)
+                best_score = refined[0][2]
+                candidates = [(x, y) for x, y, _ in refined]
+            
+            if best_score < self.confidence_threshold:
+                self.logger.debug(f"匹配置信度不足: {best_score:.3f} < {self.confidence_threshold}")
+                return None
+            
+            th, tw = template_pyramid[0].shape[:2]
+            match_result = MatchResult(candidates[0][0], candidates[0][1], tw, th, best_score)
+            self.logger.debug(f"金字塔模板匹配成功: {match_result}")
+            return match_result
+            
+        except Exception as e:
+            self.logger.error(f"金字塔模板匹配失败: {e}")
+            return None
+    
     def match_template(
         self, 
         screenshot: np.ndarray, 
         template: np.ndarray,
         method: str = 'TM_CCOEFF_NORMED',
-        grayscale: bool = True
+        grayscale: bool = True,
+        first_match: bool = False
     ) -> Optional[MatchResult]:
         """
         执行模板匹配
@@ -140,6 +582,7 @@ class VisionEngine(LoggerMixin):
             template: 模板图像
             method: 匹配方法
             grayscale: 是否转换为灰度图
+            first_match: 是否按行带自上而下匹配，找到第一个达到阈值的行带即停止（不保证全局最佳）
         
         Returns:
             匹配结果
@@ -148,19 +591,20 @@ class VisionEngine(LoggerMixin):
             # 获取匹配方法
             cv_method = self.match_methods.get(method, self.default_method)
             
-            # 转换为灰度图
+            # 转换为灰度图（已预处理为单通道的模板直接使用）
             if grayscale:
-                screenshot_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-                template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+                screenshot_gray = screenshot if screenshot.ndim == 2 else cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+                template_gray = template if template.ndim == 2 else cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
             else:
                 screenshot_gray = screenshot
                 template_gray = template
             
-            # 执行模板匹配
-            result = cv2.matchTemplate(screenshot_gray, template_gray, cv_method)
-            
-            # 获取最佳匹配位置
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            # 执行模板匹配，获取最佳匹配位置
+            if first_match:
+                min_val, max_val, min_loc, max_loc = self._min_max_loc_first(screenshot_gray, template_gray, cv_method)
+            else:
+                result = self._match(screenshot_gray, template_gray, cv_method)
+                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
             
             # 根据匹配方法选择结果
             if cv_method in [cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED]:
@@ -194,13 +638,150 @@ class VisionEngine(LoggerMixin):
             self.logger.error(f"模板匹配失败: {e}")
             return None
     
+    def _min_max_loc_first(
+        self,
+        image: np.ndarray,
+        template: np.ndarray,
+        cv_method: int,
+        band_rows: int = 256
+    ) -> Tuple[float, float, Tuple[int, int], Tuple[int, int]]:
+        """
+        自上而下按行带计算匹配结果，某个行带内的最佳值达到置信度阈值时不再计算后续行带
+        
+        Args:
+            image: 搜索图像
+            template: 模板图像
+            cv_method: OpenCV匹配方法
+            band_rows: 每个行带包含的结果行数（不少于模板高度的4倍）
+        
+        Returns:
+            与 cv2.minMaxLoc 相同的 (min_val, max_val, min_loc, max_loc)；没有行带达到阈值时为全图最佳
+        """
+        is_sqdiff = cv_method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED)
+        th = template.shape[0]
+        result_rows = image.shape[0] - th + 1
+        band_rows = max(band_rows, th * 4)
+        
+        best = None
+        best_confidence = float('-inf')
+        for top in range(0, result_rows, band_rows):
+            # 行带之间重叠 th-1 行，结果图按行拼接后与整图计算一致
+            band = image[top:min(top + band_rows, result_rows) + th - 1]
+            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(self._match(band, template, cv_method))
+            min_loc = (min_loc[0], min_loc[1] + top)
+            max_loc = (max_loc[0], max_loc[1] + top)
+            
+            confidence = 1.0 - min_val if is_sqdiff else max_val
+            if confidence > best_confidence:
+                best = (min_val, max_val, min_loc, max_loc)
+                best_confidence = confidence
+            if confidence >= self.confidence_threshold:
+                break
+        
+        return best
+    
+    def _match(self, image: np.ndarray, template: np.ndarray, cv_method: int) -> np.ndarray:
+        """
+        计算模板匹配结果图，单通道8位图像优先在GPU上计算
+        
+        TM_SQDIFF 的结果按模板能量归一化，使 1 - 值 可作为置信度；
+        它省去了归一化方法对每个窗口的方差计算，速度约为 TM_CCOEFF_NORMED 的两倍。
+        注意归一化只看模板能量：暗色模板在同样暗的纯色背景上差值很小，会误得高置信度。
+        因此模板平均能量低于 _SQDIFF_MIN_MEAN_ENERGY 时改用 TM_CCOEFF_NORMED，
+        并返回 1 - 相关系数，调用方仍按 SQDIFF 取最小值。
+        
+        Args:
+            image: 搜索图像
+            template: 模板图像
+            cv_method: OpenCV匹配方法
+        
+        Returns:
+            匹配结果图
+        """
+        sqdiff_energy = None
+        if cv_method == cv2.TM_SQDIFF:
+            sqdiff_energy = float(np.square(template, dtype=np.float64).sum())
+            if sqdiff_energy < _SQDIFF_MIN_MEAN_ENERGY * template.size:
+                cv_method = cv2.TM_CCOEFF_NORMED
+        
+        result = None
+        if self.use_gpu and image.ndim == 2 and template.ndim == 2 and image.dtype == np.uint8:
+            result = self._match_gpu(image, template, cv_method)
+        elif self.use_opencl:
+            result = self._match_opencl(image, template, cv_method)
+        
+        if result is None:
+            result = cv2.matchTemplate(image, template, cv_method)
+        
+        if sqdiff_energy is not None:
+            if cv_method == cv2.TM_SQDIFF:
+                result *= 1.0 / max(sqdiff_energy, 1.0)
+            else:
+                np.subtract(1.0, result, out=result)
+        
+        return result
+    
+    def _match_gpu(self, image: np.ndarray, template: np.ndarray, cv_method: int) -> Optional[np.ndarray]:
+        """
+        使用CUDA执行模板匹配，同一模板重复匹配时只上传一次
+        
+        Returns:
+            匹配结果图，GPU出错时返回None并停用GPU
+        """
+        try:
+            matcher = self._gpu_matchers.get(cv_method)
+            if matcher is None:
+                matcher = cv2.cuda.createTemplateMatching(cv2.CV_8UC1, cv_method)
+                self._gpu_matchers[cv_method] = matcher
+            
+            # 保存模板数组本身的引用，身份比较不会因对象被回收而误判
+            if self._gpu_template is None or self._gpu_template[0] is not template:
+                gpu_template = cv2.cuda_GpuMat()
+                gpu_template.upload(template)
+                self._gpu_template = (template, gpu_template)
+            
+            if self._gpu_screen is None:
+                self._gpu_screen = cv2.cuda_GpuMat()
+            self._gpu_screen.upload(image)
+            
+            return matcher.match(self._gpu_screen, self._gpu_template[1]).download()
+            
+        except cv2.error as e:
+            self.logger.warning(f"GPU模板匹配失败，改用CPU: {e}")
+            self.use_gpu = False
+            return None
+    
+    def _match_opencl(self, image: np.ndarray, template: np.ndarray, cv_method: int) -> Optional[np.ndarray]:
+        """
+        通过UMat使用OpenCL执行模板匹配，截图和模板按对象身份缓存，重复使用时不再上传
+        
+        Returns:
+            匹配结果图，OpenCL出错时返回None并停用OpenCL
+        """
+        try:
+            # 保存数组本身的引用，身份比较不会因对象被回收而误判
+            if self._ocl_screen is None or self._ocl_screen[0] is not image:
+                self._ocl_screen = (image, cv2.UMat(image))
+            if self._ocl_template is None or self._ocl_template[0] is not template:
+                self._ocl_template = (template, cv2.UMat(template))
+            
+            return cv2.matchTemplate(self._ocl_screen[1], self._ocl_template[1], cv_method).get()
+            
+        except cv2.error as e:
+            self.logger.warning(f"OpenCL模板匹配失败，改用CPU: {e}")
+            self.use_opencl = False
+            self._ocl_screen = None
+            self._ocl_template = None
+            return None
+    
     def find_all_matches(
         self,
         screenshot: np.ndarray,
         template: np.ndarray,
         method: str = 'TM_CCOEFF_NORMED',
         grayscale: bool = True,
-        threshold: Optional[float] = None
+        threshold: Optional[float] = None,
+        min_distance: int = 0
     ) -> List[MatchResult]:
         """
         查找所有匹配项
@@ -211,6 +792,7 @@ class VisionEngine(LoggerMixin):
             method: 匹配方法
             grayscale: 是否转换为灰度图
             threshold: 置信度阈值
+            min_distance: 非极大值抑制距离（像素），0表示保留所有位置
         
         Returns:
             匹配结果列表
@@ -222,36 +804,27 @@ class VisionEngine(LoggerMixin):
             # 获取匹配方法
             cv_method = self.match_methods.get(method, self.default_method)
             
-            # 转换为灰度图
+            # 转换为灰度图（已预处理为单通道的模板直接使用）
             if grayscale:
-                screenshot_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-                template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+                screenshot_gray = screenshot if screenshot.ndim == 2 else cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+                template_gray = template if template.ndim == 2 else cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
             else:
                 screenshot_gray = screenshot
                 template_gray = template
             
             # 执行模板匹配
-            result = cv2.matchTemplate(screenshot_gray, template_gray, cv_method)
+            result = self._match(screenshot_gray, template_gray, cv_method)
             
             h, w = template_gray.shape[:2]
-            matches = []
-            
-            # 根据匹配方法处理结果
-            if cv_method in [cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED]:
-                # 对于SQDIFF方法，值越小越好
-                locations = np.where(result <= (1.0 - threshold))
-                for pt in zip(*locations[::-1]):
-                    confidence = 1.0 - result[pt[1], pt[0]]
-                    matches.append(MatchResult(pt[0], pt[1], w, h, confidence))
-            else:
-                # 对于其他方法，值越大越好
-                locations = np.where(result >= threshold)
-                for pt in zip(*locations[::-1]):
-                    confidence = result[pt[1], pt[0]]
-                    matches.append(MatchResult(pt[0], pt[1], w, h, confidence))
             
-            # 按置信度排序
-            matches.sort(key=lambda x: x.confidence, reverse=True)
+            # 向量化提取并排序（SQDIFF方法值越小越好）
+            xs, ys, scores = _extract_peaks(
+                result, threshold,
+                sqdiff=cv_method in [cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED],
+                min_distance=min_distance
+            )
+            matches = [MatchResult(x, y, w, h, confidence)
+                       for x, y, confidence in zip(xs.tolist(), ys.tolist(), scores.tolist())]
             
             self.logger.debug(f"找到 {len(matches)} 个匹配项")
             return matches
@@ -260,6 +833,131 @@ class VisionEngine(LoggerMixin):
             self.logger.error(f"查找所有匹配项失败: {e}")
             return []
     
+    @staticmethod
+    def nms(matches: List[MatchResult], iou_threshold: float = 0.3) -> List[MatchResult]:
+        """
+        按交并比去除重叠的匹配结果（非极大值抑制）
+        
+        按置信度从高到低保留，丢弃与已保留结果交并比超过阈值的结果。
+        结果不多时一次算出两两重叠矩阵，循环中只做按行合并；
+        结果很多时每保留一个结果，用NumPy计算它与其余所有结果的交并比。
+        
+        Args:
+            matches: 匹配结果列表
+            iou_threshold: 交并比阈值
+        
+        Returns:
+            去重后的匹配结果，按置信度降序排列
+        """
+        if len(matches) < 2:
+            return list(matches)
+        
+        boxes = np.array([(m.x, m.y, m.x + m.width, m.y + m.height, m.confidence) for m in matches],
+                         dtype=np.float64)
+        order = np.argsort(-boxes[:, 4], kind='stable')
+        x1, y1, x2, y2 = boxes[order, :4].T
+        areas = (x2 - x1) * (y2 - y1)
+        
+        overlaps = None
+        if len(order) <= _NMS_MATRIX_MAX:
+            inter = (np.clip(np.minimum.outer(x2, x2) - np.maximum.outer(x1, x1), 0, None) *
+                     np.clip(np.minimum.outer(y2, y2) - np.maximum.outer(y1, y1), 0, None))
+            overlaps = inter > iou_threshold * (np.add.outer(areas, areas) - inter)
+        
+        suppressed = np.zeros(len(order), dtype=bool)
+        keep = []
+        for i in range(len(order)):
+            if suppressed[i]:
+                continue
+            keep.append(order[i])
+            
+            if overlaps is not None:
+                suppressed |= overlaps[i]
+            else:
+                inter = (np.clip(np.minimum(x2, x2[i]) - np.maximum(x1, x1[i]), 0, None) *
+                         np.clip(np.minimum(y2, y2[i]) - np.maximum(y1, y1[i]), 0, None))
+                suppressed |= inter > iou_threshold * (areas + areas[i] - inter)
+        
+        return [matches[i] for i in keep]
+    
+    def find_all_matches_pyramid(
+        self,
+        screenshot: np.ndarray,
+        template: np.ndarray,
+        levels: int = 2,
+        threshold: Optional[float] = None,
+        coarse_slack: float = 0.15
+    ) -> List[MatchResult]:
+        """
+        由粗到细查找所有匹配项（TM_CCOEFF_NORMED）
+        
+        先在缩小 2^(levels-1) 倍的截图上找出所有候选，再回到原始分辨率，
+        只在每个候选周围模板大小的窗口内重新匹配。结果与 find_all_matches 一致，
+        但原始分辨率上只计算候选附近的得分。模板太小无法缩小时退化为 find_all_matches。
+        
+        Args:
+            screenshot: 屏幕截图
+            template: 模板图像
+            levels: 金字塔层数，1表示不缩小
+            threshold: 置信度阈值
+            coarse_slack: 最粗层阈值相对 threshold 的放宽量，缩小后得分会略有下降
+        
+        Returns:
+            匹配结果列表
+        """
+        if threshold is None:
+            threshold = self.confidence_threshold
+        
+        try:
+            screen = screenshot if screenshot.ndim == 2 else cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+            template_gray = template if template.ndim == 2 else cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+            
+            template_pyramid = self._build_pyramid(template_gray, levels)
+            top = len(template_pyramid) - 1
+            if top == 0:
+                return self.find_all_matches(screen, template_gray, threshold=threshold)
+            
+            # 最粗层：全图匹配，每个目标只保留一个候选
+            coarse_screen = screen
+            for _ in range(top):
+                coarse_screen = cv2.pyrDown(coarse_screen)
+            coarse_template = template_pyramid[top]
+            ch, cw = coarse_template.shape[:2]
+            if coarse_screen.shape[0] < ch or coarse_screen.shape[1] < cw:
+                return []
+            
+            result = self._match(coarse_screen, coarse_template, cv2.TM_CCOEFF_NORMED)
+            xs, ys, _ = _extract_peaks(result, threshold - coarse_slack, min_distance=max(min(ch, cw) // 2, 1))
+            
+            # 原始分辨率：在候选附近的窗口内匹配，合并重叠窗口中的重复位置
+            scale = 2 ** top
+            margin = scale * 2
+            h, w = template_gray.shape[:2]
+            found: Dict[Tuple[int, int], float] = {}
+            for x, y in zip(xs.tolist(), ys.tolist()):
+                x0 = max(x * scale - margin, 0)
+                y0 = max(y * scale - margin, 0)
+                x1 = min(x * scale + w + margin, screen.shape[1])
+                y1 = min(y * scale + h + margin, screen.shape[0])
+                if x1 - x0 < w or y1 - y0 < h:
+                    continue
+                
+                roi_result = self._match(screen[y0:y1, x0:x1], template_gray, cv2.TM_CCOEFF_NORMED)
+                rxs, rys, scores = _extract_peaks(roi_result, threshold)
+                for rx, ry, score in zip(rxs.tolist(), rys.tolist(), scores.tolist()):
+                    found[(x0 + rx, y0 + ry)] = score
+            
+            # 与 find_all_matches 相同：按置信度降序，同分时行优先
+            ordered = sorted(found.items(), key=lambda item: (-item[1], item[0][1], item[0][0]))
+            matches = [MatchResult(x, y, w, h, score) for (x, y), score in ordered]
+            
+            self.logger.debug(f"金字塔查找到 {len(matches)} 个匹配项")
+            return matches
+            
+        except Exception as e:
+            self.logger.error(f"金字塔查找所有匹配项失败: {e}")
+            return []
+    
     def find_on_screen(
         self,
         template_path: Union[str, Path],
@@ -282,15 +980,42 @@ class VisionEngine(LoggerMixin):
         try:
             # 加载模板
             template = self.load_template(template_path)
-            
-            # 截取屏幕
-            screenshot = self.take_screenshot(region)
-            
-            # 执行匹配
-            result = self.match_template(screenshot, template, method, grayscale)
-            
-            # 如果指定了区域，需要调整坐标
-            if result and region:
+        except Exception as e:
+            self.logger.error(f"屏幕查找失败: {e}")
+            return None
+        
+        return self.find_image_on_screen(template, region, method, grayscale)
+    
+    def find_image_on_screen(
+        self,
+        template: np.ndarray,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        method: str = 'TM_CCOEFF_NORMED',
+        grayscale: bool = True,
+        first_match: bool = False
+    ) -> Optional[MatchResult]:
+        """
+        使用已加载的模板图像在屏幕上查找，跳过读取和解码文件
+        
+        Args:
+            template: 模板图像数组，可为 prepare_template 返回的灰度图
+            region: 搜索区域
+            method: 匹配方法
+            grayscale: 是否转换为灰度图
+            first_match: 是否返回自上而下第一个达到阈值的匹配，而不是全图最佳匹配
+        
+        Returns:
+            匹配结果
+        """
+        try:
+            # 截取屏幕（灰度匹配时直接截取灰度图）
+            screenshot = self.take_screenshot(region, grayscale)
+            
+            # 执行匹配
+            result = self.match_template(screenshot, template, method, grayscale, first_match)
+            
+            # 如果指定了区域，需要调整坐标
+            if result and region:
                 result.x += region[0]
                 result.y += region[1]
             
@@ -300,6 +1025,291 @@ class VisionEngine(LoggerMixin):
             self.logger.error(f"屏幕查找失败: {e}")
             return None
     
+    def verify_match(
+        self,
+        match_result: MatchResult,
+        template: np.ndarray,
+        max_mean_diff: float = 10.0
+    ) -> bool:
+        """
+        只截取上次匹配位置的小块区域，校验模板是否仍在原处
+        
+        Args:
+            match_result: 上次的匹配结果（屏幕坐标）
+            template: 模板图像数组，单通道时按灰度比较
+            max_mean_diff: 允许的平均绝对像素差
+        
+        Returns:
+            模板仍在原位置时返回True
+        """
+        try:
+            region = (match_result.x, match_result.y, match_result.width, match_result.height)
+            patch = self.take_screenshot(region, grayscale=template.ndim == 2)
+            if patch.shape != template.shape:
+                return False
+            
+            return cv2.mean(cv2.absdiff(patch, template))[0] <= max_mean_diff
+            
+        except Exception as e:
+            self.logger.debug(f"匹配位置校验失败: {e}")
+            return False
+    
+    def wait_until_gone(
+        self,
+        match_result: MatchResult,
+        template: np.ndarray,
+        timeout: float = 2.0,
+        interval: float = 0.05,
+        margin: int = 8
+    ) -> bool:
+        """
+        等待模板从上次匹配的位置消失，例如点击按钮后等待对话框关闭
+        
+        每次只截取匹配位置向外扩展 margin 像素的小块区域，用与查找相同的
+        TM_CCOEFF_NORMED 和置信度阈值判断模板是否仍在。不用 verify_match 的像素差：
+        点击后鼠标仍停在按钮上，悬停或按下的着色就足以让像素差超限，按钮还在却被当作已消失。
+        
+        Args:
+            match_result: 上次的匹配结果（屏幕坐标）
+            template: 模板图像数组
+            timeout: 超时时间（秒）
+            interval: 检查间隔（秒）
+            margin: 截取区域向外扩展的像素数，容许对话框关闭动画中的少量位移
+        
+        Returns:
+            模板已消失返回True，超时返回False
+        """
+        left = max(match_result.x - margin, 0)
+        top = max(match_result.y - margin, 0)
+        region = (left, top,
+                  match_result.x + match_result.width + margin - left,
+                  match_result.y + match_result.height + margin - top)
+        
+        deadline = time.monotonic() + timeout
+        while self._present_in_region(region, template):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.logger.debug(f"等待模板消失超时: {match_result}")
+                return False
+            time.sleep(min(interval, remaining))
+        return True
+    
+    def _present_in_region(self, region: Tuple[int, int, int, int], template: np.ndarray) -> bool:
+        """截取区域并用模板匹配判断模板是否仍在，截图失败时按仍在处理"""
+        try:
+            patch = self.take_screenshot(region, grayscale=template.ndim == 2)
+        except Exception as e:
+            self.logger.debug(f"截取校验区域失败: {e}")
+            return True
+        return self.match_template(patch, template) is not None
+    
+    def find_on_screen_orb(
+        self,
+        template_item: 'TemplateItem',
+        region: Optional[Tuple[int, int, int, int]] = None,
+        min_matches: int = 8,
+        max_distance: int = 64
+    ) -> Optional[MatchResult]:
+        """
+        使用ORB特征点在屏幕上查找模板
+        
+        模板的关键点和描述子在首次使用时计算并缓存在 template_item 上。
+        模板特征点不足（如很小的图标）时改用灰度模板匹配。
+        
+        Args:
+            template_item: 模板项
+            region: 搜索区域
+            min_matches: RANSAC内点的最少数量
+            max_distance: 描述子汉明距离上限
+        
+        Returns:
+            匹配结果，置信度为内点占比
+        """
+        try:
+            template, template_keypoints, template_descriptors = self._orb_features(template_item)
+            if template_descriptors is None or len(template_keypoints) < min_matches:
+                self.logger.debug(f"模板特征点不足，改用模板匹配: {template_item.path}")
+                return self.find_image_on_screen(template, region)
+            
+            screen_keypoints, screen_descriptors = self._orb_detect_screen(region)
+            if screen_descriptors is None:
+                return None
+            
+            matches = [m for m in self._orb_matcher.match(template_descriptors, screen_descriptors)
+                       if m.distance <= max_distance]
+            if len(matches) < min_matches:
+                self.logger.debug(f"ORB匹配点不足: {len(matches)} < {min_matches}")
+                return None
+            
+            src_points = [template_keypoints[m.queryIdx].pt for m in matches]
+            dst_points = [screen_keypoints[m.trainIdx].pt for m in matches]
+            match_result = self._orb_match_result(template, src_points, dst_points, min_matches, region)
+            if match_result:
+                self.logger.debug(f"ORB匹配成功: {match_result}")
+            return match_result
+            
+        except Exception as e:
+            self.logger.error(f"ORB屏幕查找失败: {e}")
+            return None
+    
+    def build_orb_index(self, templates: Dict[str, 'TemplateItem'], min_keypoints: int = 8) -> int:
+        """
+        为多个模板建立ORB描述子索引（FLANN LSH），供 locate_any 一次查询所有模板
+        
+        Args:
+            templates: 模板名称到模板项的映射
+            min_keypoints: 参与索引的模板最少特征点数，特征点过少的模板被跳过
+        
+        Returns:
+            加入索引的模板数量
+        """
+        names = []
+        features = []
+        descriptors = []
+        
+        for name, template_item in templates.items():
+            try:
+                template, keypoints, template_descriptors = self._orb_features(template_item)
+            except Exception as e:
+                self.logger.warning(f"计算模板特征失败: {name}, 错误: {e}")
+                continue
+            
+            if template_descriptors is None or len(keypoints) < min_keypoints:
+                self.logger.debug(f"模板特征点不足，不加入索引: {name}")
+                continue
+            
+            names.append(name)
+            features.append((template, keypoints))
+            descriptors.append(template_descriptors)
+        
+        if not descriptors:
+            self._orb_index = None
+            return 0
+        
+        matcher = cv2.FlannBasedMatcher(
+            dict(algorithm=6, table_number=6, key_size=12, multi_probe_level=1),  # FLANN_INDEX_LSH
+            dict(checks=50)
+        )
+        matcher.add(descriptors)
+        matcher.train()
+        self._orb_index = (names, features, matcher)
+        
+        self.logger.info(f"ORB索引建立完成，模板数量: {len(names)}")
+        return len(names)
+    
+    def locate_any(
+        self,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        min_matches: int = 8,
+        ratio: float = 0.75
+    ) -> Optional[Tuple[str, MatchResult]]:
+        """
+        截图一次，在 build_orb_index 建立的索引中查找屏幕上出现的模板
+        
+        Args:
+            region: 搜索区域
+            min_matches: RANSAC内点的最少数量
+            ratio: 最近邻距离比阈值
+        
+        Returns:
+            (模板名称, 匹配结果)，匹配点最多且通过几何校验的模板；未建立索引或未找到时返回None
+        """
+        if self._orb_index is None:
+            return None
+        
+        names, features, matcher = self._orb_index
+        
+        try:
+            screen_keypoints, screen_descriptors = self._orb_detect_screen(region)
+            if screen_descriptors is None:
+                return None
+            
+            # 按模板分组通过比值检验的匹配点，imgIdx 为模板在索引中的序号
+            grouped: Dict[int, List[Any]] = {}
+            for pair in matcher.knnMatch(screen_descriptors, k=2):
+                if not pair or (len(pair) == 2 and pair[0].distance >= ratio * pair[1].distance):
+                    continue
+                grouped.setdefault(pair[0].imgIdx, []).append(pair[0])
+            
+            for index, matches in sorted(grouped.items(), key=lambda item: len(item[1]), reverse=True):
+                if len(matches) < min_matches:
+                    break
+                
+                template, template_keypoints = features[index]
+                src_points = [template_keypoints[m.trainIdx].pt for m in matches]
+                dst_points = [screen_keypoints[m.queryIdx].pt for m in matches]
+                match_result = self._orb_match_result(template, src_points, dst_points, min_matches, region)
+                if match_result:
+                    self.logger.debug(f"ORB索引匹配成功: {names[index]}, {match_result}")
+                    return names[index], match_result
+            
+            return None
+            
+        except Exception as e:
+            self.logger.error(f"ORB索引查找失败: {e}")
+            return None
+    
+    def _ensure_orb(self) -> None:
+        """首次使用时创建ORB检测器和交叉验证的汉明距离匹配器"""
+        if self._orb is None:
+            self._orb = cv2.ORB_create(nfeatures=500)
+            self._orb_matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+    
+    def _orb_features(self, template_item: 'TemplateItem') -> Tuple[np.ndarray, Any, Optional[np.ndarray]]:
+        """获取模板的 (灰度模板, 关键点, 描述子)，首次计算后缓存在模板项上"""
+        self._ensure_orb()
+        
+        if template_item.orb_features is None:
+            template = self.prepare_template_item(template_item)
+            keypoints, descriptors = self._orb.detectAndCompute(template, None)
+            template_item.orb_features = (template, keypoints, descriptors)
+        
+        return template_item.orb_features
+    
+    def _orb_detect_screen(self, region: Optional[Tuple[int, int, int, int]]) -> Tuple[Any, Optional[np.ndarray]]:
+        """截图并检测ORB关键点和描述子"""
+        self._ensure_orb()
+        
+        screenshot = self.take_screenshot(region, grayscale=True)
+        return self._orb.detectAndCompute(screenshot, None)
+    
+    def _orb_match_result(
+        self,
+        template: np.ndarray,
+        src_points: List[Tuple[float, float]],
+        dst_points: List[Tuple[float, float]],
+        min_matches: int,
+        region: Optional[Tuple[int, int, int, int]]
+    ) -> Optional[MatchResult]:
+        """
+        用RANSAC估计模板到屏幕的单应矩阵，将模板四角投影到屏幕上取外接矩形
+        
+        Returns:
+            匹配结果，置信度为内点占比；内点不足时返回None
+        """
+        homography, mask = cv2.findHomography(
+            np.float32(src_points).reshape(-1, 1, 2),
+            np.float32(dst_points).reshape(-1, 1, 2),
+            cv2.RANSAC, 5.0
+        )
+        if homography is None:
+            return None
+        
+        inliers = int(mask.sum())
+        if inliers < min_matches:
+            self.logger.debug(f"ORB内点不足: {inliers} < {min_matches}")
+            return None
+        
+        h, w = template.shape[:2]
+        corners = np.float32([[0, 0], [w, 0], [w, h], [0, h]]).reshape(-1, 1, 2)
+        x, y, width, height = cv2.boundingRect(cv2.perspectiveTransform(corners, homography))
+        
+        if region:
+            x += region[0]
+            y += region[1]
+        
+        return MatchResult(x, y, width, height, inliers / len(src_points))
+    
     def find_all_on_screen(
         self,
         template_path: Union[str, Path],
@@ -324,12 +1334,228 @@ class VisionEngine(LoggerMixin):
         try:
             # 加载模板
             template = self.load_template(template_path)
+        except Exception as e:
+            self.logger.error(f"屏幕查找所有匹配项失败: {e}")
+            return []
+        
+        return self.find_all_image_on_screen(template, region, method, grayscale, threshold)
+    
+    def find_template_on_screen(
+        self,
+        template_item: 'TemplateItem',
+        region: Optional[Tuple[int, int, int, int]] = None
+    ) -> Optional[MatchResult]:
+        """
+        使用模板项在屏幕上查找，模板只在首次使用时读取和解码
+        
+        Args:
+            template_item: 模板项
+            region: 搜索区域
+        
+        Returns:
+            匹配结果
+        """
+        try:
+            template = self.prepare_template_item(template_item)
+        except Exception as e:
+            self.logger.error(f"屏幕查找失败: {e}")
+            return None
+        
+        return self.find_image_on_screen(template, region)
+    
+    def find_all_template_on_screen(
+        self,
+        template_item: 'TemplateItem',
+        region: Optional[Tuple[int, int, int, int]] = None,
+        threshold: Optional[float] = None,
+        pyramid_levels: int = 1
+    ) -> List[MatchResult]:
+        """
+        使用模板项在屏幕上查找所有匹配，模板只在首次使用时读取和解码
+        
+        Args:
+            template_item: 模板项
+            region: 搜索区域
+            threshold: 置信度阈值
+            pyramid_levels: 大于1时使用 find_all_matches_pyramid 由粗到细查找
+        
+        Returns:
+            匹配结果列表
+        """
+        try:
+            template = self.prepare_template_item(template_item)
+        except Exception as e:
+            self.logger.error(f"屏幕查找所有匹配项失败: {e}")
+            return []
+        
+        if pyramid_levels <= 1:
+            return self.find_all_image_on_screen(template, region, threshold=threshold)
+        
+        return self.find_all_any_on_screen([template_item], region, threshold, pyramid_levels)
+    
+    def find_any_on_screen(
+        self,
+        template_items: List['TemplateItem'],
+        region: Optional[Tuple[int, int, int, int]] = None
+    ) -> Optional[Tuple['TemplateItem', MatchResult]]:
+        """
+        截图一次，按顺序用多个备选模板查找
+        
+        所有备选模板都在同一帧灰度截图上匹配，返回第一个达到阈值的模板。
+        
+        Args:
+            template_items: 按优先级排列的备选模板项
+            region: 搜索区域
+        
+        Returns:
+            (模板项, 匹配结果)，都没有匹配时返回None
+        """
+        try:
+            screenshot = self.take_screenshot(region, grayscale=True)
+        except Exception as e:
+            self.logger.error(f"屏幕查找失败: {e}")
+            return None
+        
+        return self._match_any(screenshot, template_items, region)
+    
+    def _match_any(
+        self,
+        screenshot: np.ndarray,
+        template_items: List['TemplateItem'],
+        region: Optional[Tuple[int, int, int, int]]
+    ) -> Optional[Tuple['TemplateItem', MatchResult]]:
+        """在已截取的灰度图像上按顺序匹配备选模板，返回屏幕坐标"""
+        for template_item in template_items:
+            try:
+                template = self.prepare_template_item(template_item)
+            except Exception as e:
+                self.logger.error(f"加载模板失败: {e}")
+                continue
             
-            # 截取屏幕
-            screenshot = self.take_screenshot(region)
+            result = self.match_template(screenshot, template)
+            if result:
+                if region:
+                    result.x += region[0]
+                    result.y += region[1]
+                return template_item, result
+        
+        return None
+    
+    def find_all_any_on_screen(
+        self,
+        template_items: List['TemplateItem'],
+        region: Optional[Tuple[int, int, int, int]] = None,
+        threshold: Optional[float] = None,
+        pyramid_levels: int = 1,
+        merge: bool = False
+    ) -> List[MatchResult]:
+        """
+        截图一次，按顺序用多个备选模板查找所有匹配
+        
+        所有备选模板都在同一帧灰度截图上匹配，截图和灰度转换只做一次。
+        
+        Args:
+            template_items: 按优先级排列的备选模板项
+            region: 搜索区域
+            threshold: 置信度阈值
+            pyramid_levels: 大于1时使用 find_all_matches_pyramid 由粗到细查找
+            merge: 为True时用所有模板匹配并合并结果，同一目标可能被多个模板匹配到，需由调用方用 nms 去重
+        
+        Returns:
+            第一个有匹配的模板的匹配结果列表，都没有匹配时返回空列表；merge 时为所有模板的匹配结果
+        """
+        try:
+            screenshot = self.take_screenshot(region, grayscale=True)
+        except Exception as e:
+            self.logger.error(f"屏幕查找所有匹配项失败: {e}")
+            return []
+        
+        merged: List[MatchResult] = []
+        for template_item in template_items:
+            try:
+                template = self.prepare_template_item(template_item)
+            except Exception as e:
+                self.logger.error(f"加载模板失败: {e}")
+                continue
+            
+            if pyramid_levels > 1:
+                results = self.find_all_matches_pyramid(screenshot, template, pyramid_levels, threshold)
+            else:
+                results = self.find_all_matches(screenshot, template, threshold=threshold)
+            if results:
+                self.logger.debug(f"模板 {template_item.path.name} 找到 {len(results)} 个匹配项")
+                if region:
+                    for result in results:
+                        result.x += region[0]
+                        result.y += region[1]
+                if not merge:
+                    return results
+                merged.extend(results)
+        
+        return merged
+    
+    def find_on_screen_pyramid(
+        self,
+        template_pyramid: List[np.ndarray],
+        region: Optional[Tuple[int, int, int, int]] = None
+    ) -> Optional[MatchResult]:
+        """
+        使用金字塔模板匹配在屏幕上查找
+        
+        Args:
+            template_pyramid: prepare_template_pyramid 返回的灰度模板金字塔
+            region: 搜索区域
+        
+        Returns:
+            匹配结果
+        """
+        try:
+            screenshot = self.take_screenshot(region, grayscale=True)
+            result = self.match_template_pyramid(screenshot, template_pyramid)
+            
+            if result and region:
+                result.x += region[0]
+                result.y += region[1]
+            
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"屏幕查找失败: {e}")
+            return None
+    
+    def find_all_image_on_screen(
+        self,
+        template: np.ndarray,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        method: str = 'TM_CCOEFF_NORMED',
+        grayscale: bool = True,
+        threshold: Optional[float] = None,
+        pyramid_levels: int = 1
+    ) -> List[MatchResult]:
+        """
+        使用已加载的模板图像在屏幕上查找所有匹配，跳过读取和解码文件
+        
+        Args:
+            template: 模板图像数组，可为 prepare_template 返回的灰度图
+            region: 搜索区域
+            method: 匹配方法
+            grayscale: 是否转换为灰度图
+            threshold: 置信度阈值
+            pyramid_levels: 大于1且为默认的灰度 TM_CCOEFF_NORMED 匹配时，
+                使用 find_all_matches_pyramid 由粗到细查找
+        
+        Returns:
+            匹配结果列表
+        """
+        try:
+            # 截取屏幕（灰度匹配时直接截取灰度图）
+            screenshot = self.take_screenshot(region, grayscale)
             
             # 执行匹配
-            results = self.find_all_matches(screenshot, template, method, grayscale, threshold)
+            if pyramid_levels > 1 and grayscale and method == 'TM_CCOEFF_NORMED':
+                results = self.find_all_matches_pyramid(screenshot, template, pyramid_levels, threshold)
+            else:
+                results = self.find_all_matches(screenshot, template, method, grayscale, threshold)
             
             # 如果指定了区域，需要调整坐标
             if results and region:
@@ -362,8 +1588,6 @@ class VisionEngine(LoggerMixin):
         Returns:
             匹配结果
         """
-        import time
-        
         start_time = time.time()
         self.logger.info(f"等待模板出现: {template_path}, 超时: {timeout}秒")
         
@@ -378,6 +1602,198 @@ class VisionEngine(LoggerMixin):
         self.logger.warning(f"等待模板超时: {template_path}")
         return None
     
+    def wait_for_any_template(
+        self,
+        template_items: List['TemplateItem'],
+        timeout: float = 10.0,
+        interval: float = 0.5,
+        region: Optional[Tuple[int, int, int, int]] = None
+    ) -> Optional[Tuple['TemplateItem', MatchResult]]:
+        """
+        等待多个备选模板中的任意一个出现
+        
+        每次检查只截图一次，所有模板在同一帧上匹配，超时时间由所有模板共享；
+        画面与上次检查时完全相同时跳过匹配。
+        
+        Args:
+            template_items: 按优先级排列的备选模板项
+            timeout: 超时时间（秒）
+            interval: 检查间隔（秒）
+            region: 搜索区域
+        
+        Returns:
+            (模板项, 匹配结果)，超时返回None
+        """
+        names = ', '.join(item.path.name for item in template_items)
+        start_time = time.time()
+        self.logger.info(f"等待模板出现: {names}, 超时: {timeout}秒")
+        
+        previous = None
+        while time.time() - start_time < timeout:
+            try:
+                screenshot = self.take_screenshot(region, grayscale=True)
+            except Exception as e:
+                self.logger.error(f"屏幕查找失败: {e}")
+                screenshot = None
+            
+            if screenshot is not None and not self._same_frame(screenshot, previous):
+                previous = screenshot
+                found = self._match_any(screenshot, template_items, region)
+                if found:
+                    self.logger.info(f"模板找到: {found[0].path.name}, {found[1]}")
+                    return found
+            
+            time.sleep(interval)
+        
+        self.logger.warning(f"等待模板超时: {names}")
+        return None
+    
+    def wait_for_template_adaptive(
+        self,
+        template_path: Union[str, Path, 'TemplateItem'],
+        timeout: float = 10.0,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        initial_interval: float = 0.005,
+        max_interval: float = 0.25,
+        growth: float = 1.4,
+        prefetch: bool = False
+    ) -> Optional[MatchResult]:
+        """
+        等待模板出现，检查间隔自适应增长
+        
+        开始时以很短的间隔检查，界面很快出现时几乎没有额外延迟；每次未找到后间隔乘以 growth，
+        直到 max_interval，长时间等待时减少截图和匹配次数。模板只加载一次。
+        
+        Args:
+            template_path: 模板图像路径，或模板项（使用其上缓存的灰度模板，不再每次检查文件）
+            timeout: 超时时间（秒）
+            region: 搜索区域
+            initial_interval: 初始检查间隔（秒）
+            max_interval: 最大检查间隔（秒）
+            growth: 每次未找到后间隔的增长倍数
+            prefetch: 是否在匹配当前帧的同时由后台线程截取下一帧
+        
+        Returns:
+            匹配结果
+        """
+        try:
+            if isinstance(template_path, (str, Path)):
+                template = self.prepare_template(template_path)
+            else:
+                template = self.prepare_template_item(template_path)
+        except Exception as e:
+            self.logger.error(f"等待模板失败: {e}")
+            return None
+        
+        deadline = time.monotonic() + timeout
+        interval = initial_interval
+        self.logger.info(f"等待模板出现: {template_path}, 超时: {timeout}秒")
+        
+        if prefetch:
+            result = self._wait_prefetch(template, region, deadline, interval, max_interval, growth)
+            if result:
+                self.logger.info(f"模板找到: {result}")
+            else:
+                self.logger.warning(f"等待模板超时: {template_path}")
+            return result
+        
+        while True:
+            result = self.find_image_on_screen(template, region)
+            if result:
+                self.logger.info(f"模板找到: {result}")
+                return result
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            
+            time.sleep(min(interval, remaining))
+            interval = min(interval * growth, max_interval)
+        
+        self.logger.warning(f"等待模板超时: {template_path}")
+        return None
+    
+    def _wait_prefetch(
+        self,
+        template: np.ndarray,
+        region: Optional[Tuple[int, int, int, int]],
+        deadline: float,
+        interval: float,
+        max_interval: float,
+        growth: float
+    ) -> Optional[MatchResult]:
+        """
+        流水线等待：匹配当前帧的同时，后台线程等待检查间隔后截取下一帧
+        
+        每轮耗时约为 max(匹配, 间隔 + 截图)，而不是三者之和；下一帧在间隔结束后才截取，
+        不会比串行等待得到的帧更旧。画面与上一帧完全相同时跳过匹配。
+        返回前取消未完成的截图，已开始的截图等其结束，避免后台截图与后续调用争用截图状态。
+        """
+        if self._capture_pool is None:
+            self._capture_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='capture')
+        
+        abandon = threading.Event()
+        pending = self._capture_pool.submit(self._capture_after, 0.0, region, abandon)
+        previous = None
+        try:
+            while pending is not None:
+                try:
+                    screenshot = pending.result()
+                except Exception as e:
+                    self.logger.error(f"屏幕查找失败: {e}")
+                    screenshot = None
+                
+                # 先提交下一帧的截图，再匹配当前帧
+                remaining = deadline - time.monotonic()
+                pending = None
+                if remaining > 0:
+                    pending = self._capture_pool.submit(
+                        self._capture_after, min(interval, remaining), region, abandon
+                    )
+                    interval = min(interval * growth, max_interval)
+                
+                if screenshot is None or self._same_frame(screenshot, previous):
+                    continue
+                previous = screenshot
+                
+                result = self.match_template(screenshot, template)
+                if result:
+                    if region:
+                        result.x += region[0]
+                        result.y += region[1]
+                    return result
+            
+            return None
+        finally:
+            if pending is not None:
+                abandon.set()
+                if not pending.cancel():
+                    try:
+                        pending.result()
+                    except Exception:
+                        pass
+    
+    @staticmethod
+    def _same_frame(frame: np.ndarray, previous: Optional[np.ndarray]) -> bool:
+        """
+        判断截图与上一帧是否完全相同
+        
+        逐字节比较一帧灰度图不到1毫秒，远小于一次模板匹配；
+        dxcam 无新帧时返回的就是上一帧对象，直接按同一对象判断。
+        """
+        return previous is not None and (frame is previous or np.array_equal(frame, previous))
+    
+    def _capture_after(
+        self,
+        delay: float,
+        region: Optional[Tuple[int, int, int, int]],
+        abandon: threading.Event
+    ) -> Optional[np.ndarray]:
+        """等待 delay 秒后截取灰度图像，等待期间 abandon 被设置则不再截图，返回None"""
+        if abandon.wait(max(delay, 0.0)):
+            return None
+        return self.take_screenshot(region, grayscale=True)
+    
     def save_debug_image(
         self,
         screenshot: np.ndarray,
@@ -433,4 +1849,6 @@ def create_vision_engine(config: dict) -> VisionEngine:
         图像识别引擎实例
     """
     confidence_threshold = config.get('confidence_threshold', 0.8)
-    return VisionEngine(confidence_threshold)
\ No newline at end of file
+    use_gpu = config.get('use_gpu', False)
+    use_opencl = config.get('use_opencl', False)
+    return VisionEngine(confidence_threshold, use_gpu, use_opencl=use_opencl)
\ No newline at end of file
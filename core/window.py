@@ -3,6 +3,8 @@
 使用Win32 API获取窗口信息和进行窗口操作
 """
 
+import ctypes
+import os
 import time
 from typing import List, Optional, Tuple, Dict, Any
 from dataclasses import dataclass
@@ -17,6 +19,58 @@ import psutil
 from .logger import LoggerMixin
 
 
+# OpenProcess 访问权限：仅查询有限信息，普通权限即可打开大多数进程
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+# SetWinEventHook 监听的事件：前台切换、窗口显示、标题变化
+_EVENT_SYSTEM_FOREGROUND = 0x0003
+_EVENT_OBJECT_SHOW = 0x8002
+_EVENT_OBJECT_NAMECHANGE = 0x800C
+_WINEVENT_OUTOFCONTEXT = 0x0000
+_WINEVENT_SKIPOWNPROCESS = 0x0002
+_OBJID_WINDOW = 0
+
+# MsgWaitForMultipleObjects / PeekMessage 参数
+_QS_ALLINPUT = 0x04FF
+_PM_REMOVE = 0x0001
+_WAIT_FAILED = 0xFFFFFFFF
+
+# GetSystemMetrics 索引：虚拟桌面（所有显示器）的左上角和宽高
+_SM_XVIRTUALSCREEN, _SM_YVIRTUALSCREEN, _SM_CXVIRTUALSCREEN, _SM_CYVIRTUALSCREEN = 76, 77, 78, 79
+
+
+def _proc_name(pid: int) -> Optional[str]:
+    """
+    通过 QueryFullProcessImageNameW 直接获取进程名
+    
+    Args:
+        pid: 进程ID
+    
+    Returns:
+        进程名，无法打开进程时返回None
+    """
+    try:
+        kernel32 = ctypes.windll.kernel32
+    except AttributeError:
+        return None
+    
+    # 句柄按指针宽度返回，避免64位系统上被截断为int
+    kernel32.OpenProcess.restype = ctypes.c_void_p
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    handle = ctypes.c_void_p(handle)
+    
+    try:
+        size = ctypes.c_ulong(1024)
+        buffer = ctypes.create_unicode_buffer(size.value)
+        if not kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+            return None
+        return os.path.basename(buffer.value)
+    finally:
+        kernel32.CloseHandle(handle)
+
+
 class WindowState(Enum):
     """窗口状态枚举"""
     NORMAL = 0
@@ -25,9 +79,12 @@ class WindowState(Enum):
     HIDDEN = 3
 
 
-@dataclass
+@dataclass(frozen=True)
 class WindowInfo:
-    """窗口信息类"""
+    """窗口信息类（不可变，窗口变化后返回新的实例）"""
+    # Python 3.8 不支持 dataclass(slots=True)，手动声明 __slots__
+    __slots__ = ('hwnd', 'title', 'class_name', 'pid', 'process_name', 'rect', 'state', 'visible', 'enabled')
+    
     hwnd: int
     title: str
     class_name: str
@@ -63,71 +120,55 @@ class WindowInfo:
 class WindowManager(LoggerMixin):
     """窗口管理器"""
     
-    def __init__(self, search_timeout: float = 5.0, activate_timeout: float = 2.0):
+    def __init__(self, search_timeout: float = 5.0, activate_timeout: float = 2.0,
+                 cache_ttl: float = 0.25):
         """
         初始化窗口管理器
         
         Args:
             search_timeout: 搜索超时时间
             activate_timeout: 激活超时时间
+            cache_ttl: 窗口查找索引的缓存时间（秒），0表示不缓存
         """
         self.search_timeout = search_timeout
         self.activate_timeout = activate_timeout
+        self.cache_ttl = cache_ttl
+        
+        # 窗口查找索引，在 cache_ttl 内由多次查找共享同一次枚举结果
+        self._cache_time: Optional[float] = None
+        self._windows: List[WindowInfo] = []
+        self._titles: List[str] = []
+        self._titles_casefold: List[str] = []
+        self._by_class: Dict[str, List[WindowInfo]] = {}
+        self._by_pid: Dict[int, List[WindowInfo]] = {}
+        self._by_process_lower: Dict[str, List[WindowInfo]] = {}
         
         self.logger.info(f"窗口管理器初始化完成，搜索超时: {search_timeout}秒")
     
     def get_all_windows(self) -> List[WindowInfo]:
         """
-        获取所有窗口信息
+        获取所有窗口信息（cache_ttl 内复用上一次枚举结果）
+        
+        Returns:
+            窗口信息列表
+        """
+        return list(self._refresh_index())
+    
+    def _enumerate_windows(self) -> List[WindowInfo]:
+        """
+        枚举所有可见窗口，不使用缓存
         
         Returns:
             窗口信息列表
         """
         windows = []
+        # 同一进程的多个窗口只查询一次进程名
+        pid_names: Dict[int, str] = {}
         
         def enum_callback(hwnd, param):
-            try:
-                if win32gui.IsWindow(hwnd) and win32gui.IsWindowVisible(hwnd):
-                    title = win32gui.GetWindowText(hwnd)
-                    class_name = win32gui.GetClassName(hwnd)
-                    
-                    # 获取进程信息
-                    _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                    
-                    try:
-                        process = psutil.Process(pid)
-                        process_name = process.name()
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        process_name = "Unknown"
-                    
-                    # 获取窗口位置
-                    rect = win32gui.GetWindowRect(hwnd)
-                    
-                    # 获取窗口状态
-                    placement = win32gui.GetWindowPlacement(hwnd)
-                    state = WindowState(placement[1])
-                    
-                    # 获取窗口属性
-                    visible = win32gui.IsWindowVisible(hwnd)
-                    enabled = win32gui.IsWindowEnabled(hwnd)
-                    
-                    window_info = WindowInfo(
-                        hwnd=hwnd,
-                        title=title,
-                        class_name=class_name,
-                        pid=pid,
-                        process_name=process_name,
-                        rect=rect,
-                        state=state,
-                        visible=visible,
-                        enabled=enabled
-                    )
-                    
-                    windows.append(window_info)
-                    
-            except Exception as e:
-                self.logger.debug(f"获取窗口信息失败: {e}")
-            
+            window_info = self._window_info(hwnd, pid_names)
+            if window_info is not None:
+                windows.append(window_info)
             return True
         
         try:
@@ -139,6 +180,115 @@ class WindowManager(LoggerMixin):
             self.logger.error(f"枚举窗口失败: {e}")
             return []
     
+    def _window_info(self, hwnd: int, pid_names: Optional[Dict[int, str]] = None) -> Optional[WindowInfo]:
+        """
+        查询单个窗口的信息
+        
+        Args:
+            hwnd: 窗口句柄
+            pid_names: 进程名缓存，枚举时同一进程只查询一次
+        
+        Returns:
+            窗口信息，窗口不存在、不可见或查询失败时返回None
+        """
+        try:
+            if not (win32gui.IsWindow(hwnd) and win32gui.IsWindowVisible(hwnd)):
+                return None
+            
+            title = win32gui.GetWindowText(hwnd)
+            class_name = win32gui.GetClassName(hwnd)
+            
+            # 获取进程信息
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+            
+            process_name = pid_names.get(pid) if pid_names is not None else None
+            if process_name is None:
+                process_name = self._get_process_name(pid)
+                if pid_names is not None:
+                    pid_names[pid] = process_name
+            
+            # 获取窗口位置
+            rect = win32gui.GetWindowRect(hwnd)
+            
+            # 获取窗口状态
+            placement = win32gui.GetWindowPlacement(hwnd)
+            state = WindowState(placement[1])
+            
+            # 获取窗口属性
+            visible = win32gui.IsWindowVisible(hwnd)
+            enabled = win32gui.IsWindowEnabled(hwnd)
+            
+            return WindowInfo(
+                hwnd=hwnd,
+                title=title,
+                class_name=class_name,
+                pid=pid,
+                process_name=process_name,
+                rect=rect,
+                state=state,
+                visible=visible,
+                enabled=enabled
+            )
+            
+        except Exception as e:
+            self.logger.debug(f"获取窗口信息失败: {e}")
+            return None
+    
+    def _get_process_name(self, pid: int) -> str:
+        """
+        获取进程名，优先直接调用Win32 API，失败时回退到psutil
+        
+        Args:
+            pid: 进程ID
+        
+        Returns:
+            进程名，无法获取时返回"Unknown"
+        """
+        process_name = _proc_name(pid)
+        if process_name:
+            return process_name
+        
+        try:
+            return psutil.Process(pid).name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return "Unknown"
+    
+    def _refresh_index(self) -> List[WindowInfo]:
+        """
+        刷新窗口查找索引，缓存未过期时直接复用
+        
+        Returns:
+            窗口信息列表
+        """
+        now = time.monotonic()
+        if self._cache_time is not None and now - self._cache_time < self.cache_ttl:
+            return self._windows
+        
+        windows = self._enumerate_windows()
+        by_class: Dict[str, List[WindowInfo]] = {}
+        by_pid: Dict[int, List[WindowInfo]] = {}
+        by_process_lower: Dict[str, List[WindowInfo]] = {}
+        
+        for window in windows:
+            by_class.setdefault(window.class_name, []).append(window)
+            by_pid.setdefault(window.pid, []).append(window)
+            by_process_lower.setdefault(window.process_name.lower(), []).append(window)
+        
+        self._windows = windows
+        # 与 _windows 一一对应的标题列，标题查找时无需逐个访问对象属性
+        self._titles = [window.title for window in windows]
+        self._titles_casefold = [title.casefold() for title in self._titles]
+        self._by_class = by_class
+        self._by_pid = by_pid
+        self._by_process_lower = by_process_lower
+        self._cache_time = now
+        
+        return windows
+    
+    def invalidate_cache(self) -> None:
+        """使窗口缓存失效，下次获取或查找窗口时重新枚举"""
+        self._cache_time = None
+    
     def find_window_by_title(self, title: str, exact_match: bool = False) -> Optional[WindowInfo]:
         """
         根据标题查找窗口
@@ -150,15 +300,19 @@ class WindowManager(LoggerMixin):
         Returns:
             窗口信息
         """
-        windows = self.get_all_windows()
+        windows = self._refresh_index()
         
-        for window in windows:
-            if exact_match:
-                if window.title == title:
-                    return window
-            else:
-                if title.lower() in window.title.lower():
-                    return window
+        if exact_match:
+            try:
+                return windows[self._titles.index(title)]
+            except ValueError:
+                return None
+        
+        # 标题在刷新索引时已统一折叠大小写，这里只需折叠目标一次
+        target = title.casefold()
+        for i, window_title in enumerate(self._titles_casefold):
+            if target in window_title:
+                return windows[i]
         
         return None
     
@@ -172,13 +326,10 @@ class WindowManager(LoggerMixin):
         Returns:
             窗口信息
         """
-        windows = self.get_all_windows()
+        self._refresh_index()
         
-        for window in windows:
-            if window.class_name == class_name:
-                return window
-        
-        return None
+        windows = self._by_class.get(class_name)
+        return windows[0] if windows else None
     
     def find_window_by_process(self, process_name: str) -> List[WindowInfo]:
         """
@@ -190,14 +341,9 @@ class WindowManager(LoggerMixin):
         Returns:
             窗口信息列表
         """
-        windows = self.get_all_windows()
-        result = []
+        self._refresh_index()
         
-        for window in windows:
-            if window.process_name.lower() == process_name.lower():
-                result.append(window)
-        
-        return result
+        return list(self._by_process_lower.get(process_name.lower(), []))
     
     def find_window_by_pid(self, pid: int) -> List[WindowInfo]:
         """
@@ -209,14 +355,9 @@ class WindowManager(LoggerMixin):
         Returns:
             窗口信息列表
         """
-        windows = self.get_all_windows()
-        result = []
-        
-        for window in windows:
-            if window.pid == pid:
-                result.append(window)
+        self._refresh_index()
         
-        return result
+        return list(self._by_pid.get(pid, []))
     
     def wait_for_window(self, 
                        title: Optional[str] = None,
@@ -241,25 +382,152 @@ class WindowManager(LoggerMixin):
         start_time = time.time()
         
         while time.time() - start_time < timeout:
-            if title:
-                window = self.find_window_by_title(title)
-                if window:
-                    return window
-            
-            if class_name:
-                window = self.find_window_by_class(class_name)
-                if window:
-                    return window
-            
-            if process_name:
-                windows = self.find_window_by_process(process_name)
-                if windows:
-                    return windows[0]
+            window = self._find_first(title, class_name, process_name)
+            if window:
+                return window
             
             time.sleep(0.1)
         
         return None
     
+    def wait_for_window_event(self,
+                              title: Optional[str] = None,
+                              class_name: Optional[str] = None,
+                              process_name: Optional[str] = None,
+                              timeout: Optional[float] = None,
+                              hwnd_hint: Optional[int] = None) -> Optional[WindowInfo]:
+        """
+        等待窗口出现（事件驱动）
+        
+        通过 SetWinEventHook 监听窗口显示、标题变化和前台切换事件，仅在事件到达时重新查找，
+        等待期间线程阻塞在 MsgWaitForMultipleObjects 上。无法挂钩时回退到 wait_for_window 轮询。
+        
+        Args:
+            title: 窗口标题
+            class_name: 窗口类名
+            process_name: 进程名
+            timeout: 超时时间
+            hwnd_hint: 上次找到的窗口句柄，该窗口仍然存在且符合条件时直接返回，不枚举所有窗口
+        
+        Returns:
+            窗口信息
+        """
+        if timeout is None:
+            timeout = self.search_timeout
+        
+        if hwnd_hint:
+            window = self._window_info(hwnd_hint)
+            if window and self._matches(window, title, class_name, process_name):
+                return window
+        
+        # 窗口可能已经存在
+        window = self._find_first(title, class_name, process_name)
+        if window:
+            return window
+        
+        try:
+            user32 = ctypes.windll.user32
+            from ctypes import wintypes
+        except (AttributeError, ImportError):
+            return self.wait_for_window(title, class_name, process_name, timeout)
+        
+        changed = False
+        
+        # 回调在本线程的消息分发中执行，只做标记，查找放到分发结束后
+        @ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        def win_event_callback(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            nonlocal changed
+            if hwnd and id_object == _OBJID_WINDOW:
+                changed = True
+        
+        user32.SetWinEventHook.restype = ctypes.c_void_p
+        hooks = []
+        for event in (_EVENT_SYSTEM_FOREGROUND, _EVENT_OBJECT_SHOW, _EVENT_OBJECT_NAMECHANGE):
+            hook = user32.SetWinEventHook(event, event, None, win_event_callback, 0, 0,
+                                          _WINEVENT_OUTOFCONTEXT | _WINEVENT_SKIPOWNPROCESS)
+            if hook:
+                hooks.append(ctypes.c_void_p(hook))
+        
+        if not hooks:
+            self.logger.warning("注册窗口事件钩子失败，改为轮询等待")
+            return self.wait_for_window(title, class_name, process_name, timeout)
+        
+        msg = wintypes.MSG()
+        deadline = time.monotonic() + timeout
+        
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                
+                result = user32.MsgWaitForMultipleObjects(0, None, False, int(remaining * 1000) + 1, _QS_ALLINPUT)
+                if result == _WAIT_FAILED:
+                    self.logger.warning("等待窗口事件失败，改为轮询等待")
+                    return self.wait_for_window(title, class_name, process_name, deadline - time.monotonic())
+                
+                # 分发消息，WinEvent 回调在此期间执行
+                while user32.PeekMessageW(ctypes.byref(msg), None, 0, 0, _PM_REMOVE):
+                    user32.TranslateMessage(ctypes.byref(msg))
+                    user32.DispatchMessageW(ctypes.byref(msg))
+                
+                if changed:
+                    changed = False
+                    self.invalidate_cache()
+                    window = self._find_first(title, class_name, process_name)
+                    if window:
+                        return window
+        finally:
+            for hook in hooks:
+                user32.UnhookWinEvent(hook)
+    
+    def _find_first(self,
+                    title: Optional[str],
+                    class_name: Optional[str],
+                    process_name: Optional[str]) -> Optional[WindowInfo]:
+        """
+        依次按标题、类名、进程名查找窗口
+        
+        Returns:
+            第一个找到的窗口，未找到时返回None
+        """
+        if title:
+            window = self.find_window_by_title(title)
+            if window:
+                return window
+        
+        if class_name:
+            window = self.find_window_by_class(class_name)
+            if window:
+                return window
+        
+        if process_name:
+            windows = self.find_window_by_process(process_name)
+            if windows:
+                return windows[0]
+        
+        return None
+    
+    @staticmethod
+    def _matches(window: WindowInfo,
+                 title: Optional[str],
+                 class_name: Optional[str],
+                 process_name: Optional[str]) -> bool:
+        """
+        判断窗口是否符合任一查找条件，条件含义与 _find_first 一致
+        
+        Returns:
+            符合标题（不区分大小写的包含）、类名或进程名之一时返回True
+        """
+        if title and title.casefold() in window.title.casefold():
+            return True
+        if class_name and window.class_name == class_name:
+            return True
+        if process_name and window.process_name.lower() == process_name.lower():
+            return True
+        return False
+    
     def activate_window(self, window_info: WindowInfo) -> bool:
         """
         激活窗口
@@ -291,6 +559,7 @@ class WindowManager(LoggerMixin):
             # 确保窗口可见
             win32gui.ShowWindow(hwnd, win32con.SW_SHOW)
             
+            self.invalidate_cache()
             self.logger.info(f"窗口激活成功: {window_info.title}")
             return True
             
@@ -314,6 +583,7 @@ class WindowManager(LoggerMixin):
             # 发送关闭消息
             win32gui.SendMessage(hwnd, win32con.WM_CLOSE, 0, 0)
             
+            self.invalidate_cache()
             self.logger.info(f"窗口关闭成功: {window_info.title}")
             return True
             
@@ -335,6 +605,7 @@ class WindowManager(LoggerMixin):
             hwnd = window_info.hwnd
             win32gui.ShowWindow(hwnd, win32con.SW_MINIMIZE)
             
+            self.invalidate_cache()
             self.logger.info(f"窗口最小化成功: {window_info.title}")
             return True
             
@@ -356,6 +627,7 @@ class WindowManager(LoggerMixin):
             hwnd = window_info.hwnd
             win32gui.ShowWindow(hwnd, win32con.SW_MAXIMIZE)
             
+            self.invalidate_cache()
             self.logger.info(f"窗口最大化成功: {window_info.title}")
             return True
             
@@ -363,6 +635,36 @@ class WindowManager(LoggerMixin):
             self.logger.error(f"窗口最大化失败: {e}")
             return False
     
+    def get_window_rect(self, window_info: WindowInfo) -> Tuple[int, int, int, int]:
+        """
+        获取窗口的屏幕区域，格式与截图区域一致
+        
+        最大化窗口的边框可能位于屏幕之外（坐标为负），起点截断到0；
+        超出虚拟桌面右边和下边的部分同样截断，越界的区域会让 dxcam 截图失败。
+        
+        Args:
+            window_info: 窗口信息
+        
+        Returns:
+            (x, y, width, height)
+        """
+        try:
+            left, top, right, bottom = win32gui.GetWindowRect(window_info.hwnd)
+        except Exception as e:
+            self.logger.debug(f"获取窗口位置失败，使用缓存的位置: {e}")
+            left, top, right, bottom = window_info.rect
+        
+        try:
+            right = min(right, win32api.GetSystemMetrics(_SM_XVIRTUALSCREEN)
+                        + win32api.GetSystemMetrics(_SM_CXVIRTUALSCREEN))
+            bottom = min(bottom, win32api.GetSystemMetrics(_SM_YVIRTUALSCREEN)
+                         + win32api.GetSystemMetrics(_SM_CYVIRTUALSCREEN))
+        except Exception as e:
+            self.logger.debug(f"获取虚拟桌面范围失败，不截断右下边界: {e}")
+        
+        x, y = max(left, 0), max(top, 0)
+        return (x, y, max(right - x, 0), max(bottom - y, 0))
+    
     def resize_window(self, window_info: WindowInfo, width: int, height: int) -> Optional[WindowInfo]:
         """
         调整窗口大小
@@ -398,6 +700,7 @@ class WindowManager(LoggerMixin):
                 enabled=window_info.enabled
             )
             
+            self.invalidate_cache()
             self.logger.info(f"窗口大小调整成功: {window_info.title}, 新尺寸: {width}x{height}")
             return updated_window_info
             
@@ -437,6 +740,7 @@ class WindowManager(LoggerMixin):
                 enabled=window_info.enabled
             )
             
+            self.invalidate_cache()
             self.logger.info(f"窗口移动成功: {window_info.title}, 新位置: ({x}, {y})")
             return updated_window_info
             
@@ -483,11 +787,7 @@ class WindowManager(LoggerMixin):
                 # 获取进程信息
                 _, pid = win32process.GetWindowThreadProcessId(hwnd)
                 
-                try:
-                    process = psutil.Process(pid)
-                    process_name = process.name()
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    process_name = "Unknown"
+                process_name = self._get_process_name(pid)
                 
                 # 获取窗口位置
                 rect = win32gui.GetWindowRect(hwnd)
@@ -567,5 +867,6 @@ def create_window_manager(config: dict) -> WindowManager:
     """
     return WindowManager(
         search_timeout=config.get('search_timeout', 5.0),
-        activate_timeout=config.get('activate_timeout', 2.0)
+        activate_timeout=config.get('activate_timeout', 2.0),
+        cache_ttl=config.get('cache_ttl', 0.25)
     )
\ No newline at end of file
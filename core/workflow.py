@@ -7,15 +7,21 @@ import importlib
 import sys
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type
 
 from .config import Config
 from .logger import LoggerMixin
 
+if TYPE_CHECKING:
+    from .template import TemplateItem
+
 
 class WorkflowStep(LoggerMixin, ABC):
     """工作流步骤基类"""
     
+    # execute 依赖的核心组件（上下文键 -> 类型），工作流执行前统一检查一次
+    required_components: Dict[str, type] = {}
+    
     def __init__(self, name: str, config: Dict[str, Any]):
         """
         初始化工作流步骤
@@ -27,6 +33,69 @@ class WorkflowStep(LoggerMixin, ABC):
         super().__init__()
         self.name = name
         self.config = config
+        
+        # 由 bind() 从执行上下文中取出的核心组件
+        self._vision_engine = None
+        self._mouse_controller = None
+        self._window_manager = None
+        self._template_manager = None
+        
+        # 已解析的模板项，按模板名称缓存
+        self._templates: Dict[str, 'TemplateItem'] = {}
+    
+    def bind(self, context: Dict[str, Any]) -> None:
+        """
+        绑定执行上下文中的核心组件，execute 中直接读取属性，无需每次查字典
+        
+        Args:
+            context: 执行上下文
+        """
+        self._vision_engine = context.get('vision_engine')
+        self._mouse_controller = context.get('mouse_controller')
+        self._window_manager = context.get('window_manager')
+        
+        template_manager = context.get('template_manager')
+        if template_manager is not self._template_manager:
+            self.invalidate()
+        self._template_manager = template_manager
+    
+    def check_components(self) -> bool:
+        """
+        检查已绑定的核心组件是否满足 required_components
+        
+        Returns:
+            所有依赖组件都存在且类型正确时返回True
+        """
+        for name, component_type in self.required_components.items():
+            if not isinstance(getattr(self, f'_{name}'), component_type):
+                self.logger.error(f"步骤 {self.name} 缺少核心组件: {name}")
+                return False
+        return True
+    
+    def invalidate(self) -> None:
+        """
+        清除步骤缓存的解析结果（如模板项），模板热更新后调用
+        
+        绑定新的模板管理器时会自动调用
+        """
+        self._templates.clear()
+    
+    def _get_template(self, template_name: str) -> Optional['TemplateItem']:
+        """
+        获取模板项，首次解析后缓存在步骤上，不再每次执行都查找
+        
+        Args:
+            template_name: 模板名称
+        
+        Returns:
+            模板项，不存在时返回None（不缓存，下次执行重新解析）
+        """
+        template_item = self._templates.get(template_name)
+        if template_item is None:
+            template_item = self._template_manager.get_template(template_name)
+            if template_item is not None:
+                self._templates[template_name] = template_item
+        return template_item
     
     @abstractmethod
     def execute(self, context: Dict[str, Any]) -> bool:
@@ -168,6 +237,7 @@ class BaseWorkflow(LoggerMixin, ABC):
         Args:
             step: 工作流步骤
         """
+        step.bind(self.context)
         self.steps.append(step)
     
     def execute(self) -> bool:
@@ -180,29 +250,36 @@ class BaseWorkflow(LoggerMixin, ABC):
         self.logger.info(f"开始执行工作流: {self.name}")
         
         try:
-            # 验证所有步骤
+            # 验证所有步骤，并按当前上下文重新绑定组件（添加步骤后上下文可能已变化）
             for step in self.steps:
-                if not step.validate():
+                step.bind(self.context)
+                if not step.check_components() or not step.validate():
                     self.logger.error(f"步骤验证失败: {step.name}")
                     return False
             
+            # 循环内频繁使用的属性和停止检查函数只取一次
+            steps = self.steps
+            step_count = len(steps)
+            context = self.context
+            stop_check = context.get('_stop_check_func')
+            
             # 执行步骤（支持跳转）
             i = 0
-            while i < len(self.steps):
-                step = self.steps[i]
+            while i < step_count:
+                step = steps[i]
                 
                 # 设置当前步骤索引到上下文，供LoopStartStep使用
-                self.context['_current_step_index'] = i
+                context['_current_step_index'] = i
                 
                 # 检查是否需要停止
-                if self.context.get('_stop_check_func') and self.context['_stop_check_func']():
+                if stop_check and stop_check():
                     self.logger.info("检测到停止信号，工作流执行中断")
                     return False
                 
-                self.logger.info(f"执行步骤 {i+1}/{len(self.steps)}: {step.name}")
+                self.logger.info(f"执行步骤 {i+1}/{step_count}: {step.name}")
                 
                 try:
-                    success = step.execute(self.context)
+                    success = step.execute(context)
                     if not success:
                         self.logger.error(f"步骤执行失败: {step.name}")
                         return False
@@ -210,9 +287,9 @@ class BaseWorkflow(LoggerMixin, ABC):
                     self.logger.info(f"步骤执行成功: {step.name}")
                     
                     # 检查是否需要跳转
-                    if '_jump_to_step' in self.context:
-                        jump_to = self.context.pop('_jump_to_step')
-                        if 0 <= jump_to < len(self.steps):
+                    jump_to = context.pop('_jump_to_step', None)
+                    if jump_to is not None:
+                        if 0 <= jump_to < step_count:
                             i = jump_to
                             self.logger.info(f"跳转到步骤 {i+1}")
                             continue
@@ -7,8 +7,11 @@ import pytest
 import tempfile
 import shutil
 from pathlib import Path
+from collections import namedtuple
 from unittest.mock import MagicMock, patch
 
+from _pytest.mark.expression import Expression
+
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -20,6 +23,17 @@ from core.mouse import MouseController
 from core.window import WindowManager
 from core.template import TemplateManager
 
+# 模拟的屏幕尺寸，与 pyautogui.size() 的返回值结构一致
+SCREEN_SIZE = namedtuple('Size', ['width', 'height'])(1920, 1080)
+
+
+@pytest.fixture(autouse=True)
+def yaml_cache_dir(tmp_path, monkeypatch):
+    """YAML解析缓存写入每个测试自己的临时目录，不写入用户缓存目录"""
+    cache_dir = tmp_path / "yaml_cache"
+    monkeypatch.setattr("core.config._YAML_CACHE_DIR", cache_dir)
+    return cache_dir
+
 
 @pytest.fixture
 def temp_dir():
@@ -134,9 +148,8 @@ def mock_template_manager(temp_dir):
         yield manager
 
 
-@pytest.fixture
-def sample_template_image(temp_dir):
-    """创建示例模板图像"""
+def _write_sample_template(directory: Path) -> Path:
+    """在目录中写入示例模板图像（黑底白色方块），返回图像路径"""
     import numpy as np
     import cv2
     
@@ -144,12 +157,29 @@ def sample_template_image(temp_dir):
     image = np.zeros((100, 100, 3), dtype=np.uint8)
     cv2.rectangle(image, (25, 25), (75, 75), (255, 255, 255), -1)
     
-    template_path = temp_dir / "test_template.png"
+    template_path = directory / "test_template.png"
     cv2.imwrite(str(template_path), image)
     
     return template_path
 
 
+@pytest.fixture
+def sample_template_image(temp_dir):
+    """创建示例模板图像"""
+    return _write_sample_template(temp_dir)
+
+
+@pytest.fixture(scope="session")
+def loaded_template(tmp_path_factory):
+    """已加载的示例模板图像（会话级共享，只读）"""
+    template_path = _write_sample_template(tmp_path_factory.mktemp("templates"))
+    
+    template = VisionEngine().load_template(template_path)
+    # 多个测试共享同一数组，禁止写入以防相互影响
+    template.setflags(write=False)
+    return template
+
+
 @pytest.fixture
 def sample_screenshot():
     """创建示例屏幕截图"""
@@ -180,12 +210,11 @@ def mock_pyautogui():
          patch('pyautogui.scroll') as mock_scroll, \
          patch('pyautogui.screenshot') as mock_screenshot, \
          patch('pyautogui.position') as mock_position, \
-         patch('pyautogui.size') as mock_size, \
+         patch('pyautogui.size', lambda: SCREEN_SIZE) as mock_size, \
          patch('pyautogui.mouseDown') as mock_mousedown, \
          patch('pyautogui.mouseUp') as mock_mouseup:
         
         mock_position.return_value = MagicMock(x=500, y=500)
-        mock_size.return_value = MagicMock(width=1920, height=1080)
         
         yield {
             'click': mock_click,
@@ -200,6 +229,14 @@ def mock_pyautogui():
         }
 
 
+@pytest.fixture
+def tracking_size(mock_pyautogui):
+    """需要检查调用情况时，将 pyautogui.size 升级为 MagicMock"""
+    with patch('pyautogui.size', MagicMock(return_value=SCREEN_SIZE)) as mock_size:
+        mock_pyautogui['size'] = mock_size
+        yield mock_size
+
+
 @pytest.fixture
 def mock_win32gui():
     """模拟Win32GUI"""
@@ -233,6 +270,14 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "integration: 集成测试")
     config.addinivalue_line("markers", "slow: 慢速测试")
     config.addinivalue_line("markers", "gui: 需要GUI的测试")
+    config.addinivalue_line("markers", "benchmark: 性能基准测试（默认不运行）")
+
+
+def _selects_benchmark(markexpr: str) -> bool:
+    """判断 -m 表达式在只有 benchmark 标记时是否为真"""
+    if not markexpr.strip():
+        return False
+    return Expression.compile(markexpr).evaluate(lambda name, **kwargs: name == "benchmark")
 
 
 def pytest_collection_modifyitems(config, items):
@@ -240,8 +285,16 @@ def pytest_collection_modifyitems(config, items):
     # 为GUI测试添加跳过标记
     skip_gui = pytest.mark.skip(reason="需要GUI环境")
     
+    # 基准测试默认不运行，需通过 -m 表达式显式选择：只有 benchmark 标记时表达式为真才启用，
+    # 因此 -m "benchmark and not slow" 会启用，-m "not benchmark"、-m unit 等不会启用
+    run_benchmark = _selects_benchmark(config.getoption("-m") or "")
+    skip_benchmark = pytest.mark.skip(reason="基准测试需使用 -m benchmark 运行")
+    
     for item in items:
         if "gui" in item.keywords:
             # 在无GUI环境中跳过GUI测试
             if not hasattr(item, 'gui_available'):
-                item.add_marker(skip_gui)
\ No newline at end of file
+                item.add_marker(skip_gui)
+        
+        if "benchmark" in item.keywords and not run_benchmark:
+            item.add_marker(skip_benchmark)
\ No newline at end of file
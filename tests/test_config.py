@@ -21,6 +21,25 @@ class TestConfig:
         assert config.get('app.version') == '1.0.2'
         assert config.get('logging.level') == 'DEBUG'
     
+    def test_yaml_json_cache(self, config_file, yaml_cache_dir, monkeypatch):
+        """测试YAML解析结果缓存到缓存目录并在源文件变化后失效"""
+        Config(config_file)
+        assert len(list(yaml_cache_dir.glob('*.json'))) == 1
+        # 不在配置文件旁边生成缓存文件
+        assert not config_file.with_name(config_file.name + '.json').exists()
+        
+        # 缓存有效时不再解析YAML
+        def fail_load(*args, **kwargs):
+            raise AssertionError("不应重新解析YAML")
+        
+        with monkeypatch.context() as m:
+            m.setattr(yaml, 'load', fail_load)
+            assert Config(config_file).get('app.name') == 'Test RPA'
+        
+        # 源文件变化后重新解析
+        config_file.write_text("app:\n  name: Changed RPA\n", encoding='utf-8')
+        assert Config(config_file).get('app.name') == 'Changed RPA'
+    
     def test_init_with_json_file(self, temp_dir, sample_config_data):
         """测试使用JSON文件初始化配置"""
         json_file = temp_dir / "test_config.json"
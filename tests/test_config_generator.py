@@ -0,0 +1,177 @@
+"""
+测试配置生成工具
+"""
+
+import copy
+import os
+import shutil
+
+import pytest
+import yaml
+
+from tools.config_generator import ConfigGenerator, _FastDumper, _emit_template_yaml
+
+
+def _reference_yaml(data):
+    """使用yaml.dump生成参照输出"""
+    return yaml.dump(data, Dumper=_FastDumper, default_flow_style=False, allow_unicode=True)
+
+
+@pytest.mark.unit
+class TestEmitTemplateYaml:
+    """模板YAML生成器测试类"""
+    
+    @pytest.mark.parametrize('template', ConfigGenerator().list_templates())
+    def test_builtin_template_matches_yaml_dump(self, template):
+        """测试内置模板的输出与yaml.dump一致并可原样读回"""
+        data = ConfigGenerator().templates[template]
+        content = _emit_template_yaml(data)
+        
+        assert content is not None
+        assert content == _reference_yaml(data)
+        assert yaml.safe_load(content) == data
+    
+    def test_plain_scalars(self):
+        """测试纯量与列表的输出与yaml.dump一致"""
+        data = {'b': {'flag': True, 'none': None, 'ratio': 0.5, 'count': 3},
+                'a': ['png', 'jpg'], 'name': 'templates/wxwork'}
+        content = _emit_template_yaml(data)
+        
+        assert content == _reference_yaml(data)
+        assert yaml.safe_load(content) == data
+    
+    @pytest.mark.parametrize('value', ['yes', 'no', 'null', '123', '1.5', 'a: b', 'a #b', '', ' lead', 'trail ', '企业微信'])
+    def test_quoted_string_bails_out(self, value):
+        """测试需要加引号的字符串交由yaml.dump处理"""
+        assert _emit_template_yaml({'key': value}) is None
+    
+    @pytest.mark.parametrize('data', [
+        {1: 'a'},
+        {1: 'a', 'b': 'c'},
+        {'outer': {2: 'x', 'y': 'z'}},
+        {'yes': 'a'},
+    ])
+    def test_unsupported_keys_bail_out(self, data):
+        """测试非字符串键或需加引号的键交由yaml.dump处理"""
+        assert _emit_template_yaml(data) is None
+    
+    @pytest.mark.parametrize('data', [{}, {'a': {}}, {'a': []}, {'a': [{'b': 1}]}, {'a': (1, 2)}])
+    def test_unsupported_values_bail_out(self, data):
+        """测试空容器和复杂结构交由yaml.dump处理"""
+        assert _emit_template_yaml(data) is None
+
+
+@pytest.mark.unit
+class TestGenerateConfig:
+    """配置生成测试类"""
+    
+    def test_unchanged_content_not_rewritten(self, temp_dir):
+        """测试内容未变化时不重写文件"""
+        output_file = temp_dir / "config.yaml"
+        generator = ConfigGenerator()
+        assert generator.generate_config('minimal', str(output_file))
+        
+        os.utime(output_file, ns=(0, 0))
+        assert generator.generate_config('minimal', str(output_file))
+        assert output_file.stat().st_mtime_ns == 0
+        
+        # 内容变化时重新写入
+        assert generator.generate_config('testing', str(output_file))
+        assert output_file.stat().st_mtime_ns != 0
+        assert yaml.safe_load(output_file.read_text(encoding='utf-8')) == generator.templates['testing']
+    
+    def test_deleted_output_dir_recreated(self, temp_dir):
+        """测试首次保存后输出目录被删除，再次保存时重新创建"""
+        output_dir = temp_dir / "nested" / "config"
+        output_file = output_dir / "config.yaml"
+        generator = ConfigGenerator()
+        assert generator.generate_config('minimal', str(output_file))
+        
+        shutil.rmtree(temp_dir / "nested")
+        assert generator.generate_config('minimal', str(output_file))
+        assert output_file.exists()
+        
+        
+        # 合并配置同样重新创建目录
+        base_file = temp_dir / "base.yaml"
+        override_file = temp_dir / "override.yaml"
+        base_file.write_text("a: 1\n", encoding='utf-8')
+        override_file.write_text("b: 2\n", encoding='utf-8')
+        shutil.rmtree(temp_dir / "nested")
+        assert generator.merge_configs(str(base_file), str(override_file), str(output_file))
+        assert yaml.safe_load(output_file.read_text(encoding='utf-8')) == {'a': 1, 'b': 2}
+
+
+@pytest.mark.unit
+class TestMergeConfigs:
+    """配置合并测试类"""
+    
+    def test_merge_with_int_keys(self, temp_dir):
+        """测试合并含整数键的配置时回退到yaml.dump"""
+        base_file = temp_dir / "base.yaml"
+        override_file = temp_dir / "override.yaml"
+        output_file = temp_dir / "merged.yaml"
+        base_file.write_text("app:\n  name: Base\nretry:\n  1: first\n", encoding='utf-8')
+        override_file.write_text("retry:\n  2: second\n  mode: fast\n", encoding='utf-8')
+        
+        generator = ConfigGenerator()
+        assert generator.merge_configs(str(base_file), str(override_file), str(output_file))
+        
+        merged = yaml.safe_load(output_file.read_text(encoding='utf-8'))
+        assert merged == {'app': {'name': 'Base'}, 'retry': {1: 'first', 2: 'second', 'mode': 'fast'}}
+
+
+def _recursive_merge(base_dict, override_dict):
+    """改写为迭代前的递归深度合并，作为参照"""
+    for key, value in override_dict.items():
+        if key in base_dict and isinstance(base_dict[key], dict) and isinstance(value, dict):
+            _recursive_merge(base_dict[key], value)
+        else:
+            base_dict[key] = value
+
+
+@pytest.mark.unit
+class TestDeepMerge:
+    """深度合并测试类"""
+    
+    @pytest.mark.parametrize('base, override', [
+        # 嵌套且键重叠
+        ({'app': {'name': 'RPA', 'debug': False, 'log': {'level': 'INFO', 'file': 'a.log'}}},
+         {'app': {'debug': True, 'log': {'level': 'DEBUG'}}}),
+        # 键完全不重叠
+        ({'app': {'name': 'RPA'}}, {'vision': {'threshold': 0.8}, 'mouse': {'delay': 0.1}}),
+        # 嵌套层中不重叠，外层重叠
+        ({'app': {'name': 'RPA'}, 'x': 1}, {'app': {'version': '1.0'}, 'y': 2}),
+        # 字典与纯量互相覆盖
+        ({'a': {'b': 1}, 'c': 2}, {'a': 3, 'c': {'d': 4}}),
+        # 空字典
+        ({'a': {'b': 1}}, {}),
+        ({}, {'a': {'b': 1}}),
+        ({'a': {}}, {'a': {'b': [1, 2]}}),
+    ])
+    def test_matches_recursive_merge(self, base, override):
+        """测试迭代合并与原递归实现结果一致"""
+        expected = copy.deepcopy(base)
+        _recursive_merge(expected, copy.deepcopy(override))
+        
+        merged = copy.deepcopy(base)
+        ConfigGenerator()._deep_merge(merged, copy.deepcopy(override))
+        
+        assert merged == expected
+    
+    def test_deep_nesting(self):
+        """测试超过递归深度限制的嵌套也能合并"""
+        depth = 5000
+        base, override = {}, {}
+        base_node, override_node = base, override
+        for _ in range(depth):
+            base_node['child'] = {'base': True}
+            override_node['child'] = {'override': True}
+            base_node, override_node = base_node['child'], override_node['child']
+        
+        ConfigGenerator()._deep_merge(base, override)
+        
+        node = base
+        for _ in range(depth):
+            node = node['child']
+            assert node['base'] and node['override']
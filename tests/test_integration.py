@@ -5,9 +5,12 @@
 
 import pytest
 import tempfile
+import threading
 import shutil
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, call
+
+import numpy as np
 
 from core.config import Config
 from core.vision import VisionEngine, MatchResult
@@ -15,7 +18,10 @@ from core.mouse import MouseController
 from core.window import WindowManager, WindowInfo
 from core.template import TemplateManager
 from core.workflow import BaseWorkflow, WorkflowStep, WorkflowManager
+from core.steps import WaitForTemplateStep, ClickTemplateStep
 from workflows.basic_example import BasicExampleWorkflow, SimpleClickWorkflow
+from workflows.wxwork import (ClickMultiTemplateStep, WaitUserOperationStep, WaitForWxWorkWindowStep,
+                              FindExternalButtonStep, CalculateChatBoxRectStep)
 
 
 @pytest.mark.integration
@@ -198,6 +204,248 @@ class TestWorkflowExecution:
         success = workflow_manager.execute("window_test")
         
         assert success is True
+    
+    def test_step_bind_uses_latest_context(self, test_config):
+        """测试步骤在执行前按最新上下文绑定组件"""
+        
+        class BindStep(WorkflowStep):
+            """记录绑定的鼠标控制器"""
+            
+            def execute(self, context):
+                context['bound'] = self._mouse_controller
+                return True
+        
+        class BindWorkflow(BaseWorkflow):
+            """先添加步骤、后设置组件的工作流"""
+            
+            def _setup(self):
+                self.add_step(BindStep("绑定步骤", {}))
+        
+        workflow = BindWorkflow("bind_test", test_config)
+        assert workflow.steps[0]._mouse_controller is None
+        
+        controller = MagicMock()
+        workflow.set_context('mouse_controller', controller)
+        
+        assert workflow.execute() is True
+        assert workflow.context['bound'] is controller
+    
+    def test_workflow_checks_step_components_once(self, test_config):
+        """测试工作流执行前检查步骤依赖的核心组件"""
+        
+        class MouseStep(WorkflowStep):
+            """依赖鼠标控制器的步骤"""
+            
+            required_components = {'mouse_controller': MouseController}
+            
+            def execute(self, context):
+                context['executed'] = True
+                return True
+        
+        class MouseWorkflow(BaseWorkflow):
+            """单步骤工作流"""
+            
+            def _setup(self):
+                self.add_step(MouseStep("鼠标步骤", {}))
+        
+        workflow = MouseWorkflow("component_test", test_config)
+        assert workflow.execute() is False
+        assert 'executed' not in workflow.context
+        
+        workflow.set_context('mouse_controller', MagicMock(spec=MouseController))
+        assert workflow.execute() is True
+        assert workflow.context['executed'] is True
+    
+    def test_template_step_caches_template_item(self):
+        """测试模板步骤只解析一次模板项，更换模板管理器后重新解析"""
+        step = WaitForTemplateStep("等待模板", {'template_name': 'test.button'})
+        vision_engine = MagicMock(spec=VisionEngine)
+        template_manager = MagicMock(spec=TemplateManager)
+        context = {'vision_engine': vision_engine, 'template_manager': template_manager}
+        
+        step.bind(context)
+        assert step.execute(context) is True
+        assert step.execute(context) is True
+        template_manager.get_template.assert_called_once_with('test.button')
+        
+        other_manager = MagicMock(spec=TemplateManager)
+        context['template_manager'] = other_manager
+        step.bind(context)
+        assert step.execute(context) is True
+        other_manager.get_template.assert_called_once_with('test.button')
+    
+    def test_click_step_reuses_decoded_template(self):
+        """测试点击模板步骤使用模板项上缓存的灰度模板，不在上下文中另存"""
+        step = ClickTemplateStep("点击模板", {'template_name': 'test.button'})
+        vision_engine = MagicMock(spec=VisionEngine)
+        vision_engine.find_image_on_screen.return_value = MatchResult(10, 10, 20, 20, 0.9)
+        template_manager = MagicMock(spec=TemplateManager)
+        mouse_controller = MagicMock(spec=MouseController)
+        mouse_controller.click_match_result.return_value = True
+        context = {
+            'vision_engine': vision_engine,
+            'template_manager': template_manager,
+            'mouse_controller': mouse_controller
+        }
+        
+        step.bind(context)
+        assert step.execute(context) is True
+        assert step.execute(context) is True
+        
+        template_item = template_manager.get_template.return_value
+        vision_engine.prepare_template_item.assert_called_with(template_item)
+        vision_engine.prepare_template.assert_not_called()
+        assert 'template_cache' not in context
+        assert vision_engine.find_image_on_screen.call_count == 2
+        
+        # 激活窗口后只在窗口区域内查找
+        context['window_rect'] = (0, 0, 800, 600)
+        assert step.execute(context) is True
+        vision_engine.find_image_on_screen.assert_called_with(
+            vision_engine.prepare_template_item.return_value, (0, 0, 800, 600), 'TM_CCOEFF_NORMED', first_match=False
+        )
+    
+    @pytest.mark.parametrize('click_delay, interval', [(0, None), (0.3, 0.3)])
+    def test_click_multi_template_step_interval(self, click_delay, interval):
+        """测试多模板点击步骤的点击间隔，click_delay为0时沿用鼠标控制器的点击延迟"""
+        step = ClickMultiTemplateStep("点击多选框", {
+            'template_name': 'test.box', 'click_delay': click_delay, 'min_matches': 1, 'skip_first': False
+        })
+        vision_engine = MagicMock(spec=VisionEngine)
+        vision_engine.find_all_any_on_screen.return_value = [MatchResult(10, 40, 20, 20, 0.9),
+                                                             MatchResult(10, 10, 20, 20, 0.9)]
+        vision_engine.nms.side_effect = lambda matches, iou: matches
+        mouse_controller = MagicMock(spec=MouseController)
+        mouse_controller.click_many.return_value = True
+        context = {
+            'vision_engine': vision_engine,
+            'template_manager': MagicMock(spec=TemplateManager),
+            'mouse_controller': mouse_controller
+        }
+        
+        step.bind(context)
+        assert step.execute(context) is True
+        mouse_controller.click_many.assert_called_once_with([(20, 20), (20, 50)], interval, None)
+    
+    def test_wait_user_operation_rerun_after_stop(self):
+        """测试停止后再次运行沿用仍在等待的输入线程，一次回车即可继续"""
+        release = threading.Event()
+        
+        def blocking_input(prompt):
+            release.wait(5)
+            return ''
+        
+        stopped = threading.Event()
+        stopped.set()
+        with patch('builtins.input', side_effect=blocking_input) as mock_input, \
+             patch('builtins.print'):
+            assert WaitUserOperationStep("等待用户", {}).execute({'_stop_event': stopped}) is False
+            
+            # 新一次运行构建新的步骤，用户回车一次即继续
+            threading.Timer(0.2, release.set).start()
+            assert WaitUserOperationStep("等待用户", {}).execute({'_stop_event': threading.Event()}) is True
+        
+        mock_input.assert_called_once()
+    
+    def test_wxwork_window_hint_across_runs(self, monkeypatch):
+        """测试下一次运行新建的等待窗口步骤收到上次找到的窗口句柄"""
+        monkeypatch.setattr('workflows.wxwork._last_wxwork_hwnd', None)
+        config = {'window_title': '企业微信', 'timeout': 1.0}
+        
+        for expected_hint in (None, 12345):
+            window_manager = MagicMock(spec=WindowManager)
+            window_manager.wait_for_window_event.return_value = MagicMock(spec=WindowInfo, hwnd=12345)
+            context = {'window_manager': window_manager}
+            step = WaitForWxWorkWindowStep("等待企业微信", config)
+            step.bind(context)
+            
+            assert step.execute(context) is True
+            assert window_manager.wait_for_window_event.call_args.kwargs['hwnd_hint'] == expected_hint
+    
+    def test_wxwork_steps_search_window_region(self):
+        """测试窗口内元素只在企业微信窗口区域内查找"""
+        window_rect = (100, 50, 800, 600)
+        vision_engine = MagicMock(spec=VisionEngine)
+        vision_engine.find_all_template_on_screen.return_value = [MatchResult(300, 400, 20, 20, 0.9),
+                                                                  MatchResult(300, 200, 20, 20, 0.9)]
+        vision_engine.find_template_on_screen.side_effect = [MatchResult(120, 300, 10, 10, 0.9),
+                                                             MatchResult(700, 600, 10, 10, 0.9)]
+        mouse_controller = MagicMock(spec=MouseController)
+        mouse_controller.click_match_result.return_value = True
+        context = {
+            'vision_engine': vision_engine,
+            'template_manager': MagicMock(spec=TemplateManager),
+            'mouse_controller': mouse_controller,
+            'window_rect': window_rect
+        }
+        
+        external_step = FindExternalButtonStep("点击外部", {'click_delay': 0})
+        external_step.bind(context)
+        assert external_step.execute(context) is True
+        assert vision_engine.find_all_template_on_screen.call_args.args[1] == window_rect
+        assert context['last_click'] == (310, 210)
+        
+        chatbox_step = CalculateChatBoxRectStep("计算聊天框", {
+            'chatbox_bigadd_template': 'test.bigadd', 'chatbox_rightbottom_template': 'test.rightbottom'
+        })
+        chatbox_step.bind(context)
+        assert chatbox_step.execute(context) is True
+        assert [c.args[1] for c in vision_engine.find_template_on_screen.call_args_list] == [window_rect] * 2
+        assert context['chatbox_rect'] == (130, 310, 700, 600)
+    
+    def test_click_step_use_last_match(self):
+        """测试复用上次匹配结果的点击步骤在构造时选定执行路径"""
+        step = ClickTemplateStep("点击上次结果", {'template_name': 'test.button', 'use_last_match': True})
+        vision_engine = MagicMock(spec=VisionEngine)
+        vision_engine.find_image_on_screen.return_value = MatchResult(50, 50, 20, 20, 0.9)
+        mouse_controller = MagicMock(spec=MouseController)
+        mouse_controller.click_match_result.return_value = True
+        last_match = MatchResult(10, 10, 20, 20, 0.9)
+        context = {
+            'vision_engine': vision_engine,
+            'template_manager': MagicMock(spec=TemplateManager),
+            'mouse_controller': mouse_controller,
+            'last_match': last_match
+        }
+        
+        assert step.execute == step._execute_last_match
+        step.bind(context)
+        assert step.execute(context) is True
+        mouse_controller.click_match_result.assert_called_once_with(last_match)
+        vision_engine.find_image_on_screen.assert_not_called()
+        assert context['last_click'] == (20, 20)
+        
+        # 没有上次匹配结果时查找模板
+        del context['last_match']
+        assert step.execute(context) is True
+        assert context['last_click'] == (60, 60)
+    
+    def test_click_step_sticky_match(self):
+        """测试粘性匹配在目标未移动时跳过整屏查找"""
+        step = ClickTemplateStep("点击模板", {'template_name': 'test.button', 'sticky': True})
+        match = MatchResult(10, 10, 20, 20, 0.9)
+        vision_engine = MagicMock(spec=VisionEngine)
+        vision_engine.find_image_on_screen.return_value = match
+        vision_engine.verify_match.return_value = True
+        mouse_controller = MagicMock(spec=MouseController)
+        mouse_controller.click_match_result.return_value = True
+        context = {
+            'vision_engine': vision_engine,
+            'template_manager': MagicMock(spec=TemplateManager),
+            'mouse_controller': mouse_controller
+        }
+        
+        step.bind(context)
+        assert step.execute(context) is True
+        assert step.execute(context) is True
+        assert vision_engine.find_image_on_screen.call_count == 1
+        vision_engine.verify_match.assert_called_once_with(match, vision_engine.prepare_template_item.return_value)
+        
+        # 校验失败时重新整屏查找
+        vision_engine.verify_match.return_value = False
+        assert step.execute(context) is True
+        assert vision_engine.find_image_on_screen.call_count == 2
+        mouse_controller.click_match_result.assert_called_with(match)
 
 
 @pytest.mark.integration
@@ -349,6 +597,72 @@ class TestRealWorldScenarios:
         assert success is False  # 第一个步骤失败，整个工作流失败
 
 
+@pytest.mark.integration
+class TestMouseControllerIntegration:
+    """鼠标控制器集成测试"""
+    
+    def test_complex_mouse_operations(self, mock_pyautogui):
+        """测试复杂的鼠标操作"""
+        controller = MouseController()
+        
+        # 执行一系列鼠标操作
+        assert controller.move_to(100, 100) is True
+        assert controller.click() is True
+        assert controller.drag(100, 100, 200, 200) is True
+        assert controller.scroll(150, 150, 3) is True
+        assert controller.right_click(200, 200) is True
+        
+        # 一次性收集调用记录并整体比较
+        calls = [(m, mock_pyautogui[m].call_args_list) for m in ('moveTo', 'click', 'drag', 'scroll')]
+        assert calls == [
+            ('moveTo', [call(100, 100, duration=0.5), call(150, 150, duration=0.5)]),
+            ('click', [
+                call(clicks=1, interval=0.0, button='left'),
+                call(200, 200, clicks=1, interval=0.0, button='right')
+            ]),
+            ('drag', [call(100, 100, duration=0.5, button='left')]),
+            ('scroll', [call(3)])
+        ]
+    
+    def test_mouse_with_match_result(self, mock_pyautogui):
+        """测试鼠标与匹配结果配合使用"""
+        controller = MouseController()
+        match_result = MatchResult(100, 200, 50, 30, 0.95)
+        
+        # 点击匹配结果
+        result = controller.click_match_result(match_result)
+        
+        assert result is True
+        # 验证点击了中心位置
+        mock_pyautogui['click'].assert_called_once_with(
+            125, 215, clicks=1, interval=0.0, button='left'
+        )
+
+
+@pytest.mark.integration
+class TestVisionEngineIntegration:
+    """图像识别引擎集成测试"""
+    
+    def test_full_workflow(self, sample_template_image, loaded_template):
+        """测试完整的图像识别工作流"""
+        engine = VisionEngine(confidence_threshold=0.5)
+        
+        # 创建一个包含模板的屏幕截图
+        screenshot = np.zeros((500, 500, 3), dtype=np.uint8)
+        
+        # 将模板放在截图的特定位置
+        screenshot[200:300, 200:300] = loaded_template
+        
+        # 执行匹配
+        with patch.object(engine, 'take_screenshot', return_value=screenshot):
+            result = engine.find_on_screen(sample_template_image)
+            
+            assert result is not None
+            assert 200 <= result.x <= 220  # 允许一些误差
+            assert 200 <= result.y <= 220
+            assert result.confidence >= 0.5
+
+
 @pytest.mark.integration
 @pytest.mark.slow
 class TestPerformanceIntegration:
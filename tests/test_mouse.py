@@ -2,14 +2,29 @@
 测试鼠标操作模块
 """
 
+import threading
 import pytest
+import numpy as np
+import pyautogui
 from unittest.mock import patch, MagicMock, call
 
 from core.mouse import MouseController, MouseButton, create_mouse_controller
 from core.vision import MatchResult
 
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def send_input_user32():
+    """启用SendInput路径，user32 替换为模拟对象：虚拟桌面为 1921x1081，SendInput 总是全部注入"""
+    user32 = MagicMock()
+    user32.GetSystemMetrics.side_effect = lambda index: {76: 0, 77: 0, 78: 1921, 79: 1081}[index]
+    user32.SendInput.side_effect = lambda count, inputs, size: count
+    with patch('core.mouse.HAS_SENDINPUT', True), \
+         patch('core.mouse._user32', user32, create=True):
+        yield user32
+
 
-@pytest.mark.unit
 class TestMouseButton:
     """测试鼠标按键枚举"""
     
@@ -18,9 +33,14 @@ class TestMouseButton:
         assert MouseButton.LEFT.value == 'left'
         assert MouseButton.RIGHT.value == 'right'
         assert MouseButton.MIDDLE.value == 'middle'
+    
+    def test_mouse_button_is_str(self):
+        """测试鼠标按键枚举可直接作为字符串比较"""
+        assert MouseButton.LEFT == 'left'
+        assert MouseButton.RIGHT == 'right'
+        assert isinstance(MouseButton.MIDDLE, str)
 
 
-@pytest.mark.unit
 class TestMouseController:
     """测试鼠标控制器"""
     
@@ -246,6 +266,138 @@ class TestMouseController:
             125, 215, clicks=1, interval=0.0, button='left'
         )
     
+    def test_click_many_fallback(self, mock_pyautogui):
+        """测试非Windows环境逐个点击"""
+        controller = MouseController(click_delay=0.001)
+        
+        with patch('core.mouse.HAS_SENDINPUT', False):
+            result = controller.click_many([(10, 20), (30, 40)])
+        
+        assert result is True
+        assert mock_pyautogui['click'].call_args_list == [
+            call(10, 20, _pause=False), call(30, 40, _pause=False)
+        ]
+    
+    def test_click_many_send_input(self, mock_pyautogui, send_input_user32):
+        """测试Windows下无间隔时所有点击打包为一次SendInput"""
+        controller = MouseController()
+        
+        assert controller.click_many([(0, 0), (1920, 1080)], interval=0) is True
+        
+        send_input_user32.SendInput.assert_called_once()
+        count, inputs, _ = send_input_user32.SendInput.call_args[0]
+        assert count == 6
+        assert (inputs[3].mi.dx, inputs[3].mi.dy) == (65535, 65535)
+        assert [event.mi.dwFlags for event in inputs[:3]] == [0xC001, 0x0002, 0x0004]
+        mock_pyautogui['click'].assert_not_called()
+    
+    def test_click_many_default_interval(self, mock_pyautogui, send_input_user32):
+        """测试未指定间隔时按click_delay逐次注入"""
+        controller = MouseController(click_delay=0.001)
+        
+        assert controller.click_many([(10, 20), (30, 40)]) is True
+        
+        assert send_input_user32.SendInput.call_count == 2
+        assert all(args[0] == 3 for args, _ in send_input_user32.SendInput.call_args_list)
+    
+    def test_click_burst_send_input(self, mock_pyautogui, send_input_user32):
+        """测试有间隔的连点每次点击一次SendInput，停止事件中止连点"""
+        controller = MouseController()
+        stop_event = threading.Event()
+        stop_event.set()
+        
+        assert controller.click_burst(100, 200, clicks=3, interval=0.001) is True
+        assert send_input_user32.SendInput.call_count == 3
+        assert all(args[0] == 3 for args, _ in send_input_user32.SendInput.call_args_list)
+        
+        assert controller.click_burst(100, 200, clicks=3, interval=0.001, stop_event=stop_event) is False
+        assert send_input_user32.SendInput.call_count == 4
+        
+        mock_pyautogui['click'].assert_not_called()
+    
+    def test_click_burst_from_click(self, mock_pyautogui, send_input_user32):
+        """测试大量连点自动改用SendInput"""
+        controller = MouseController()
+        
+        assert controller.click(100, 200, clicks=40) is True
+        assert controller.click(100, 200, clicks=2) is True
+        
+        send_input_user32.SendInput.assert_called_once()
+        assert send_input_user32.SendInput.call_args[0][0] == 120
+        mock_pyautogui['click'].assert_called_once_with(100, 200, clicks=2, interval=0.0, button='left')
+    
+    def test_click_burst_fail_safe(self, mock_pyautogui, send_input_user32):
+        """测试SendInput连点在触发失败保护时停止"""
+        controller = MouseController()
+        
+        with patch('pyautogui.failSafeCheck', side_effect=pyautogui.FailSafeException) as check:
+            assert controller.click(100, 200, clicks=40) is False
+            send_input_user32.SendInput.assert_not_called()
+            
+            check.side_effect = [None, pyautogui.FailSafeException()]
+            assert controller.click_burst(100, 200, clicks=3, interval=0.001) is False
+            assert send_input_user32.SendInput.call_count == 1
+            
+            check.reset_mock(side_effect=True)
+            with patch('pyautogui.FAILSAFE', False):
+                assert controller.click(100, 200, clicks=40) is True
+            check.assert_not_called()
+    
+    def test_press_sequence_send_input(self, mock_pyautogui, send_input_user32):
+        """测试按键序列每个事件一次SendInput，只有第一个事件带移动"""
+        controller = MouseController()
+        flags = []
+        
+        def send_input(count, inputs, size):
+            flags.append([event.mi.dwFlags for event in inputs])
+            return count
+        
+        send_input_user32.SendInput.side_effect = send_input
+        events = [(MouseButton.LEFT, True), (MouseButton.RIGHT, True),
+                  (MouseButton.RIGHT, False), (MouseButton.LEFT, False)]
+        
+        assert controller.press_sequence(100, 200, events, interval=0.001) is True
+        
+        assert flags == [[0xC001, 0x0002], [0x0008], [0x0010], [0x0004]]
+        mock_pyautogui['mouseDown'].assert_not_called()
+        mock_pyautogui['moveTo'].assert_not_called()
+    
+    def test_press_sequence_stopped(self, mock_pyautogui):
+        """测试按键序列被停止时抬起仍按着的按键"""
+        controller = MouseController()
+        stop_event = threading.Event()
+        stop_event.set()
+        
+        with patch('core.mouse.HAS_SENDINPUT', False):
+            result = controller.press_sequence(
+                100, 200, [(MouseButton.LEFT, True), (MouseButton.LEFT, False)], stop_event=stop_event
+            )
+        
+        assert result is False
+        mock_pyautogui['moveTo'].assert_called_once_with(100, 200, _pause=False)
+        mock_pyautogui['mouseDown'].assert_called_once_with(button='left', _pause=False)
+        mock_pyautogui['mouseUp'].assert_called_once_with(button='left', _pause=False)
+    
+    def test_press_sequence_fail_safe(self, mock_pyautogui):
+        """测试按键序列触发失败保护时抬起仍按着的按键"""
+        controller = MouseController()
+        events = [(MouseButton.LEFT, True), (MouseButton.RIGHT, True), (MouseButton.LEFT, False)]
+        
+        with patch('core.mouse.HAS_SENDINPUT', False), \
+             patch('pyautogui.failSafeCheck', side_effect=[None, pyautogui.FailSafeException()]):
+            result = controller.press_sequence(100, 200, events, interval=0.001)
+        
+        assert result is False
+        mock_pyautogui['mouseDown'].assert_called_once_with(button='left', _pause=False)
+        mock_pyautogui['mouseUp'].assert_called_once_with(button='left', _pause=False)
+    
+    def test_click_many_empty(self, mock_pyautogui):
+        """测试空列表直接返回成功"""
+        controller = MouseController()
+        
+        assert controller.click_many([]) is True
+        mock_pyautogui['click'].assert_not_called()
+    
     def test_hover(self, mock_pyautogui):
         """测试悬停"""
         controller = MouseController()
@@ -357,6 +509,19 @@ class TestMouseController:
         assert controller.is_position_safe(100, 0) is False
         assert controller.is_position_safe(1919, 100) is False
         assert controller.is_position_safe(100, 1079) is False
+        
+        # 批量检查
+        xs = np.array([0, 100, 1919, 100])
+        ys = np.array([100, 0, 100, 1079])
+        assert not controller.is_position_safe(xs, ys).any()
+    
+    def test_is_position_safe_batch(self, mock_pyautogui):
+        """测试批量位置安全检查"""
+        controller = MouseController()
+        
+        result = controller.is_position_safe(np.array([100, 0, 500]), np.array([200, 100, 1079]))
+        
+        assert result.tolist() == [True, False, False]
     
     def test_is_position_safe_failsafe_disabled(self, mock_pyautogui):
         """测试位置安全检查（失败保护禁用）"""
@@ -367,14 +532,14 @@ class TestMouseController:
             
             assert result is True
     
-    def test_get_screen_size(self, mock_pyautogui):
+    def test_get_screen_size(self, mock_pyautogui, tracking_size):
         """测试获取屏幕尺寸"""
         controller = MouseController()
         
         size = controller.get_screen_size()
         
         assert size == (1920, 1080)
-        mock_pyautogui['size'].assert_called_once()
+        tracking_size.assert_called_once()
     
     def test_set_click_delay(self, mock_pyautogui):
         """测试设置点击延迟"""
@@ -394,7 +559,6 @@ class TestMouseController:
         # 测试调用了两次设置
 
 
-@pytest.mark.unit
 class TestCreateMouseController:
     """测试创建鼠标控制器函数"""
     
@@ -419,39 +583,3 @@ class TestCreateMouseController:
         assert isinstance(controller, MouseController)
         assert controller.click_delay == 0.2
         assert controller.move_duration == 1.0
-
-
-@pytest.mark.integration
-class TestMouseControllerIntegration:
-    """鼠标控制器集成测试"""
-    
-    def test_complex_mouse_operations(self, mock_pyautogui):
-        """测试复杂的鼠标操作"""
-        controller = MouseController()
-        
-        # 执行一系列鼠标操作
-        assert controller.move_to(100, 100) is True
-        assert controller.click() is True
-        assert controller.drag(100, 100, 200, 200) is True
-        assert controller.scroll(150, 150, 3) is True
-        assert controller.right_click(200, 200) is True
-        
-        # 验证调用次数
-        assert mock_pyautogui['moveTo'].call_count >= 2
-        assert mock_pyautogui['click'].call_count == 2
-        assert mock_pyautogui['drag'].call_count == 1
-        assert mock_pyautogui['scroll'].call_count == 1
-    
-    def test_mouse_with_match_result(self, mock_pyautogui):
-        """测试鼠标与匹配结果配合使用"""
-        controller = MouseController()
-        match_result = MatchResult(100, 200, 50, 30, 0.95)
-        
-        # 点击匹配结果
-        result = controller.click_match_result(match_result)
-        
-        assert result is True
-        # 验证点击了中心位置
-        mock_pyautogui['click'].assert_called_once_with(
-            125, 215, clicks=1, interval=0.0, button='left'
-        )
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+测试模板管理工具
+"""
+
+import json
+import os
+
+import cv2
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from tools import template_manager
+from tools.template_manager import TemplateManagerTool
+
+
+def _write_template(path, value=128, size=40):
+    """写入一张纯色模板图像"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cv2.imwrite(str(path), np.full((size, size, 3), value, dtype=np.uint8))
+
+
+def _touch_later(path):
+    """把文件的修改时间推后1秒，避免文件系统时间精度导致mtime不变"""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def tool(temp_dir):
+    """带两个工作流的模板管理工具"""
+    _write_template(temp_dir / "wf_a" / "1920x1080" / "button.png")
+    _write_template(temp_dir / "wf_a" / "1920x1080" / "icon.png", value=64)
+    _write_template(temp_dir / "wf_b" / "1366x768" / "button.png", size=600)
+    return TemplateManagerTool(str(temp_dir))
+
+
+@pytest.mark.unit
+class TestGenerateReport:
+    """模板报告测试类"""
+    
+    def test_cache_hit(self, tool):
+        """测试目录树未变化时不重新扫描工作流"""
+        with patch('tools.template_manager._report_workflow', wraps=template_manager._report_workflow) as scan:
+            first = tool.generate_report()
+            second = tool.generate_report()
+        
+        assert scan.call_count == 2  # 两个工作流各扫描一次
+        assert first == second
+        assert first['summary'] == {'total_workflows': 2, 'total_templates': 3,
+                                    'valid_templates': 2, 'invalid_templates': 1}
+    
+    def test_miss_after_template_changes(self, tool, temp_dir):
+        """测试原地覆盖模板文件或新增模板后重新生成报告"""
+        assert tool.generate_report()['summary']['invalid_templates'] == 1
+        
+        # 原地覆盖：只有文件自身的mtime变化
+        template_path = temp_dir / "wf_a" / "1920x1080" / "button.png"
+        _write_template(template_path, size=5)
+        _touch_later(template_path)
+        assert tool.generate_report()['summary']['invalid_templates'] == 2
+        
+        # 新增模板：分辨率目录的mtime变化
+        _write_template(temp_dir / "wf_b" / "1366x768" / "new.png")
+        _touch_later(temp_dir / "wf_b" / "1366x768")
+        assert tool.generate_report()['summary']['total_templates'] == 4
+    
+    def test_cache_size_bounded(self, tool):
+        """测试报告缓存按LRU淘汰，数量不超过上限"""
+        for i in range(template_manager._REPORT_CACHE_SIZE + 3):
+            tool.generate_report(f"missing_{i}")
+        tool.generate_report("wf_a")
+        
+        assert len(tool._report_cache) == template_manager._REPORT_CACHE_SIZE
+        assert next(reversed(tool._report_cache))[1] == "wf_a"
+        assert not any(key[1] == "missing_0" for key in tool._report_cache)
+    
+    def test_returns_copies(self, tool):
+        """测试调用方修改返回的报告不影响缓存"""
+        report = tool.generate_report("wf_a")
+        report['summary']['total_templates'] = 99
+        report['workflows']['wf_a']['resolutions'].clear()
+        
+        cached = tool.generate_report("wf_a")
+        assert cached is not report
+        assert cached['summary']['total_templates'] == 2
+        assert '1920x1080' in cached['workflows']['wf_a']['resolutions']
+    
+    def test_invalidate_cache(self, tool):
+        """测试清除缓存后重新扫描"""
+        tool.generate_report()
+        tool.invalidate_cache()
+        
+        with patch('tools.template_manager._report_workflow', wraps=template_manager._report_workflow) as scan:
+            tool.generate_report()
+        assert scan.call_count == 2
+    
+    def test_parallel_matches_serial(self, tool):
+        """测试多进程生成的报告与串行一致"""
+        serial = tool.generate_report()
+        tool.invalidate_cache()
+        
+        assert tool.generate_report(parallel=True) == serial
+    
+    def test_streaming_matches_report(self, tool, temp_dir):
+        """测试逐个工作流写出的报告文件与 generate_report 一致"""
+        output_path = temp_dir / "out" / "report.json"
+        
+        summary = tool.generate_report_streaming(str(output_path))
+        
+        report = tool.generate_report()
+        assert summary == report['summary']
+        assert json.loads(output_path.read_text(encoding='utf-8')) == report
+
+
+@pytest.mark.unit
+class TestOptimizeDirectory:
+    """批量优化模板测试类"""
+    
+    def test_optimize_directory(self, tool, temp_dir):
+        """测试批量优化统计成功和失败数量，大图被缩小"""
+        resolution_dir = temp_dir / "wf_b" / "1366x768"
+        (resolution_dir / "broken.png").write_bytes(b"not an image")
+        
+        stats = tool.optimize_directory("wf_b", "1366x768", max_workers=2)
+        
+        assert stats == {'total': 2, 'succeeded': 1, 'failed': 1}
+        assert cv2.imread(str(resolution_dir / "button.png")).shape[:2] == (300, 300)
+    
+    def test_optimize_missing_directory(self, tool):
+        """测试目录不存在时返回空统计"""
+        assert tool.optimize_directory("wf_b", "800x600") == {'total': 0, 'succeeded': 0, 'failed': 0}
@@ -2,16 +2,21 @@
 测试图像识别模块
 """
 
+import os
+import threading
+import time
 import pytest
 import numpy as np
 import cv2
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, call
 from pathlib import Path
 
 from core.vision import VisionEngine, MatchResult, create_vision_engine
+from core.template import TemplateItem, TemplateConfig
+
+pytestmark = pytest.mark.unit
 
 
-@pytest.mark.unit
 class TestMatchResult:
     """测试匹配结果类"""
     
@@ -49,7 +54,6 @@ class TestMatchResult:
         assert "confidence=0.950" in repr_str
 
 
-@pytest.mark.unit
 class TestVisionEngine:
     """测试图像识别引擎"""
     
@@ -60,6 +64,8 @@ class TestVisionEngine:
         assert engine.confidence_threshold == 0.9
         assert engine.default_method == cv2.TM_CCOEFF_NORMED
         assert len(engine.match_methods) > 0
+        # 匹配方法表为类级共享常量，不随实例重复构建
+        assert VisionEngine.match_methods is engine.match_methods
     
     def test_vision_engine_init_default(self):
         """测试图像识别引擎默认初始化"""
@@ -102,6 +108,84 @@ class TestVisionEngine:
             mock_screenshot.assert_called_once_with(region=region)
             assert isinstance(result, np.ndarray)
     
+    @patch('pyautogui.screenshot')
+    def test_take_screenshot_grayscale(self, mock_screenshot):
+        """测试直接截取灰度图像"""
+        engine = VisionEngine(capture_backend='pyautogui')
+        rgb = np.zeros((100, 100, 3), dtype=np.uint8)
+        rgb[:, :, 0] = 255
+        mock_screenshot.return_value = rgb
+        
+        result = engine.take_screenshot(grayscale=True)
+        
+        assert result.shape == (100, 100)
+        assert result[0, 0] == cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)[0, 0]
+    
+    @patch('pyautogui.screenshot')
+    def test_take_screenshot_dxcam(self, mock_screenshot):
+        """测试DXGI截图：无新帧时复用上一帧，失败后改用pyautogui"""
+        frame = np.zeros((150, 200, 3), dtype=np.uint8)
+        camera = MagicMock()
+        camera.grab.side_effect = [frame, None, RuntimeError("output lost")]
+        mock_dxcam = MagicMock()
+        mock_dxcam.create.return_value = camera
+        mock_screenshot.return_value = np.zeros((150, 200, 3), dtype=np.uint8)
+        
+        with patch('core.vision.HAS_DXCAM', True), \
+             patch('core.vision.dxcam', mock_dxcam, create=True):
+            engine = VisionEngine()
+            region = (100, 100, 200, 150)
+            
+            assert engine.take_screenshot(region) is frame
+            camera.grab.assert_called_with(region=(100, 100, 300, 250))
+            assert engine.take_screenshot(region) is frame
+            mock_screenshot.assert_not_called()
+            
+            engine.take_screenshot(region)
+        
+        mock_dxcam.create.assert_called_once()
+        mock_screenshot.assert_called_once_with(region=region)
+        assert engine.capture_backend == 'pyautogui'
+    
+    @patch('pyautogui.screenshot')
+    def test_shared_screenshot(self, mock_screenshot):
+        """测试作用域内复用同一帧截图，退出后重新截图"""
+        engine = VisionEngine(capture_backend='pyautogui')
+        mock_screenshot.return_value = np.zeros((100, 100, 3), dtype=np.uint8)
+        
+        with engine.shared_screenshot():
+            first = engine.take_screenshot(grayscale=True)
+            with engine.shared_screenshot():
+                assert engine.take_screenshot(grayscale=True) is first
+            assert engine.take_screenshot(grayscale=True) is first
+            assert not first.flags.writeable
+            engine.take_screenshot((0, 0, 50, 50), grayscale=True)
+        
+        assert mock_screenshot.call_count == 2
+        assert engine.take_screenshot(grayscale=True) is not first
+        assert mock_screenshot.call_count == 3
+    
+    @patch('pyautogui.screenshot')
+    def test_prefetch_screenshot(self, mock_screenshot):
+        """测试预取帧只供下一次灰度截图裁剪使用，过期后重新截图"""
+        engine = VisionEngine(capture_backend='pyautogui')
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        frame[20, 10] = 255
+        mock_screenshot.return_value = frame
+        
+        engine.prefetch_screenshot(ttl=10.0)
+        patch_image = engine.take_screenshot((10, 20, 30, 40), grayscale=True)
+        assert patch_image.shape == (40, 30)
+        assert patch_image[0, 0] == 255
+        assert mock_screenshot.call_count == 1
+        
+        engine.take_screenshot((10, 20, 30, 40), grayscale=True)
+        assert mock_screenshot.call_count == 2
+        
+        engine.prefetch_screenshot(ttl=-1.0)
+        engine.take_screenshot(grayscale=True)
+        assert mock_screenshot.call_count == 4
+    
     def test_load_template_success(self, sample_template_image):
         """测试成功加载模板图像"""
         engine = VisionEngine()
@@ -110,6 +194,23 @@ class TestVisionEngine:
         assert isinstance(template, np.ndarray)
         assert template.shape == (100, 100, 3)
     
+    def test_load_template_cached(self, sample_template_image):
+        """测试模板按路径和修改时间缓存，文件更新后重新读取"""
+        engine = VisionEngine()
+        
+        with patch('cv2.imread', wraps=cv2.imread) as mock_imread:
+            first = engine.load_template(sample_template_image)
+            assert engine.load_template(sample_template_image) is first
+            assert mock_imread.call_count == 1
+            assert not first.flags.writeable
+            
+            cv2.imwrite(str(sample_template_image), np.zeros((50, 50, 3), dtype=np.uint8))
+            stat = sample_template_image.stat()
+            os.utime(sample_template_image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            
+            assert engine.load_template(sample_template_image).shape == (50, 50, 3)
+            assert mock_imread.call_count == 2
+    
     def test_load_template_nonexistent(self):
         """测试加载不存在的模板图像"""
         engine = VisionEngine()
@@ -126,10 +227,10 @@ class TestVisionEngine:
         with pytest.raises(ValueError):
             engine.load_template(invalid_file)
     
-    def test_match_template_success(self, sample_screenshot, sample_template_image):
+    def test_match_template_success(self, sample_screenshot, loaded_template):
         """测试成功的模板匹配"""
         engine = VisionEngine(confidence_threshold=0.5)
-        template = engine.load_template(sample_template_image)
+        template = loaded_template
         
         # 在截图中添加模板
         screenshot = sample_screenshot.copy()
@@ -141,19 +242,19 @@ class TestVisionEngine:
         assert isinstance(result, MatchResult)
         assert result.confidence >= 0.5
     
-    def test_match_template_low_confidence(self, sample_screenshot, sample_template_image):
+    def test_match_template_low_confidence(self, sample_screenshot, loaded_template):
         """测试低置信度的模板匹配"""
         engine = VisionEngine(confidence_threshold=0.99)  # 设置很高的阈值
-        template = engine.load_template(sample_template_image)
+        template = loaded_template
         
         result = engine.match_template(sample_screenshot, template)
         
         assert result is None
     
-    def test_match_template_different_methods(self, sample_screenshot, sample_template_image):
+    def test_match_template_different_methods(self, sample_screenshot, loaded_template):
         """测试不同的匹配方法"""
         engine = VisionEngine(confidence_threshold=0.5)
-        template = engine.load_template(sample_template_image)
+        template = loaded_template
         
         # 在截图中添加模板
         screenshot = sample_screenshot.copy()
@@ -165,10 +266,43 @@ class TestVisionEngine:
             result = engine.match_template(screenshot, template, method=method)
             assert result is not None or method == 'TM_SQDIFF_NORMED'  # SQDIFF可能结果不同
     
-    def test_match_template_grayscale(self, sample_screenshot, sample_template_image):
+    def test_match_template_sqdiff_confidence(self, sample_screenshot, loaded_template):
+        """测试TM_SQDIFF按模板能量归一化后可用置信度阈值"""
+        engine = VisionEngine(confidence_threshold=0.8)
+        template = loaded_template
+        
+        screenshot = sample_screenshot.copy()
+        screenshot[490:590, 910:1010] = template
+        
+        result = engine.match_template(screenshot, template, method='TM_SQDIFF')
+        
+        assert result is not None
+        assert (result.x, result.y) == (910, 490)
+        assert result.confidence == pytest.approx(1.0, abs=1e-3)
+        
+        matches = engine.find_all_matches(screenshot, template, method='TM_SQDIFF', threshold=0.99)
+        assert matches and (matches[0].x, matches[0].y) == (910, 490)
+    
+    def test_match_template_sqdiff_dark_template(self):
+        """测试暗色模板用TM_SQDIFF时不会在暗色纯色背景上误匹配"""
+        engine = VisionEngine(confidence_threshold=0.8)
+        template = np.full((40, 40, 3), 30, dtype=np.uint8)
+        template[10:30, 10:30] = 5
+        screenshot = np.full((300, 400, 3), 25, dtype=np.uint8)
+        
+        assert engine.match_template(screenshot, template, method='TM_SQDIFF') is None
+        assert engine.find_all_matches(screenshot, template, method='TM_SQDIFF', threshold=0.8) == []
+        
+        screenshot[100:140, 200:240] = template
+        result = engine.match_template(screenshot, template, method='TM_SQDIFF')
+        assert result is not None
+        assert (result.x, result.y) == (200, 100)
+        assert result.confidence == pytest.approx(1.0, abs=1e-3)
+    
+    def test_match_template_grayscale(self, sample_screenshot, loaded_template):
         """测试灰度图模板匹配"""
         engine = VisionEngine(confidence_threshold=0.5)
-        template = engine.load_template(sample_template_image)
+        template = loaded_template
         
         # 在截图中添加模板
         screenshot = sample_screenshot.copy()
@@ -179,10 +313,123 @@ class TestVisionEngine:
         assert result is not None
         assert isinstance(result, MatchResult)
     
-    def test_find_all_matches(self, sample_screenshot, sample_template_image):
+    def test_match_template_prepared_gray(self, sample_screenshot, loaded_template, sample_template_image):
+        """测试预处理的灰度模板与彩色模板匹配结果一致"""
+        engine = VisionEngine(confidence_threshold=0.5)
+        template = loaded_template
+        
+        screenshot = sample_screenshot.copy()
+        screenshot[490:590, 910:1010] = template
+        
+        gray_template = engine.prepare_template(sample_template_image)
+        assert gray_template.ndim == 2
+        
+        expected = engine.match_template(screenshot, template)
+        result = engine.match_template(screenshot, gray_template)
+        
+        assert result is not None
+        assert (result.x, result.y, result.confidence) == (expected.x, expected.y, expected.confidence)
+    
+    def test_match_template_gpu_fallback(self, sample_screenshot, loaded_template):
+        """测试GPU匹配出错时回退到CPU并停用GPU"""
+        screenshot = sample_screenshot.copy()
+        screenshot[490:590, 910:1010] = loaded_template
+        expected = VisionEngine(confidence_threshold=0.5).match_template(screenshot, loaded_template)
+        
+        with patch('core.vision.HAS_CUDA', True):
+            engine = VisionEngine(confidence_threshold=0.5, use_gpu=True)
+        assert engine.use_gpu is True
+        
+        with patch('cv2.cuda.createTemplateMatching', side_effect=cv2.error("no CUDA"), create=True) as mock_create:
+            result = engine.match_template(screenshot, loaded_template)
+        
+        mock_create.assert_called_once()
+        assert engine.use_gpu is False
+        assert (result.x, result.y, result.confidence) == (expected.x, expected.y, expected.confidence)
+    
+    def test_use_gpu_requires_cuda(self):
+        """测试没有CUDA设备时不启用GPU匹配"""
+        with patch('core.vision.HAS_CUDA', False):
+            engine = VisionEngine(use_gpu=True)
+        
+        assert engine.use_gpu is False
+    
+    def test_match_template_opencl(self, sample_screenshot, loaded_template):
+        """测试通过UMat匹配与CPU结果一致，同一帧只上传一次，出错时回退到CPU"""
+        screenshot = sample_screenshot.copy()
+        screenshot[490:590, 910:1010] = loaded_template
+        expected = VisionEngine(confidence_threshold=0.5).match_template(screenshot, loaded_template)
+        
+        with patch('core.vision.HAS_OPENCL', True):
+            engine = VisionEngine(confidence_threshold=0.5, use_opencl=True)
+        assert engine.use_opencl is True
+        
+        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+        template = cv2.cvtColor(loaded_template, cv2.COLOR_BGR2GRAY)
+        result = engine.match_template(gray, template)
+        uploaded = engine._ocl_screen[1]
+        engine.match_template(gray, template)
+        
+        assert engine._ocl_screen[1] is uploaded
+        assert (result.x, result.y) == (expected.x, expected.y)
+        assert result.confidence == pytest.approx(expected.confidence, abs=1e-4)
+        
+        with patch('cv2.UMat', side_effect=cv2.error("no OpenCL")):
+            result = engine.match_template(screenshot, loaded_template)
+        
+        assert engine.use_opencl is False
+        assert (result.x, result.y, result.confidence) == (expected.x, expected.y, expected.confidence)
+    
+    def test_match_template_first_match(self, sample_screenshot, loaded_template):
+        """测试按行带匹配时返回最上方达到阈值的匹配"""
+        engine = VisionEngine(confidence_threshold=0.9)
+        screenshot = sample_screenshot.copy()
+        screenshot[490:590, 910:1010] = 0
+        screenshot[100:200, 300:400] = loaded_template
+        screenshot[800:900, 1500:1600] = loaded_template
+        
+        result = engine.match_template(screenshot, loaded_template, first_match=True)
+        
+        assert result is not None
+        assert (result.x, result.y) == (300, 100)
+        
+        # 没有达到阈值的行带时与整图匹配的最佳值相同
+        strict_engine = VisionEngine(confidence_threshold=1.1)
+        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+        template = cv2.cvtColor(loaded_template, cv2.COLOR_BGR2GRAY)
+        _, max_val, _, _ = strict_engine._min_max_loc_first(gray, template, cv2.TM_CCOEFF_NORMED)
+        _, expected_max, _, _ = cv2.minMaxLoc(cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED))
+        assert max_val == pytest.approx(expected_max)
+    
+    def test_match_template_pyramid(self, temp_dir):
+        """测试金字塔模板匹配与全分辨率匹配结果一致"""
+        engine = VisionEngine(confidence_threshold=0.8)
+        rng = np.random.default_rng(3)
+        screenshot = cv2.GaussianBlur(rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8), (0, 0), 3)
+        
+        for x, y, w, h in [(777, 333, 64, 48), (10, 1000, 40, 40), (911, 491, 21, 17)]:
+            template_path = temp_dir / "pyramid_template.png"
+            cv2.imwrite(str(template_path), screenshot[y:y + h, x:x + w])
+            template_pyramid = engine.prepare_template_pyramid(template_path)
+            
+            result = engine.match_template_pyramid(screenshot, template_pyramid)
+            
+            assert len(template_pyramid) >= 2
+            assert result is not None
+            assert (result.x, result.y, result.width, result.height) == (x, y, w, h)
+    
+    def test_prepare_template_pyramid_small_template(self, temp_dir):
+        """测试模板过小时金字塔自动减少层数"""
+        engine = VisionEngine()
+        template_path = temp_dir / "small_template.png"
+        cv2.imwrite(str(template_path), np.full((12, 12, 3), 128, dtype=np.uint8))
+        
+        assert len(engine.prepare_template_pyramid(template_path, levels=3)) == 1
+    
+    def test_find_all_matches(self, sample_screenshot, loaded_template):
         """测试查找所有匹配项"""
         engine = VisionEngine(confidence_threshold=0.5)
-        template = engine.load_template(sample_template_image)
+        template = loaded_template
         
         # 在截图中添加多个模板
         screenshot = sample_screenshot.copy()
@@ -194,6 +441,63 @@ class TestVisionEngine:
         assert isinstance(matches, list)
         assert len(matches) >= 0  # 可能找到多个匹配
     
+    def test_find_all_matches_min_distance(self, sample_screenshot, loaded_template):
+        """测试非极大值抑制合并相邻匹配"""
+        engine = VisionEngine(confidence_threshold=0.9)
+        template = loaded_template
+        
+        screenshot = sample_screenshot.copy()
+        screenshot[100:200, 100:200] = template
+        screenshot[300:400, 300:400] = template
+        
+        all_matches = engine.find_all_matches(screenshot, template)
+        matches = engine.find_all_matches(screenshot, template, min_distance=50)
+        
+        assert len(matches) == 2
+        assert len(all_matches) >= len(matches)
+        assert sorted(m.top_left for m in matches) == [(100, 100), (300, 300)]
+        assert all(a.confidence >= b.confidence for a, b in zip(all_matches, all_matches[1:]))
+    
+    def test_find_all_matches_pyramid(self, sample_screenshot, loaded_template):
+        """测试金字塔查找与原始分辨率全图查找结果一致"""
+        engine = VisionEngine(confidence_threshold=0.9)
+        template = loaded_template
+        
+        screenshot = sample_screenshot.copy()
+        screenshot[100:200, 100:200] = template
+        screenshot[300:400, 301:401] = template
+        
+        expected = engine.find_all_matches(screenshot, template)
+        matches = engine.find_all_matches_pyramid(screenshot, template, levels=2)
+        
+        assert {m.top_left for m in matches} == {m.top_left for m in expected}
+        assert {(100, 100), (301, 300)} <= {m.top_left for m in matches}
+        assert all(a.confidence >= b.confidence for a, b in zip(matches, matches[1:]))
+        
+        # 模板太小无法缩小时退化为全图查找
+        small = np.ascontiguousarray(template[:10, :10])
+        assert len(engine.find_all_matches_pyramid(screenshot, small, levels=2)) == \
+            len(engine.find_all_matches(screenshot, small))
+    
+    def test_nms(self):
+        """测试按交并比去除重叠匹配，保留置信度最高的结果"""
+        matches = [
+            MatchResult(100, 100, 20, 20, 0.85),
+            MatchResult(101, 100, 20, 20, 0.95),
+            MatchResult(102, 101, 20, 20, 0.90),
+            MatchResult(130, 100, 20, 20, 0.80),
+            MatchResult(300, 300, 20, 20, 0.99),
+        ]
+        
+        kept = VisionEngine.nms(matches, iou_threshold=0.3)
+        
+        assert [(m.x, m.y) for m in kept] == [(300, 300), (101, 100), (130, 100)]
+        # 结果很多时逐行计算交并比，保留结果相同
+        with patch('core.vision._NMS_MATRIX_MAX', 0):
+            assert VisionEngine.nms(matches, iou_threshold=0.3) == kept
+        assert VisionEngine.nms(matches[:1]) == matches[:1]
+        assert VisionEngine.nms([]) == []
+    
     @patch('pyautogui.screenshot')
     def test_find_on_screen(self, mock_screenshot, sample_template_image):
         """测试在屏幕上查找模板"""
@@ -262,6 +566,106 @@ class TestVisionEngine:
             assert results[1].confidence == 0.8
             assert results[2].confidence == 0.7
     
+    def test_find_all_image_on_screen(self, sample_screenshot, loaded_template, sample_template_image):
+        """测试使用预处理的灰度模板在屏幕上查找所有匹配"""
+        engine = VisionEngine(confidence_threshold=0.9)
+        template = engine.prepare_template(sample_template_image)
+        
+        screenshot = sample_screenshot.copy()
+        screenshot[490:590, 910:1010] = loaded_template
+        
+        with patch.object(engine, 'take_screenshot', return_value=screenshot), \
+             patch.object(engine, 'load_template') as mock_load:
+            
+            results = engine.find_all_image_on_screen(template, region=(100, 100, 1920, 1080))
+            
+            mock_load.assert_not_called()
+            assert results
+            assert (results[0].x, results[0].y) == (1010, 590)
+        
+        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+        with patch.object(engine, 'take_screenshot', return_value=gray):
+            results = engine.find_all_image_on_screen(template, region=(100, 100, 1920, 1080), pyramid_levels=2)
+            
+            assert (results[0].x, results[0].y) == (1010, 590)
+    
+    def test_find_all_template_on_screen(self, sample_screenshot, loaded_template, sample_template_image):
+        """测试模板项的灰度模板只解码一次"""
+        engine = VisionEngine(confidence_threshold=0.9)
+        config = TemplateConfig("test", "test", 0.8, 'TM_CCOEFF_NORMED')
+        template_item = TemplateItem(sample_template_image, "1920x1080", config)
+        
+        screenshot = sample_screenshot.copy()
+        screenshot[490:590, 910:1010] = loaded_template
+        
+        with patch.object(engine, 'take_screenshot', return_value=screenshot), \
+             patch.object(engine, 'load_template', wraps=engine.load_template) as mock_load:
+            
+            results = engine.find_all_template_on_screen(template_item)
+            engine.find_all_template_on_screen(template_item)
+            
+            mock_load.assert_called_once_with(sample_template_image)
+            assert template_item.gray.ndim == 2
+            assert (results[0].x, results[0].y) == (910, 490)
+    
+    def test_find_all_any_on_screen(self, sample_screenshot, loaded_template, sample_template_image, temp_dir):
+        """测试多个备选模板共用一次截图"""
+        engine = VisionEngine(confidence_threshold=0.9)
+        config = TemplateConfig("test", "test", 0.8, 'TM_CCOEFF_NORMED')
+        missing = TemplateItem(temp_dir / "missing.png", "1920x1080", config)
+        template_item = TemplateItem(sample_template_image, "1920x1080", config)
+        
+        screenshot = sample_screenshot.copy()
+        screenshot[490:590, 910:1010] = loaded_template
+        
+        with patch.object(engine, 'take_screenshot', return_value=screenshot) as mock_capture:
+            results = engine.find_all_any_on_screen([missing, template_item], region=(100, 100, 1920, 1080))
+        
+        mock_capture.assert_called_once_with((100, 100, 1920, 1080), grayscale=True)
+        assert results
+        assert (results[0].x, results[0].y) == (1010, 590)
+    
+    def test_find_all_any_on_screen_merge(self, sample_screenshot, loaded_template, sample_template_image, temp_dir):
+        """测试合并所有备选模板的匹配结果"""
+        engine = VisionEngine(confidence_threshold=0.9)
+        config = TemplateConfig("test", "test", 0.8, 'TM_CCOEFF_NORMED')
+        other_path = temp_dir / "other.png"
+        cv2.imwrite(str(other_path), loaded_template[:50, :50])
+        template_item = TemplateItem(sample_template_image, "1920x1080", config)
+        other_item = TemplateItem(other_path, "1920x1080", config)
+        
+        screenshot = sample_screenshot.copy()
+        screenshot[490:590, 910:1010] = loaded_template
+        
+        with patch.object(engine, 'take_screenshot', return_value=screenshot) as mock_capture:
+            first = engine.find_all_any_on_screen([template_item, other_item])
+            merged = engine.find_all_any_on_screen([template_item, other_item], merge=True)
+        
+        assert mock_capture.call_count == 2
+        assert len(merged) > len(first)
+        assert {m.top_left for m in first} <= {m.top_left for m in merged}
+        assert (910, 490) in {m.top_left for m in merged if m.width == 50}
+    
+    def test_warmup_templates(self, sample_template_image, temp_dir):
+        """测试预加载模板，缺失的模板跳过"""
+        engine = VisionEngine()
+        config = TemplateConfig("test", "test", 0.8, 'TM_CCOEFF_NORMED')
+        missing = TemplateItem(temp_dir / "missing.png", "1920x1080", config)
+        template_item = TemplateItem(sample_template_image, "1920x1080", config)
+        
+        assert engine.warmup_templates([missing, template_item]) == 1
+        assert template_item.gray is not None and template_item.gray.ndim == 2
+        assert missing.gray is None
+    
+    def test_find_all_template_on_screen_missing_file(self, temp_dir):
+        """测试模板文件不存在时返回空列表"""
+        engine = VisionEngine()
+        config = TemplateConfig("test", "test", 0.8, 'TM_CCOEFF_NORMED')
+        template_item = TemplateItem(temp_dir / "missing.png", "1920x1080", config)
+        
+        assert engine.find_all_template_on_screen(template_item) == []
+        assert template_item.gray is None
+    
     @patch('pyautogui.screenshot')
     def test_find_all_on_screen_with_region(self, mock_screenshot, sample_template_image):
         """测试在屏幕指定区域查找所有模板匹配"""
@@ -318,6 +722,240 @@ class TestVisionEngine:
             
             assert result is None
     
+    @patch('time.sleep')
+    def test_wait_for_any_template(self, mock_sleep, sample_screenshot, loaded_template,
+                                   sample_template_image, temp_dir):
+        """测试等待多个模板时每次检查只截图一次，画面未变化时跳过匹配"""
+        engine = VisionEngine(confidence_threshold=0.9)
+        config = TemplateConfig("test", "test", 0.8, 'TM_CCOEFF_NORMED')
+        missing = TemplateItem(temp_dir / "missing.png", "1920x1080", config)
+        template_item = TemplateItem(sample_template_image, "1920x1080", config)
+        
+        screenshot = sample_screenshot.copy()
+        screenshot[490:590, 910:1010] = loaded_template
+        blank = np.zeros((1080, 1920), dtype=np.uint8)
+        frames = [blank, blank.copy(), cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)]
+        
+        with patch.object(engine, 'take_screenshot', side_effect=frames) as mock_capture, \
+             patch.object(engine, 'match_template', wraps=engine.match_template) as mock_match:
+            found = engine.wait_for_any_template([missing, template_item], timeout=5.0, region=(100, 100, 1920, 1080))
+        
+        assert mock_capture.call_count == 3
+        assert mock_match.call_count == 2
+        assert mock_sleep.call_count == 2
+        assert found[0] is template_item
+        assert (found[1].x, found[1].y) == (1010, 590)
+    
+    def test_verify_match(self, loaded_template):
+        """测试只截取匹配位置的小块校验模板"""
+        engine = VisionEngine()
+        template = cv2.cvtColor(loaded_template, cv2.COLOR_BGR2GRAY)
+        match = MatchResult(910, 490, template.shape[1], template.shape[0], 0.9)
+        
+        with patch.object(engine, 'take_screenshot', return_value=template.copy()) as mock_capture:
+            assert engine.verify_match(match, template) is True
+            mock_capture.assert_called_once_with((910, 490, template.shape[1], template.shape[0]), grayscale=True)
+        
+        with patch.object(engine, 'take_screenshot', return_value=255 - template):
+            assert engine.verify_match(match, template) is False
+        
+        with patch.object(engine, 'take_screenshot', return_value=template[:10, :10]):
+            assert engine.verify_match(match, template) is False
+    
+    @patch('time.sleep')
+    def test_wait_until_gone(self, mock_sleep, loaded_template):
+        """测试等待模板从匹配位置消失"""
+        engine = VisionEngine()
+        template = cv2.cvtColor(loaded_template, cv2.COLOR_BGR2GRAY)
+        match = MatchResult(910, 490, template.shape[1], template.shape[0], 0.9)
+        
+        with patch.object(engine, 'take_screenshot', side_effect=[template.copy(), 255 - template]):
+            assert engine.wait_until_gone(match, template, timeout=1.0) is True
+        mock_sleep.assert_called_once_with(0.05)
+        
+        with patch.object(engine, 'take_screenshot', return_value=template.copy()) as mock_capture:
+            assert engine.wait_until_gone(match, template, timeout=0.0) is False
+            mock_capture.assert_called_once_with(
+                (902, 482, template.shape[1] + 16, template.shape[0] + 16), grayscale=True
+            )
+    
+    @patch('time.sleep')
+    def test_wait_until_gone_tinted(self, mock_sleep, loaded_template):
+        """测试按钮被悬停着色、像素差超限但仍在原处时继续等待"""
+        engine = VisionEngine()
+        template = cv2.cvtColor(loaded_template, cv2.COLOR_BGR2GRAY)
+        match = MatchResult(910, 490, template.shape[1], template.shape[0], 0.9)
+        tinted = np.full((template.shape[0] + 16, template.shape[1] + 16), 40, dtype=np.uint8)
+        tinted[8:-8, 8:-8] = cv2.add(template // 2, 40)
+        assert cv2.mean(cv2.absdiff(tinted[8:-8, 8:-8], template))[0] > 10
+        
+        with patch.object(engine, 'take_screenshot', return_value=tinted):
+            assert engine.wait_until_gone(match, template, timeout=0.0) is False
+    
+    def test_find_on_screen_orb(self, temp_dir):
+        """测试ORB特征点匹配并缓存模板特征"""
+        rng = np.random.default_rng(0)
+        texture = rng.integers(0, 256, (30, 30, 3), dtype=np.uint8)
+        template = cv2.resize(texture, (120, 120), interpolation=cv2.INTER_NEAREST)
+        template_path = temp_dir / "orb_template.png"
+        cv2.imwrite(str(template_path), template)
+        
+        screenshot = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        screenshot[200:320, 300:420] = template
+        
+        engine = VisionEngine()
+        config = TemplateConfig("test", "test", 0.8, 'TM_CCOEFF_NORMED')
+        template_item = TemplateItem(template_path, "1920x1080", config)
+        
+        with patch.object(engine, 'take_screenshot', return_value=screenshot):
+            result = engine.find_on_screen_orb(template_item)
+            features = template_item.orb_features
+            engine.find_on_screen_orb(template_item)
+        
+        assert result is not None
+        assert abs(result.center[0] - 360) <= 10
+        assert abs(result.center[1] - 260) <= 10
+        assert template_item.orb_features is features
+    
+    def test_find_on_screen_orb_few_keypoints(self, sample_template_image):
+        """测试模板特征点不足时改用模板匹配"""
+        engine = VisionEngine()
+        config = TemplateConfig("test", "test", 0.8, 'TM_CCOEFF_NORMED')
+        template_item = TemplateItem(sample_template_image, "1920x1080", config)
+        expected = MatchResult(100, 100, 50, 50, 0.9)
+        
+        with patch.object(engine, 'find_image_on_screen', return_value=expected) as mock_find:
+            result = engine.find_on_screen_orb(template_item)
+        
+        assert result is expected
+        mock_find.assert_called_once()
+    
+    def test_locate_any(self, temp_dir):
+        """测试ORB索引一次查询多个模板"""
+        config = TemplateConfig("test", "test", 0.8, 'TM_CCOEFF_NORMED')
+        screenshot = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        templates = {}
+        
+        for seed, name in enumerate(["test.first", "test.second"]):
+            rng = np.random.default_rng(seed)
+            texture = rng.integers(0, 256, (30, 30, 3), dtype=np.uint8)
+            template = cv2.resize(texture, (120, 120), interpolation=cv2.INTER_NEAREST)
+            template_path = temp_dir / f"{name}.png"
+            cv2.imwrite(str(template_path), template)
+            templates[name] = TemplateItem(template_path, "1920x1080", config)
+        
+        # 纯色模板没有特征点，不加入索引
+        blank_path = temp_dir / "blank.png"
+        cv2.imwrite(str(blank_path), np.zeros((100, 100, 3), dtype=np.uint8))
+        templates["test.blank"] = TemplateItem(blank_path, "1920x1080", config)
+        
+        screenshot[500:620, 900:1020] = cv2.imread(str(temp_dir / "test.second.png"))
+        
+        engine = VisionEngine()
+        assert engine.locate_any() is None
+        assert engine.build_orb_index(templates) == 2
+        
+        with patch.object(engine, 'take_screenshot', return_value=screenshot):
+            located = engine.locate_any()
+        
+        assert located is not None
+        name, result = located
+        assert name == "test.second"
+        assert abs(result.center[0] - 960) <= 10
+        assert abs(result.center[1] - 560) <= 10
+    
+    def test_wait_for_template_adaptive_backoff(self, sample_template_image):
+        """测试自适应等待的检查间隔逐步增长并以超时为上限"""
+        engine = VisionEngine()
+        clock = [0.0]
+        sleeps = []
+        
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+        
+        with patch('time.monotonic', side_effect=lambda: clock[0]), \
+             patch('time.sleep', side_effect=fake_sleep), \
+             patch.object(engine, 'find_image_on_screen', return_value=None) as mock_find:
+            
+            result = engine.wait_for_template_adaptive(
+                sample_template_image, timeout=1.0, initial_interval=0.01, max_interval=0.1, growth=2.0
+            )
+        
+        assert result is None
+        assert sleeps[:5] == pytest.approx([0.01, 0.02, 0.04, 0.08, 0.1])
+        assert max(sleeps) <= 0.1
+        assert sum(sleeps) == pytest.approx(1.0)
+        assert mock_find.call_count == len(sleeps) + 1
+    
+    def test_wait_for_template_adaptive_success(self, sample_template_image):
+        """测试自适应等待找到模板后立即返回"""
+        engine = VisionEngine()
+        match = MatchResult(100, 100, 50, 50, 0.9)
+        
+        with patch('time.sleep') as mock_sleep, \
+             patch.object(engine, 'find_image_on_screen', side_effect=[None, match]) as mock_find:
+            
+            result = engine.wait_for_template_adaptive(sample_template_image, timeout=1.0)
+        
+        assert result is match
+        assert mock_find.call_count == 2
+        mock_sleep.assert_called_once_with(0.005)
+    
+    def test_wait_for_template_adaptive_template_item(self, sample_template_image):
+        """测试传入模板项时复用其缓存的灰度模板"""
+        engine = VisionEngine()
+        config = TemplateConfig("test", "test", 0.8, 'TM_CCOEFF_NORMED')
+        template_item = TemplateItem(sample_template_image, "1920x1080", config)
+        match = MatchResult(100, 100, 50, 50, 0.9)
+        
+        with patch.object(engine, 'find_image_on_screen', return_value=match) as mock_find, \
+             patch.object(engine, 'prepare_template', wraps=engine.prepare_template) as mock_prepare:
+            assert engine.wait_for_template_adaptive(template_item, timeout=1.0) is match
+            assert engine.wait_for_template_adaptive(template_item, timeout=1.0) is match
+        
+        mock_prepare.assert_called_once()
+        assert mock_find.call_args[0][0] is template_item.gray
+    
+    def test_wait_for_template_adaptive_prefetch(self, sample_screenshot, loaded_template, sample_template_image):
+        """测试流水线等待在后台截图，找到模板后返回屏幕坐标，返回时没有仍在进行的截图"""
+        engine = VisionEngine(confidence_threshold=0.9)
+        blank = cv2.cvtColor(sample_screenshot, cv2.COLOR_BGR2GRAY)
+        found = sample_screenshot.copy()
+        found[490:590, 910:1010] = loaded_template
+        # 找到模板时已提交的下一帧截图不会被使用
+        frames = iter([blank, blank, cv2.cvtColor(found, cv2.COLOR_BGR2GRAY), blank])
+        active = threading.Event()
+        
+        def capture(region, grayscale):
+            active.set()
+            frame = next(frames)
+            time.sleep(0.01)
+            active.clear()
+            return frame
+        
+        with patch.object(engine, 'take_screenshot', side_effect=capture) as mock_capture:
+            result = engine.wait_for_template_adaptive(
+                sample_template_image, timeout=10.0, region=(100, 100, 1920, 1080), prefetch=True
+            )
+            assert not active.is_set()
+        
+        assert result is not None
+        assert (result.x, result.y) == (1010, 590)
+        assert mock_capture.call_count in (3, 4)
+        assert mock_capture.call_args_list[0] == call((100, 100, 1920, 1080), grayscale=True)
+    
+    def test_capture_after_abandoned(self):
+        """测试放弃的后台截图在等待结束后不再截图"""
+        engine = VisionEngine()
+        abandon = threading.Event()
+        abandon.set()
+        
+        with patch.object(engine, 'take_screenshot') as mock_capture:
+            assert engine._capture_after(10.0, None, abandon) is None
+        
+        mock_capture.assert_not_called()
+    
     def test_save_debug_image(self, sample_screenshot, temp_dir):
         """测试保存调试图像"""
         engine = VisionEngine()
@@ -341,7 +979,6 @@ class TestVisionEngine:
             assert isinstance(call_args[0][1], np.ndarray)
 
 
-@pytest.mark.unit
 class TestCreateVisionEngine:
     """测试创建图像识别引擎函数"""
     
@@ -362,28 +999,3 @@ class TestCreateVisionEngine:
         
         assert isinstance(engine, VisionEngine)
         assert engine.confidence_threshold == 0.95
-
-
-@pytest.mark.integration
-class TestVisionEngineIntegration:
-    """图像识别引擎集成测试"""
-    
-    def test_full_workflow(self, sample_template_image):
-        """测试完整的图像识别工作流"""
-        engine = VisionEngine(confidence_threshold=0.5)
-        
-        # 创建一个包含模板的屏幕截图
-        screenshot = np.zeros((500, 500, 3), dtype=np.uint8)
-        template = engine.load_template(sample_template_image)
-        
-        # 将模板放在截图的特定位置
-        screenshot[200:300, 200:300] = template
-        
-        # 执行匹配
-        with patch.object(engine, 'take_screenshot', return_value=screenshot):
-            result = engine.find_on_screen(sample_template_image)
-            
-            assert result is not None
-            assert 200 <= result.x <= 220  # 允许一些误差
-            assert 200 <= result.y <= 220
-            assert result.confidence >= 0.5
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+图像识别模块基准测试
+使用 pytest-benchmark 对模板匹配热路径计时，默认不运行：
+
+    pytest -m benchmark
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from core.vision import VisionEngine
+
+
+@pytest.mark.benchmark(group="vision", disable_gc=True)
+class TestVisionBenchmark:
+    """图像识别基准测试"""
+    
+    def test_match_template_bench(self, benchmark, sample_screenshot, loaded_template):
+        """基准测试：单模板匹配"""
+        engine = VisionEngine(confidence_threshold=0.5)
+        template = loaded_template
+        
+        # pedantic 模式下计时只覆盖 match_template 本身，不包含夹具开销
+        benchmark.pedantic(
+            engine.match_template,
+            args=(sample_screenshot, template),
+            rounds=20,
+            iterations=5,
+            warmup_rounds=5
+        )
+    
+    def test_find_all_matches_bench(self, benchmark, sample_screenshot, loaded_template):
+        """基准测试：查找所有匹配项"""
+        engine = VisionEngine(confidence_threshold=0.5)
+        template = loaded_template
+        
+        benchmark.pedantic(
+            engine.find_all_matches,
+            args=(sample_screenshot, template),
+            rounds=20,
+            iterations=5,
+            warmup_rounds=5
+        )
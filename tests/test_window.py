@@ -4,12 +4,99 @@
 
 import pytest
 import time
-from unittest.mock import Mock, patch, MagicMock, call
+from dataclasses import FrozenInstanceError
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock, call
 from typing import List, Tuple
 
 from core.window import WindowManager, WindowInfo, WindowState, create_window_manager
 
 
+@pytest.fixture(autouse=True)
+def win_mocks(monkeypatch):
+    """替换 core.window 中的 Win32/psutil 模块及进程名查询为 MagicMock，测试结束后自动还原"""
+    mocks = SimpleNamespace(
+        gui=MagicMock(), con=MagicMock(), proc=MagicMock(), psu=MagicMock(), api=MagicMock(),
+        proc_name=MagicMock(return_value=None)
+    )
+    # 虚拟桌面为单个 1920x1080 显示器
+    mocks.api.GetSystemMetrics.side_effect = {76: 0, 77: 0, 78: 1920, 79: 1080}.get
+    monkeypatch.setattr("core.window.win32gui", mocks.gui)
+    monkeypatch.setattr("core.window.win32con", mocks.con)
+    monkeypatch.setattr("core.window.win32process", mocks.proc)
+    monkeypatch.setattr("core.window.psutil", mocks.psu)
+    monkeypatch.setattr("core.window.win32api", mocks.api)
+    monkeypatch.setattr("core.window._proc_name", mocks.proc_name)
+    yield mocks
+
+
+class FakeClock:
+    """可控时钟，sleep 直接推进时间"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def time(self) -> float:
+        return self.now
+    
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+    
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """替换 time.time/time.sleep 为确定性的假时钟"""
+    clock = FakeClock()
+    monkeypatch.setattr(time, "time", clock.time)
+    monkeypatch.setattr(time, "sleep", clock.sleep)
+    return clock
+
+
+@pytest.fixture
+def mock_finders(monkeypatch):
+    """替换 WindowManager 的查找方法，默认均未找到窗口"""
+    finders = SimpleNamespace(
+        title=MagicMock(return_value=None),
+        class_name=MagicMock(return_value=None),
+        process=MagicMock(return_value=[])
+    )
+    monkeypatch.setattr(WindowManager, "find_window_by_title", finders.title)
+    monkeypatch.setattr(WindowManager, "find_window_by_class", finders.class_name)
+    monkeypatch.setattr(WindowManager, "find_window_by_process", finders.process)
+    return finders
+
+
+@pytest.fixture(scope="module")
+def normal_window():
+    """普通状态的测试窗口"""
+    return WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+
+
+@pytest.fixture(scope="module")
+def minimized_window():
+    """最小化状态的测试窗口"""
+    return WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.MINIMIZED, True, True)
+
+
+@pytest.fixture(scope="module")
+def parent_window():
+    """用于子窗口测试的父窗口"""
+    return WindowInfo(12345, "Parent Window", "ParentClass", 1234, "parent.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+
+
+@pytest.fixture(scope="module")
+def mock_windows():
+    """查找测试用的窗口列表，前两个属于同一进程"""
+    return (
+        WindowInfo(12345, "Test Window", "TestClass", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True),
+        WindowInfo(12346, "Test Window Application", "Class2", 1234, "Test.exe", (200, 200, 600, 500), WindowState.NORMAL, True, True),
+        WindowInfo(12347, "Other Window", "Class3", 1236, "other.exe", (300, 300, 700, 600), WindowState.NORMAL, True, True)
+    )
+
+
 class TestWindowInfo:
     """测试WindowInfo类"""
     
@@ -37,40 +124,23 @@ class TestWindowInfo:
         assert window_info.visible is True
         assert window_info.enabled is True
     
-    def test_window_info_properties(self):
+    def test_window_info_properties(self, normal_window):
         """测试WindowInfo属性"""
-        window_info = WindowInfo(
-            hwnd=12345,
-            title="Test Window",
-            class_name="TestClass",
-            pid=1234,
-            process_name="test.exe",
-            rect=(100, 100, 500, 400),
-            state=WindowState.NORMAL,
-            visible=True,
-            enabled=True
-        )
-        
-        assert window_info.width == 400  # 500 - 100
-        assert window_info.height == 300  # 400 - 100
-        assert window_info.center == (300, 250)  # (100 + 400//2, 100 + 300//2)
+        assert normal_window.width == 400  # 500 - 100
+        assert normal_window.height == 300  # 400 - 100
+        assert normal_window.center == (300, 250)  # (100 + 400//2, 100 + 300//2)
     
-    def test_window_info_repr(self):
+    def test_window_info_repr(self, normal_window):
         """测试WindowInfo字符串表示"""
-        window_info = WindowInfo(
-            hwnd=12345,
-            title="Test Window",
-            class_name="TestClass",
-            pid=1234,
-            process_name="test.exe",
-            rect=(100, 100, 500, 400),
-            state=WindowState.NORMAL,
-            visible=True,
-            enabled=True
-        )
-        
-        repr_str = repr(window_info)
+        repr_str = repr(normal_window)
         assert "WindowInfo(hwnd=12345, title='Test Window', pid=1234)" == repr_str
+    
+    def test_window_info_frozen(self, normal_window):
+        """测试WindowInfo不可修改"""
+        with pytest.raises(FrozenInstanceError):
+            normal_window.title = "Changed"
+        
+        assert not hasattr(normal_window, '__dict__')
 
 
 class TestWindowState:
@@ -101,30 +171,23 @@ class TestWindowManager:
         assert manager.search_timeout == 5.0
         assert manager.activate_timeout == 2.0
     
-    @patch('core.window.win32gui')
-    @patch('core.window.win32process')
-    @patch('core.window.psutil')
-    def test_get_all_windows_success(self, mock_psutil, mock_win32process, mock_win32gui):
+    def test_get_all_windows_success(self, win_mocks):
         """测试获取所有窗口成功"""
         # 模拟win32gui
-        mock_win32gui.EnumWindows.side_effect = lambda callback, param: callback(12345, param) and callback(12346, param)
-        mock_win32gui.IsWindow.return_value = True
-        mock_win32gui.IsWindowVisible.return_value = True
-        mock_win32gui.GetWindowText.side_effect = ["Window 1", "Window 2"]
-        mock_win32gui.GetClassName.side_effect = ["Class1", "Class2"]
-        mock_win32gui.GetWindowRect.side_effect = [(100, 100, 500, 400), (200, 200, 600, 500)]
-        mock_win32gui.GetWindowPlacement.side_effect = [(0, 0, 0, 0, 0, 0, 0, 0, 0, 0), (0, 1, 0, 0, 0, 0, 0, 0, 0, 0)]
-        mock_win32gui.IsWindowEnabled.return_value = True
+        win_mocks.gui.EnumWindows.side_effect = lambda callback, param: callback(12345, param) and callback(12346, param)
+        win_mocks.gui.IsWindow.return_value = True
+        win_mocks.gui.IsWindowVisible.return_value = True
+        win_mocks.gui.GetWindowText.side_effect = ["Window 1", "Window 2"]
+        win_mocks.gui.GetClassName.side_effect = ["Class1", "Class2"]
+        win_mocks.gui.GetWindowRect.side_effect = [(100, 100, 500, 400), (200, 200, 600, 500)]
+        win_mocks.gui.GetWindowPlacement.side_effect = [(0, 0, 0, 0, 0, 0, 0, 0, 0, 0), (0, 1, 0, 0, 0, 0, 0, 0, 0, 0)]
+        win_mocks.gui.IsWindowEnabled.return_value = True
         
         # 模拟win32process
-        mock_win32process.GetWindowThreadProcessId.side_effect = [(1, 1234), (2, 1235)]
+        win_mocks.proc.GetWindowThreadProcessId.side_effect = [(1, 1234), (2, 1235)]
         
-        # 模拟psutil
-        mock_process_1 = Mock()
-        mock_process_1.name.return_value = "test1.exe"
-        mock_process_2 = Mock()
-        mock_process_2.name.return_value = "test2.exe"
-        mock_psutil.Process.side_effect = [mock_process_1, mock_process_2]
+        # 模拟进程名查询
+        win_mocks.proc_name.side_effect = ["test1.exe", "test2.exe"]
         
         manager = WindowManager()
         windows = manager.get_all_windows()
@@ -138,39 +201,36 @@ class TestWindowManager:
         assert windows[1].hwnd == 12346
         assert windows[1].pid == 1235
         assert windows[1].process_name == "test2.exe"
+        win_mocks.psu.Process.assert_not_called()
     
-    @patch('core.window.win32gui')
-    def test_get_all_windows_enum_exception(self, mock_win32gui):
+    def test_get_all_windows_enum_exception(self, win_mocks):
         """测试枚举窗口异常"""
-        mock_win32gui.EnumWindows.side_effect = Exception("Enum error")
+        win_mocks.gui.EnumWindows.side_effect = Exception("Enum error")
         
         manager = WindowManager()
         windows = manager.get_all_windows()
         
         assert windows == []
     
-    @patch('core.window.win32gui')
-    @patch('core.window.win32process')
-    @patch('core.window.psutil')
-    def test_get_all_windows_process_exception(self, mock_psutil, mock_win32process, mock_win32gui):
+    def test_get_all_windows_process_exception(self, win_mocks):
         """测试获取进程信息异常"""
         # 模拟win32gui
-        mock_win32gui.EnumWindows.side_effect = lambda callback, param: callback(12345, param)
-        mock_win32gui.IsWindow.return_value = True
-        mock_win32gui.IsWindowVisible.return_value = True
-        mock_win32gui.GetWindowText.return_value = "Test Window"
-        mock_win32gui.GetClassName.return_value = "TestClass"
-        mock_win32gui.GetWindowRect.return_value = (100, 100, 500, 400)
-        mock_win32gui.GetWindowPlacement.return_value = (0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
-        mock_win32gui.IsWindowEnabled.return_value = True
+        win_mocks.gui.EnumWindows.side_effect = lambda callback, param: callback(12345, param)
+        win_mocks.gui.IsWindow.return_value = True
+        win_mocks.gui.IsWindowVisible.return_value = True
+        win_mocks.gui.GetWindowText.return_value = "Test Window"
+        win_mocks.gui.GetClassName.return_value = "TestClass"
+        win_mocks.gui.GetWindowRect.return_value = (100, 100, 500, 400)
+        win_mocks.gui.GetWindowPlacement.return_value = (0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        win_mocks.gui.IsWindowEnabled.return_value = True
         
         # 模拟win32process
-        mock_win32process.GetWindowThreadProcessId.return_value = (1, 1234)
+        win_mocks.proc.GetWindowThreadProcessId.return_value = (1, 1234)
         
         # 模拟psutil异常
-        mock_psutil.Process.side_effect = [Exception("Process error")]
-        mock_psutil.NoSuchProcess = Exception
-        mock_psutil.AccessDenied = Exception
+        win_mocks.psu.Process.side_effect = [Exception("Process error")]
+        win_mocks.psu.NoSuchProcess = Exception
+        win_mocks.psu.AccessDenied = Exception
         
         manager = WindowManager()
         windows = manager.get_all_windows()
@@ -178,455 +238,375 @@ class TestWindowManager:
         assert len(windows) == 1
         assert windows[0].process_name == "Unknown"
     
-    @patch.object(WindowManager, 'get_all_windows')
-    def test_find_window_by_title_exact_match(self, mock_get_all_windows):
-        """测试根据标题精确查找窗口"""
-        mock_windows = [
-            WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True),
-            WindowInfo(12346, "Another Window", "Class2", 1235, "other.exe", (200, 200, 600, 500), WindowState.NORMAL, True, True)
-        ]
-        mock_get_all_windows.return_value = mock_windows
+    @pytest.mark.parametrize("finder,args,kwargs,expected", [
+        ("find_window_by_title", ("Test Window",), {"exact_match": True}, 12345),
+        ("find_window_by_title", ("application",), {"exact_match": False}, 12346),
+        ("find_window_by_title", ("TEST WINDOW APPLICATION",), {"exact_match": False}, 12346),
+        ("find_window_by_title", ("Non-existent Window",), {}, None),
+        ("find_window_by_class", ("TestClass",), {}, 12345),
+        ("find_window_by_class", ("NonExistentClass",), {}, None),
+        ("find_window_by_process", ("test.exe",), {}, [12345, 12346]),
+        ("find_window_by_process", ("TEST.EXE",), {}, [12345, 12346]),
+        ("find_window_by_pid", (1234,), {}, [12345, 12346]),
+    ])
+    def test_find_window(self, mock_windows, finder, args, kwargs, expected):
+        """测试按标题、类名、进程名、进程ID查找窗口"""
+        manager = WindowManager()
+        
+        with patch.object(WindowManager, '_enumerate_windows', return_value=list(mock_windows)):
+            result = getattr(manager, finder)(*args, **kwargs)
+        
+        # 列表查找返回所有匹配窗口，单个查找返回首个匹配或None
+        if isinstance(result, list):
+            assert [window.hwnd for window in result] == expected
+        else:
+            assert (result.hwnd if result else None) == expected
+    
+    def test_get_all_windows_cached_within_ttl(self, win_mocks):
+        """测试缓存时间内多次查找只枚举一次窗口"""
+        win_mocks.gui.EnumWindows.side_effect = lambda callback, param: callback(12345, param)
+        win_mocks.gui.GetWindowText.return_value = "Test Window"
+        win_mocks.gui.GetClassName.return_value = "TestClass"
+        win_mocks.gui.GetWindowRect.return_value = (100, 100, 500, 400)
+        win_mocks.gui.GetWindowPlacement.return_value = (0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        win_mocks.proc.GetWindowThreadProcessId.return_value = (1, 1234)
+        win_mocks.psu.Process.return_value.name.return_value = "test.exe"
+        
+        manager = WindowManager(cache_ttl=60.0)
+        
+        assert manager.find_window_by_title("Test Window") is not None
+        assert manager.find_window_by_class("TestClass") is not None
+        assert len(manager.get_all_windows()) == 1
+        win_mocks.gui.EnumWindows.assert_called_once()
+        
+        manager.invalidate_cache()
+        manager.get_all_windows()
+        assert win_mocks.gui.EnumWindows.call_count == 2
+    
+    def test_find_window_reuses_index(self, mock_windows):
+        """测试缓存时间内多次查找复用同一次枚举"""
+        manager = WindowManager(cache_ttl=60.0)
+        
+        with patch.object(WindowManager, '_enumerate_windows', return_value=list(mock_windows)) as mock_enum:
+            assert manager.find_window_by_class("Class3").hwnd == 12347
+            assert len(manager.find_window_by_pid(1234)) == 2
+            assert len(manager.find_window_by_process("other.exe")) == 1
+            assert mock_enum.call_count == 1
+            
+            manager.invalidate_cache()
+            manager.find_window_by_title("Test Window")
+            assert mock_enum.call_count == 2
+    
+    def test_find_window_without_cache(self, mock_windows):
+        """测试 cache_ttl 为0时每次查找都重新枚举"""
+        manager = WindowManager(cache_ttl=0)
+        
+        with patch.object(WindowManager, '_enumerate_windows', return_value=list(mock_windows)) as mock_enum:
+            manager.find_window_by_class("TestClass")
+            manager.find_window_by_class("TestClass")
+            
+            assert mock_enum.call_count == 2
+    
+    def test_wait_for_window_by_title_success(self, fake_clock, normal_window, mock_finders):
+        """测试等待窗口出现成功（根据标题）"""
+        mock_finders.title.return_value = normal_window
         
         manager = WindowManager()
-        window = manager.find_window_by_title("Test Window", exact_match=True)
+        window = manager.wait_for_window(title="Test Window", timeout=1.0)
         
         assert window is not None
         assert window.title == "Test Window"
-        assert window.hwnd == 12345
+        mock_finders.title.assert_called_once_with("Test Window")
     
-    @patch.object(WindowManager, 'get_all_windows')
-    def test_find_window_by_title_partial_match(self, mock_get_all_windows):
-        """测试根据标题部分匹配查找窗口"""
-        mock_windows = [
-            WindowInfo(12345, "Test Window Application", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True),
-            WindowInfo(12346, "Another Window", "Class2", 1235, "other.exe", (200, 200, 600, 500), WindowState.NORMAL, True, True)
-        ]
-        mock_get_all_windows.return_value = mock_windows
+    def test_wait_for_window_by_class_success(self, fake_clock, mock_finders):
+        """测试等待窗口出现成功（根据类名）"""
+        mock_window = WindowInfo(12345, "Test Window", "TestClass", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        mock_finders.class_name.return_value = mock_window
         
         manager = WindowManager()
-        window = manager.find_window_by_title("test window", exact_match=False)
+        window = manager.wait_for_window(class_name="TestClass", timeout=1.0)
         
         assert window is not None
-        assert window.title == "Test Window Application"
-        assert window.hwnd == 12345
-    
-    @patch.object(WindowManager, 'get_all_windows')
-    def test_find_window_by_title_not_found(self, mock_get_all_windows):
-        """测试根据标题查找窗口失败"""
-        mock_windows = [
-            WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
-        ]
-        mock_get_all_windows.return_value = mock_windows
-        
-        manager = WindowManager()
-        window = manager.find_window_by_title("Non-existent Window")
-        
-        assert window is None
+        assert window.class_name == "TestClass"
+        mock_finders.class_name.assert_called_once_with("TestClass")
     
-    @patch.object(WindowManager, 'get_all_windows')
-    def test_find_window_by_class(self, mock_get_all_windows):
-        """测试根据类名查找窗口"""
-        mock_windows = [
-            WindowInfo(12345, "Test Window", "TestClass", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True),
-            WindowInfo(12346, "Another Window", "OtherClass", 1235, "other.exe", (200, 200, 600, 500), WindowState.NORMAL, True, True)
-        ]
-        mock_get_all_windows.return_value = mock_windows
+    def test_wait_for_window_by_process_success(self, fake_clock, normal_window, mock_finders):
+        """测试等待窗口出现成功（根据进程名）"""
+        mock_finders.process.return_value = [normal_window]
         
         manager = WindowManager()
-        window = manager.find_window_by_class("TestClass")
+        window = manager.wait_for_window(process_name="test.exe", timeout=1.0)
         
         assert window is not None
-        assert window.class_name == "TestClass"
-        assert window.hwnd == 12345
+        assert window.process_name == "test.exe"
+        mock_finders.process.assert_called_once_with("test.exe")
     
-    @patch.object(WindowManager, 'get_all_windows')
-    def test_find_window_by_class_not_found(self, mock_get_all_windows):
-        """测试根据类名查找窗口失败"""
-        mock_windows = [
-            WindowInfo(12345, "Test Window", "TestClass", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
-        ]
-        mock_get_all_windows.return_value = mock_windows
-        
+    def test_wait_for_window_timeout(self, fake_clock, mock_finders):
+        """测试等待窗口超时"""
         manager = WindowManager()
-        window = manager.find_window_by_class("NonExistentClass")
+        window = manager.wait_for_window(title="Non-existent Window", timeout=1.0)
         
         assert window is None
+        assert fake_clock.now >= 1.0
+        assert mock_finders.title.call_count >= 10
     
-    @patch.object(WindowManager, 'get_all_windows')
-    def test_find_window_by_process(self, mock_get_all_windows):
-        """测试根据进程名查找窗口"""
-        mock_windows = [
-            WindowInfo(12345, "Test Window 1", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True),
-            WindowInfo(12346, "Test Window 2", "Class2", 1235, "test.exe", (200, 200, 600, 500), WindowState.NORMAL, True, True),
-            WindowInfo(12347, "Other Window", "Class3", 1236, "other.exe", (300, 300, 700, 600), WindowState.NORMAL, True, True)
-        ]
-        mock_get_all_windows.return_value = mock_windows
-        
-        manager = WindowManager()
-        windows = manager.find_window_by_process("test.exe")
-        
-        assert len(windows) == 2
-        assert windows[0].process_name == "test.exe"
-        assert windows[1].process_name == "test.exe"
-    
-    @patch.object(WindowManager, 'get_all_windows')
-    def test_find_window_by_process_case_insensitive(self, mock_get_all_windows):
-        """测试根据进程名查找窗口（大小写不敏感）"""
-        mock_windows = [
-            WindowInfo(12345, "Test Window", "Class1", 1234, "Test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
-        ]
-        mock_get_all_windows.return_value = mock_windows
-        
-        manager = WindowManager()
-        windows = manager.find_window_by_process("TEST.EXE")
+    def test_wait_for_window_default_timeout(self, fake_clock, mock_finders):
+        """测试等待窗口使用默认超时"""
+        manager = WindowManager(search_timeout=10.0)
+        window = manager.wait_for_window(title="Test Window")
         
-        assert len(windows) == 1
-        assert windows[0].process_name == "Test.exe"
+        assert window is None
+        assert 10.0 <= fake_clock.now < 10.2
     
-    @patch.object(WindowManager, 'get_all_windows')
-    def test_find_window_by_pid(self, mock_get_all_windows):
-        """测试根据进程ID查找窗口"""
-        mock_windows = [
-            WindowInfo(12345, "Test Window 1", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True),
-            WindowInfo(12346, "Test Window 2", "Class2", 1234, "test.exe", (200, 200, 600, 500), WindowState.NORMAL, True, True),
-            WindowInfo(12347, "Other Window", "Class3", 1235, "other.exe", (300, 300, 700, 600), WindowState.NORMAL, True, True)
-        ]
-        mock_get_all_windows.return_value = mock_windows
+    def test_wait_for_window_event_existing_window(self, normal_window, mock_finders):
+        """测试事件等待时窗口已存在则直接返回"""
+        mock_finders.title.return_value = normal_window
         
         manager = WindowManager()
-        windows = manager.find_window_by_pid(1234)
+        with patch.object(manager, 'wait_for_window') as mock_wait:
+            window = manager.wait_for_window_event(title="Test Window", timeout=1.0)
         
-        assert len(windows) == 2
-        assert windows[0].pid == 1234
-        assert windows[1].pid == 1234
+        assert window is normal_window
+        mock_wait.assert_not_called()
     
-    @patch.object(WindowManager, 'find_window_by_title')
-    @patch.object(WindowManager, 'find_window_by_class')
-    @patch.object(WindowManager, 'find_window_by_process')
-    @patch('time.sleep')
-    def test_wait_for_window_by_title_success(self, mock_sleep, mock_find_by_process, mock_find_by_class, mock_find_by_title):
-        """测试等待窗口出现成功（根据标题）"""
-        mock_window = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
-        mock_find_by_title.return_value = mock_window
-        
+    def test_wait_for_window_event_hwnd_hint(self, normal_window, mock_finders):
+        """测试上次的窗口句柄仍符合条件时直接返回，不再枚举查找"""
+        mock_finders.title.return_value = normal_window
         manager = WindowManager()
-        window = manager.wait_for_window(title="Test Window", timeout=1.0)
         
-        assert window is not None
-        assert window.title == "Test Window"
-        mock_find_by_title.assert_called_once_with("Test Window")
+        with patch.object(manager, '_window_info', return_value=normal_window) as mock_info:
+            window = manager.wait_for_window_event(title="test", timeout=1.0, hwnd_hint=12345)
+            
+            assert window is normal_window
+            mock_info.assert_called_once_with(12345)
+            mock_finders.title.assert_not_called()
+            
+            # 句柄对应的窗口已不符合条件时按原方式查找
+            manager.wait_for_window_event(title="Other", timeout=1.0, hwnd_hint=12345)
+            mock_finders.title.assert_called_once_with("Other")
     
-    @patch.object(WindowManager, 'find_window_by_title')
-    @patch.object(WindowManager, 'find_window_by_class')
-    @patch.object(WindowManager, 'find_window_by_process')
-    @patch('time.sleep')
-    def test_wait_for_window_by_class_success(self, mock_sleep, mock_find_by_process, mock_find_by_class, mock_find_by_title):
-        """测试等待窗口出现成功（根据类名）"""
-        mock_window = WindowInfo(12345, "Test Window", "TestClass", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
-        mock_find_by_title.return_value = None
-        mock_find_by_class.return_value = mock_window
+    def test_wait_for_window_event_fallback(self, monkeypatch, fake_clock, mock_finders):
+        """测试无法使用窗口事件钩子时回退到轮询等待"""
+        monkeypatch.setattr("core.window.ctypes", SimpleNamespace())
         
         manager = WindowManager()
-        window = manager.wait_for_window(class_name="TestClass", timeout=1.0)
+        window = manager.wait_for_window_event(title="Test Window", timeout=1.0)
         
-        assert window is not None
-        assert window.class_name == "TestClass"
-        mock_find_by_class.assert_called_once_with("TestClass")
+        assert window is None
+        assert fake_clock.now >= 1.0
+        assert mock_finders.title.call_count >= 10
     
-    @patch.object(WindowManager, 'find_window_by_title')
-    @patch.object(WindowManager, 'find_window_by_class')
-    @patch.object(WindowManager, 'find_window_by_process')
-    @patch('time.sleep')
-    def test_wait_for_window_by_process_success(self, mock_sleep, mock_find_by_process, mock_find_by_class, mock_find_by_title):
-        """测试等待窗口出现成功（根据进程名）"""
-        mock_window = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
-        mock_find_by_title.return_value = None
-        mock_find_by_class.return_value = None
-        mock_find_by_process.return_value = [mock_window]
-        
+    def test_get_window_rect(self, normal_window, win_mocks):
+        """测试获取窗口截图区域，超出屏幕的部分被截断"""
         manager = WindowManager()
-        window = manager.wait_for_window(process_name="test.exe", timeout=1.0)
         
-        assert window is not None
-        assert window.process_name == "test.exe"
-        mock_find_by_process.assert_called_once_with("test.exe")
-    
-    @patch.object(WindowManager, 'find_window_by_title')
-    @patch('time.sleep')
-    @patch('time.time')
-    def test_wait_for_window_timeout(self, mock_time, mock_sleep, mock_find_by_title):
-        """测试等待窗口超时"""
-        mock_find_by_title.return_value = None
-        mock_time.side_effect = [0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1]
+        win_mocks.gui.GetWindowRect.return_value = (100, 100, 500, 400)
+        assert manager.get_window_rect(normal_window) == (100, 100, 400, 300)
         
-        manager = WindowManager()
-        window = manager.wait_for_window(title="Non-existent Window", timeout=1.0)
+        win_mocks.gui.GetWindowRect.return_value = (-8, -8, 1928, 1048)
+        assert manager.get_window_rect(normal_window) == (0, 0, 1920, 1048)
         
-        assert window is None
-    
-    @patch.object(WindowManager, 'find_window_by_title')
-    def test_wait_for_window_default_timeout(self, mock_find_by_title):
-        """测试等待窗口使用默认超时"""
-        mock_find_by_title.return_value = None
-        
-        manager = WindowManager(search_timeout=10.0)
+        # 默认 1000x1000 的窗口放在 (100, 100) 时超出 1080p 屏幕底边
+        win_mocks.gui.GetWindowRect.return_value = (100, 100, 1100, 1100)
+        assert manager.get_window_rect(normal_window) == (100, 100, 1000, 980)
         
-        # 模拟time.time使超时立即触发
-        with patch('time.time') as mock_time:
-            mock_time.side_effect = [0, 11.0]
-            window = manager.wait_for_window(title="Test Window")
+        # 第二个显示器在主显示器右侧时按虚拟桌面截断
+        win_mocks.api.GetSystemMetrics.side_effect = {76: 0, 77: 0, 78: 3840, 79: 1080}.get
+        win_mocks.gui.GetWindowRect.return_value = (1800, 100, 2300, 1200)
+        assert manager.get_window_rect(normal_window) == (1800, 100, 500, 980)
+        win_mocks.api.GetSystemMetrics.side_effect = {76: 0, 77: 0, 78: 1920, 79: 1080}.get
         
-        assert window is None
+        win_mocks.gui.GetWindowRect.side_effect = Exception("invalid window")
+        assert manager.get_window_rect(normal_window) == (100, 100, 400, 300)
     
-    @patch('core.window.win32gui')
-    @patch('core.window.win32con')
-    def test_activate_window_success(self, mock_win32con, mock_win32gui):
+    def test_activate_window_success(self, normal_window, win_mocks):
         """测试激活窗口成功"""
-        mock_win32gui.IsWindow.return_value = True
-        mock_win32con.SW_SHOW = 5
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.IsWindow.return_value = True
+        win_mocks.con.SW_SHOW = 5
         
         manager = WindowManager()
-        result = manager.activate_window(window_info)
+        result = manager.activate_window(normal_window)
         
         assert result is True
-        mock_win32gui.IsWindow.assert_called_once_with(12345)
-        mock_win32gui.SetForegroundWindow.assert_called_once_with(12345)
-        mock_win32gui.SetActiveWindow.assert_called_once_with(12345)
-        mock_win32gui.ShowWindow.assert_called_once_with(12345, 5)
-    
-    @patch('core.window.win32gui')
-    @patch('core.window.win32con')
-    def test_activate_window_minimized(self, mock_win32con, mock_win32gui):
+        win_mocks.gui.IsWindow.assert_called_once_with(12345)
+        win_mocks.gui.SetForegroundWindow.assert_called_once_with(12345)
+        win_mocks.gui.SetActiveWindow.assert_called_once_with(12345)
+        win_mocks.gui.ShowWindow.assert_called_once_with(12345, 5)
+    
+    def test_activate_window_minimized(self, minimized_window, win_mocks):
         """测试激活最小化窗口"""
-        mock_win32gui.IsWindow.return_value = True
-        mock_win32con.SW_RESTORE = 9
-        mock_win32con.SW_SHOW = 5
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.MINIMIZED, True, True)
+        win_mocks.gui.IsWindow.return_value = True
+        win_mocks.con.SW_RESTORE = 9
+        win_mocks.con.SW_SHOW = 5
         
         manager = WindowManager()
-        result = manager.activate_window(window_info)
+        result = manager.activate_window(minimized_window)
         
         assert result is True
-        mock_win32gui.ShowWindow.assert_has_calls([
+        win_mocks.gui.ShowWindow.assert_has_calls([
             call(12345, 9),
             call(12345, 5)
         ])
     
-    @patch('core.window.win32gui')
-    def test_activate_window_invalid_handle(self, mock_win32gui):
+    def test_activate_window_invalid_handle(self, normal_window, win_mocks):
         """测试激活无效窗口句柄"""
-        mock_win32gui.IsWindow.return_value = False
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.IsWindow.return_value = False
         
         manager = WindowManager()
-        result = manager.activate_window(window_info)
+        result = manager.activate_window(normal_window)
         
         assert result is False
-        mock_win32gui.IsWindow.assert_called_once_with(12345)
+        win_mocks.gui.IsWindow.assert_called_once_with(12345)
     
-    @patch('core.window.win32gui')
-    def test_activate_window_exception(self, mock_win32gui):
+    def test_activate_window_exception(self, normal_window, win_mocks):
         """测试激活窗口异常"""
-        mock_win32gui.IsWindow.return_value = True
-        mock_win32gui.SetForegroundWindow.side_effect = Exception("Activate error")
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.IsWindow.return_value = True
+        win_mocks.gui.SetForegroundWindow.side_effect = Exception("Activate error")
         
         manager = WindowManager()
-        result = manager.activate_window(window_info)
+        result = manager.activate_window(normal_window)
         
         assert result is False
     
-    @patch('core.window.win32gui')
-    @patch('core.window.win32con')
-    def test_close_window_success(self, mock_win32con, mock_win32gui):
+    def test_close_window_success(self, normal_window, win_mocks):
         """测试关闭窗口成功"""
-        mock_win32con.WM_CLOSE = 0x0010
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.con.WM_CLOSE = 0x0010
         
         manager = WindowManager()
-        result = manager.close_window(window_info)
+        result = manager.close_window(normal_window)
         
         assert result is True
-        mock_win32gui.SendMessage.assert_called_once_with(12345, 0x0010, 0, 0)
+        win_mocks.gui.SendMessage.assert_called_once_with(12345, 0x0010, 0, 0)
     
-    @patch('core.window.win32gui')
-    def test_close_window_exception(self, mock_win32gui):
+    def test_close_window_exception(self, normal_window, win_mocks):
         """测试关闭窗口异常"""
-        mock_win32gui.SendMessage.side_effect = Exception("Close error")
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.SendMessage.side_effect = Exception("Close error")
         
         manager = WindowManager()
-        result = manager.close_window(window_info)
+        result = manager.close_window(normal_window)
         
         assert result is False
     
-    @patch('core.window.win32gui')
-    @patch('core.window.win32con')
-    def test_minimize_window_success(self, mock_win32con, mock_win32gui):
+    def test_minimize_window_success(self, normal_window, win_mocks):
         """测试最小化窗口成功"""
-        mock_win32con.SW_MINIMIZE = 6
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.con.SW_MINIMIZE = 6
         
         manager = WindowManager()
-        result = manager.minimize_window(window_info)
+        result = manager.minimize_window(normal_window)
         
         assert result is True
-        mock_win32gui.ShowWindow.assert_called_once_with(12345, 6)
+        win_mocks.gui.ShowWindow.assert_called_once_with(12345, 6)
     
-    @patch('core.window.win32gui')
-    def test_minimize_window_exception(self, mock_win32gui):
+    def test_minimize_window_exception(self, normal_window, win_mocks):
         """测试最小化窗口异常"""
-        mock_win32gui.ShowWindow.side_effect = Exception("Minimize error")
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.ShowWindow.side_effect = Exception("Minimize error")
         
         manager = WindowManager()
-        result = manager.minimize_window(window_info)
+        result = manager.minimize_window(normal_window)
         
         assert result is False
     
-    @patch('core.window.win32gui')
-    @patch('core.window.win32con')
-    def test_maximize_window_success(self, mock_win32con, mock_win32gui):
+    def test_maximize_window_success(self, normal_window, win_mocks):
         """测试最大化窗口成功"""
-        mock_win32con.SW_MAXIMIZE = 3
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.con.SW_MAXIMIZE = 3
         
         manager = WindowManager()
-        result = manager.maximize_window(window_info)
+        result = manager.maximize_window(normal_window)
         
         assert result is True
-        mock_win32gui.ShowWindow.assert_called_once_with(12345, 3)
+        win_mocks.gui.ShowWindow.assert_called_once_with(12345, 3)
     
-    @patch('core.window.win32gui')
-    def test_maximize_window_exception(self, mock_win32gui):
+    def test_maximize_window_exception(self, normal_window, win_mocks):
         """测试最大化窗口异常"""
-        mock_win32gui.ShowWindow.side_effect = Exception("Maximize error")
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.ShowWindow.side_effect = Exception("Maximize error")
         
         manager = WindowManager()
-        result = manager.maximize_window(window_info)
+        result = manager.maximize_window(normal_window)
         
         assert result is False
     
-    @patch('core.window.win32gui')
-    def test_resize_window_success(self, mock_win32gui):
+    def test_resize_window_success(self, normal_window, win_mocks):
         """测试调整窗口大小成功"""
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
-        
         # 模拟成功的 Windows API 调用
-        mock_win32gui.GetWindowRect.return_value = (100, 100, 700, 600)
-        mock_win32gui.GetWindowPlacement.return_value = (0, 1, 0, 0, 0, 0, 0, 0, 0, 0)
+        win_mocks.gui.GetWindowRect.return_value = (100, 100, 700, 600)
+        win_mocks.gui.GetWindowPlacement.return_value = (0, 1, 0, 0, 0, 0, 0, 0, 0, 0)
         
         manager = WindowManager()
-        result = manager.resize_window(window_info, 600, 500)
+        result = manager.resize_window(normal_window, 600, 500)
         
         # 检查返回的是 WindowInfo 对象而不是布尔值
         assert result is not None
         assert isinstance(result, WindowInfo)
         assert result.hwnd == 12345
-        mock_win32gui.MoveWindow.assert_called_once_with(12345, 100, 100, 600, 500, True)
+        win_mocks.gui.MoveWindow.assert_called_once_with(12345, 100, 100, 600, 500, True)
     
-    @patch('core.window.win32gui')
-    def test_resize_window_exception(self, mock_win32gui):
+    def test_resize_window_exception(self, normal_window, win_mocks):
         """测试调整窗口大小异常"""
-        mock_win32gui.MoveWindow.side_effect = Exception("Resize error")
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.MoveWindow.side_effect = Exception("Resize error")
         
         manager = WindowManager()
-        result = manager.resize_window(window_info, 600, 500)
+        result = manager.resize_window(normal_window, 600, 500)
         
         # 异常时应返回 None
         assert result is None
     
-    @patch('core.window.win32gui')
-    def test_move_window_success(self, mock_win32gui):
+    def test_move_window_success(self, normal_window, win_mocks):
         """测试移动窗口成功"""
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
-        
         # 模拟成功的 Windows API 调用
-        mock_win32gui.GetWindowRect.return_value = (200, 150, 600, 450)
+        win_mocks.gui.GetWindowRect.return_value = (200, 150, 600, 450)
         
         manager = WindowManager()
-        result = manager.move_window(window_info, 200, 150)
+        result = manager.move_window(normal_window, 200, 150)
         
         # 检查返回的是 WindowInfo 对象而不是布尔值
         assert result is not None
         assert isinstance(result, WindowInfo)
         assert result.hwnd == 12345
-        mock_win32gui.MoveWindow.assert_called_once_with(12345, 200, 150, 400, 300, True)
+        win_mocks.gui.MoveWindow.assert_called_once_with(12345, 200, 150, 400, 300, True)
     
-    @patch('core.window.win32gui')
-    def test_move_window_exception(self, mock_win32gui):
+    def test_move_window_exception(self, normal_window, win_mocks):
         """测试移动窗口异常"""
-        mock_win32gui.MoveWindow.side_effect = Exception("Move error")
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.MoveWindow.side_effect = Exception("Move error")
         
         manager = WindowManager()
-        result = manager.move_window(window_info, 200, 150)
+        result = manager.move_window(normal_window, 200, 150)
         
         # 异常时应返回 None
         assert result is None
     
-    @patch('core.window.win32gui')
-    def test_get_window_text_success(self, mock_win32gui):
+    def test_get_window_text_success(self, normal_window, win_mocks):
         """测试获取窗口文本成功"""
-        mock_win32gui.GetWindowText.return_value = "Window Text"
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.GetWindowText.return_value = "Window Text"
         
         manager = WindowManager()
-        text = manager.get_window_text(window_info)
+        text = manager.get_window_text(normal_window)
         
         assert text == "Window Text"
-        mock_win32gui.GetWindowText.assert_called_once_with(12345)
+        win_mocks.gui.GetWindowText.assert_called_once_with(12345)
     
-    @patch('core.window.win32gui')
-    def test_get_window_text_exception(self, mock_win32gui):
+    def test_get_window_text_exception(self, normal_window, win_mocks):
         """测试获取窗口文本异常"""
-        mock_win32gui.GetWindowText.side_effect = Exception("Get text error")
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.GetWindowText.side_effect = Exception("Get text error")
         
         manager = WindowManager()
-        text = manager.get_window_text(window_info)
+        text = manager.get_window_text(normal_window)
         
         assert text == ""
     
-    @patch('core.window.win32gui')
-    @patch('core.window.win32process')
-    @patch('core.window.psutil')
-    def test_get_child_windows_success(self, mock_psutil, mock_win32process, mock_win32gui):
+    def test_get_child_windows_success(self, parent_window, win_mocks):
         """测试获取子窗口成功"""
-        # 模拟父窗口信息
-        parent_window = WindowInfo(12345, "Parent Window", "ParentClass", 1234, "parent.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
-        
         # 模拟子窗口枚举
-        mock_win32gui.EnumChildWindows.side_effect = lambda hwnd, callback, param: callback(12346, param) and callback(12347, param)
-        mock_win32gui.GetWindowText.side_effect = ["Child 1", "Child 2"]
-        mock_win32gui.GetClassName.side_effect = ["ChildClass1", "ChildClass2"]
-        mock_win32gui.GetWindowRect.side_effect = [(110, 110, 250, 200), (260, 110, 400, 200)]
-        mock_win32gui.GetWindowPlacement.side_effect = [(0, 0, 0, 0, 0, 0, 0, 0, 0, 0), (0, 0, 0, 0, 0, 0, 0, 0, 0, 0)]
-        mock_win32gui.IsWindowVisible.return_value = True
-        mock_win32gui.IsWindowEnabled.return_value = True
+        win_mocks.gui.EnumChildWindows.side_effect = lambda hwnd, callback, param: callback(12346, param) and callback(12347, param)
+        win_mocks.gui.GetWindowText.side_effect = ["Child 1", "Child 2"]
+        win_mocks.gui.GetClassName.side_effect = ["ChildClass1", "ChildClass2"]
+        win_mocks.gui.GetWindowRect.side_effect = [(110, 110, 250, 200), (260, 110, 400, 200)]
+        win_mocks.gui.GetWindowPlacement.side_effect = [(0, 0, 0, 0, 0, 0, 0, 0, 0, 0), (0, 0, 0, 0, 0, 0, 0, 0, 0, 0)]
+        win_mocks.gui.IsWindowVisible.return_value = True
+        win_mocks.gui.IsWindowEnabled.return_value = True
         
         # 模拟进程信息
-        mock_win32process.GetWindowThreadProcessId.side_effect = [(1, 1234), (2, 1234)]
-        mock_process = Mock()
-        mock_process.name.return_value = "parent.exe"
-        mock_psutil.Process.return_value = mock_process
+        win_mocks.proc.GetWindowThreadProcessId.side_effect = [(1, 1234), (2, 1234)]
+        win_mocks.psu.Process.return_value.name.return_value = "parent.exe"
         
         manager = WindowManager()
         child_windows = manager.get_child_windows(parent_window)
@@ -637,58 +617,44 @@ class TestWindowManager:
         assert child_windows[1].title == "Child 2"
         assert child_windows[1].hwnd == 12347
     
-    @patch('core.window.win32gui')
-    def test_get_child_windows_exception(self, mock_win32gui):
+    def test_get_child_windows_exception(self, parent_window, win_mocks):
         """测试获取子窗口异常"""
-        mock_win32gui.EnumChildWindows.side_effect = Exception("Enum child error")
-        
-        parent_window = WindowInfo(12345, "Parent Window", "ParentClass", 1234, "parent.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.EnumChildWindows.side_effect = Exception("Enum child error")
         
         manager = WindowManager()
         child_windows = manager.get_child_windows(parent_window)
         
         assert child_windows == []
     
-    @patch('core.window.win32gui')
-    @patch('core.window.win32con')
-    def test_is_window_responsive_success(self, mock_win32con, mock_win32gui):
+    def test_is_window_responsive_success(self, normal_window, win_mocks):
         """测试检查窗口响应成功"""
-        mock_win32gui.SendMessageTimeout.return_value = (1, 0)
-        mock_win32con.WM_NULL = 0
-        mock_win32con.SMTO_ABORTIFHUNG = 2
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.SendMessageTimeout.return_value = (1, 0)
+        win_mocks.con.WM_NULL = 0
+        win_mocks.con.SMTO_ABORTIFHUNG = 2
         
         manager = WindowManager()
-        result = manager.is_window_responsive(window_info, timeout=2.0)
+        result = manager.is_window_responsive(normal_window, timeout=2.0)
         
         assert result is True
-        mock_win32gui.SendMessageTimeout.assert_called_once_with(12345, 0, 0, 0, 2, 2000)
+        win_mocks.gui.SendMessageTimeout.assert_called_once_with(12345, 0, 0, 0, 2, 2000)
     
-    @patch('core.window.win32gui')
-    @patch('core.window.win32con')
-    def test_is_window_responsive_unresponsive(self, mock_win32con, mock_win32gui):
+    def test_is_window_responsive_unresponsive(self, normal_window, win_mocks):
         """测试检查窗口无响应"""
-        mock_win32gui.SendMessageTimeout.return_value = (0, 0)
-        mock_win32con.WM_NULL = 0
-        mock_win32con.SMTO_ABORTIFHUNG = 2
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.SendMessageTimeout.return_value = (0, 0)
+        win_mocks.con.WM_NULL = 0
+        win_mocks.con.SMTO_ABORTIFHUNG = 2
         
         manager = WindowManager()
-        result = manager.is_window_responsive(window_info, timeout=2.0)
+        result = manager.is_window_responsive(normal_window, timeout=2.0)
         
         assert result is False
     
-    @patch('core.window.win32gui')
-    def test_is_window_responsive_exception(self, mock_win32gui):
+    def test_is_window_responsive_exception(self, normal_window, win_mocks):
         """测试检查窗口响应异常"""
-        mock_win32gui.SendMessageTimeout.side_effect = Exception("Response check error")
-        
-        window_info = WindowInfo(12345, "Test Window", "Class1", 1234, "test.exe", (100, 100, 500, 400), WindowState.NORMAL, True, True)
+        win_mocks.gui.SendMessageTimeout.side_effect = Exception("Response check error")
         
         manager = WindowManager()
-        result = manager.is_window_responsive(window_info)
+        result = manager.is_window_responsive(normal_window)
         
         assert result is False
 
@@ -718,31 +684,34 @@ class TestCreateWindowManager:
         assert manager.activate_timeout == 3.0
 
 
+# 集成测试中唯一可见的应用窗口
+_APP_WINDOW_GUI = {
+    'EnumWindows.side_effect': lambda callback, param: callback(12345, param),
+    'IsWindow.return_value': True,
+    'IsWindowVisible.return_value': True,
+    'GetWindowText.return_value': "Test Application",
+    'GetClassName.return_value': "TestAppClass",
+    'GetWindowRect.return_value': (100, 100, 500, 400),
+    'GetWindowPlacement.return_value': (0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+    'IsWindowEnabled.return_value': True,
+    'SendMessageTimeout.return_value': (1, 0),
+}
+
+
+@pytest.fixture
+def app_window_mocks(win_mocks):
+    """在 win_mocks 上配置一个可用的应用窗口"""
+    win_mocks.gui.configure_mock(**_APP_WINDOW_GUI)
+    win_mocks.proc.GetWindowThreadProcessId.return_value = (1, 1234)
+    win_mocks.psu.Process.return_value.name.return_value = "testapp.exe"
+    return win_mocks
+
+
 class TestWindowManagerIntegration:
     """测试WindowManager集成功能"""
     
-    @patch('core.window.win32gui')
-    @patch('core.window.win32process')
-    @patch('core.window.psutil')
-    def test_full_window_workflow(self, mock_psutil, mock_win32process, mock_win32gui):
+    def test_full_window_workflow(self, app_window_mocks):
         """测试完整窗口工作流"""
-        # 模拟获取窗口列表
-        mock_win32gui.EnumWindows.side_effect = lambda callback, param: callback(12345, param)
-        mock_win32gui.IsWindow.return_value = True
-        mock_win32gui.IsWindowVisible.return_value = True
-        mock_win32gui.GetWindowText.return_value = "Test Application"
-        mock_win32gui.GetClassName.return_value = "TestAppClass"
-        mock_win32gui.GetWindowRect.return_value = (100, 100, 500, 400)
-        mock_win32gui.GetWindowPlacement.return_value = (0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
-        mock_win32gui.IsWindowEnabled.return_value = True
-        mock_win32gui.SendMessageTimeout.return_value = (1, 0)
-        
-        mock_win32process.GetWindowThreadProcessId.return_value = (1, 1234)
-        
-        mock_process = Mock()
-        mock_process.name.return_value = "testapp.exe"
-        mock_psutil.Process.return_value = mock_process
-        
         manager = WindowManager()
         
         # 1. 查找窗口
@@ -5,164 +5,442 @@
 """
 
 import argparse
+import re
 import sys
 from pathlib import Path
 import yaml
 import json
-from typing import Dict, Any, List
+from collections import deque
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Callable, Dict, Any, Iterator, List, Optional, Set, Tuple
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from core.config import create_default_config, Config
+from core.config import create_default_config, Config, SafeDumper
 from core.logger import setup_logger
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# 模块级日志器，只在导入时配置一次处理器
+_LOGGER = setup_logger("config_generator", debug=True)
+
+
+# 可用的配置模板名称
+_TEMPLATE_NAMES = ('minimal', 'development', 'production', 'testing')
+
+# 预定义的配置模板（只读）。各 _get_*_config 返回顶层浅拷贝，
+# 嵌套的配置节在各次调用间共享，调用方不应就地修改。
+
+# 最小配置
+_MINIMAL_TEMPLATE = MappingProxyType({
+    'app': {
+        'name': 'Xiaoxin RPA Pro',
+        'version': '1.0.2'
+    },
+    'vision': {
+        'confidence_threshold': 0.8
+    },
+    'mouse': {
+        'click_delay': 0.1
+    }
+})
+
+
+# 开发配置
+_DEVELOPMENT_TEMPLATE = MappingProxyType({
+    'app': {
+        'name': 'Xiaoxin RPA Pro',
+        'version': '1.0.2',
+        'debug': True
+    },
+    'logging': {
+        'level': 'DEBUG',
+        'file_enabled': True,
+        'console_enabled': True
+    },
+    'vision': {
+        'confidence_threshold': 0.7,
+        'match_method': 'TM_CCOEFF_NORMED',
+        'grayscale': True
+    },
+    'mouse': {
+        'click_delay': 0.05,
+        'move_duration': 0.2,
+        'fail_safe': False
+    },
+    'window': {
+        'search_timeout': 3.0,
+        'activate_timeout': 1.0
+    },
+    'workflow': {
+        'step_delay': 0.2,
+        'error_retry': 1,
+        'screenshot_on_error': True
+    },
+    'templates': {
+        'base_path': 'templates',
+        'auto_resolution': True,
+        'supported_formats': ['.png', '.jpg', '.jpeg']
+    }
+})
+
+
+# 生产配置
+_PRODUCTION_TEMPLATE = MappingProxyType({
+    'app': {
+        'name': 'Xiaoxin RPA Pro',
+        'version': '1.0.2',
+        'debug': False
+    },
+    'logging': {
+        'level': 'INFO',
+        'file_enabled': True,
+        'console_enabled': False
+    },
+    'vision': {
+        'confidence_threshold': 0.9,
+        'match_method': 'TM_CCOEFF_NORMED',
+        'grayscale': True
+    },
+    'mouse': {
+        'click_delay': 0.1,
+        'move_duration': 0.5,
+        'fail_safe': True
+    },
+    'window': {
+        'search_timeout': 10.0,
+        'activate_timeout': 3.0
+    },
+    'workflow': {
+        'step_delay': 0.5,
+        'error_retry': 3,
+        'screenshot_on_error': True
+    },
+    'templates': {
+        'base_path': 'templates',
+        'auto_resolution': True,
+        'supported_formats': ['.png', '.jpg', '.jpeg', '.bmp']
+    }
+})
+
+
+# 测试配置
+_TESTING_TEMPLATE = MappingProxyType({
+    'app': {
+        'name': 'Xiaoxin RPA Pro Test',
+        'version': '1.0.2',
+        'debug': True
+    },
+    'logging': {
+        'level': 'DEBUG',
+        'file_enabled': False,
+        'console_enabled': True
+    },
+    'vision': {
+        'confidence_threshold': 0.5,
+        'match_method': 'TM_CCOEFF_NORMED',
+        'grayscale': True
+    },
+    'mouse': {
+        'click_delay': 0.01,
+        'move_duration': 0.1,
+        'fail_safe': False
+    },
+    'window': {
+        'search_timeout': 1.0,
+        'activate_timeout': 0.5
+    },
+    'workflow': {
+        'step_delay': 0.1,
+        'error_retry': 1,
+        'screenshot_on_error': False
+    },
+    'templates': {
+        'base_path': 'test_templates',
+        'auto_resolution': False,
+        'supported_formats': ['.png']
+    }
+})
+
+
+class _FastDumper(SafeDumper):
+    """
+    配置模板专用的YAML Dumper
+    
+    模板只包含dict/list/str/bool/int/float/None，预先注册这些类型的表示器，
+    并关闭锚点/别名检测，省去每个节点的对象标识跟踪。
+    """
+    
+    def ignore_aliases(self, data: Any) -> bool:
+        return True
+
+
+for _type, _representer in (
+    (dict, _FastDumper.represent_dict),
+    (list, _FastDumper.represent_list),
+    (str, _FastDumper.represent_str),
+    (bool, _FastDumper.represent_bool),
+    (int, _FastDumper.represent_int),
+    (float, _FastDumper.represent_float),
+    (type(None), _FastDumper.represent_none),
+):
+    _FastDumper.add_representer(_type, _representer)
+del _type, _representer
+
+
+# 可以按原样输出为YAML纯量的字符串（保守起见只接受ASCII且长度有限，避免折行）
+_PLAIN_STR_RE = re.compile(r'[A-Za-z0-9_.][A-Za-z0-9_. /-]{0,59}')
+_YAML_STR_TAG = 'tag:yaml.org,2002:str'
+_RESOLVER = yaml.resolver.Resolver()
+
+
+def _emit_scalar(value: Any) -> Optional[str]:
+    """
+    将模板中的纯量转换为YAML文本
+    
+    Args:
+        value: 纯量值
+    
+    Returns:
+        YAML文本，无法保证与yaml.dump一致时返回None
+    """
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if value != value or value in (float('inf'), float('-inf')):
+            return None
+        text = repr(value).lower()
+        # 与SafeRepresenter一致: 1e-05 -> 1.0e-05
+        if '.' not in text and 'e' in text:
+            text = text.replace('e', '.0e', 1)
+        return text
+    if isinstance(value, str):
+        if (_PLAIN_STR_RE.fullmatch(value) and not value.endswith(' ')
+                and _RESOLVER.resolve(yaml.ScalarNode, value, (True, False)) == _YAML_STR_TAG):
+            return value
+    return None
+
+
+def _emit_template_yaml(data: Mapping, indent: int = 0) -> Optional[str]:
+    """
+    为固定结构的配置模板直接生成块格式YAML，输出与yaml.dump一致
+    
+    只支持键为字符串、值为纯量/纯量列表/嵌套字典的数据，
+    遇到其他结构时返回None，由调用方回退到yaml.dump。
+    
+    Args:
+        data: 配置数据
+        indent: 当前缩进
+    
+    Returns:
+        YAML文本，不支持的数据返回None
+    """
+    # 先检查键类型再排序，混合int/str键排序会抛出TypeError
+    if not data or not all(isinstance(key, str) for key in data):
+        return None
+    
+    pad = ' ' * indent
+    lines = []
+    for key in sorted(data):
+        if _emit_scalar(key) != key:
+            return None
+        value = data[key]
+        if isinstance(value, Mapping):
+            body = _emit_template_yaml(value, indent + 2)
+            if body is None:
+                return None
+            lines.append(f"{pad}{key}:\n{body}")
+        elif isinstance(value, list):
+            items = [_emit_scalar(item) for item in value]
+            if not items or None in items:
+                return None
+            lines.append(f"{pad}{key}:\n" + "".join(f"{pad}- {item}\n" for item in items))
+        else:
+            text = _emit_scalar(value)
+            if text is None:
+                return None
+            lines.append(f"{pad}{key}: {text}\n")
+    return "".join(lines)
+
+
+def _dump_template_yaml(data: Dict[str, Any]) -> str:
+    """输出模板YAML，优先使用专用生成器，不支持时回退到yaml.dump"""
+    content = _emit_template_yaml(data)
+    if content is None:
+        content = yaml.dump(data, Dumper=_FastDumper, default_flow_style=False, allow_unicode=True)
+    return content
+
+
+def _serialize_json(data: Dict[str, Any]) -> bytes:
+    """
+    将配置序列化为UTF-8编码的JSON，安装了orjson时使用其更快的编码器
+    
+    Args:
+        data: 配置数据
+    
+    Returns:
+        JSON字节串
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _serialize_yaml(data: Dict[str, Any]) -> bytes:
+    """
+    将配置序列化为UTF-8编码的块格式YAML
+    
+    Args:
+        data: 配置数据
+    
+    Returns:
+        YAML字节串
+    """
+    return _dump_template_yaml(data).encode('utf-8')
+
+
+# 输出格式 -> 序列化函数，未知格式按YAML输出
+_SERIALIZERS: Dict[str, Callable[[Dict[str, Any]], bytes]] = {
+    'json': _serialize_json,
+    'yaml': _serialize_yaml
+}
+
+
+# 本进程中已确认存在的输出目录
+_KNOWN_DIRS: Set[Path] = set()
+
+
+def _ensure_parent_dir(output_file: Path) -> None:
+    """确保输出文件的父目录存在，同一目录只创建一次"""
+    parent = output_file.parent
+    if parent not in _KNOWN_DIRS:
+        parent.mkdir(parents=True, exist_ok=True)
+        _KNOWN_DIRS.add(parent)
+
+
+def _write_output(output_file: Path, content: bytes) -> None:
+    """写入输出文件，记住的目录在此期间被删除时重新创建后再写"""
+    _ensure_parent_dir(output_file)
+    try:
+        output_file.write_bytes(content)
+    except FileNotFoundError:
+        _KNOWN_DIRS.discard(output_file.parent)
+        _ensure_parent_dir(output_file)
+        output_file.write_bytes(content)
+
+
+def _content_unchanged(output_file: Path, content: bytes) -> bool:
+    """检查输出文件是否已与目标内容一致（先比较大小，再比较内容）"""
+    try:
+        if output_file.stat().st_size != len(content):
+            return False
+        return output_file.read_bytes() == content
+    except OSError:
+        return False
+
+
+class _LazyTemplates(Mapping):
+    """按需构建的配置模板映射，首次访问某个模板时才调用其构建函数"""
+    
+    def __init__(self, builders: Dict[str, Callable[[], Dict[str, Any]]]):
+        self._builders = builders
+        self._cache: Dict[str, Dict[str, Any]] = {}
+    
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        if name not in self._cache:
+            self._cache[name] = self._builders[name]()
+        return self._cache[name]
+    
+    def __contains__(self, name: object) -> bool:
+        return name in self._builders
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._builders)
+    
+    def __len__(self) -> int:
+        return len(self._builders)
+
 
 class ConfigGenerator:
     """配置文件生成器"""
     
+    # 基本结构验证模式，类加载时构建一次
+    _VALIDATION_SCHEMA = {
+        'app': {
+            'name': str,
+            'version': str,
+            'debug?': bool
+        },
+        'logging?': {
+            'level': str,
+            'file_enabled?': bool,
+            'console_enabled?': bool
+        },
+        'vision?': {
+            'confidence_threshold': (lambda x: 0.0 <= x <= 1.0),
+            'match_method?': str,
+            'grayscale?': bool
+        },
+        'mouse?': {
+            'click_delay': (lambda x: x >= 0),
+            'move_duration?': (lambda x: x >= 0),
+            'fail_safe?': bool
+        },
+        'window?': {
+            'search_timeout': (lambda x: x > 0),
+            'activate_timeout?': (lambda x: x > 0)
+        },
+        'workflow?': {
+            'step_delay?': (lambda x: x >= 0),
+            'error_retry?': (lambda x: x >= 0),
+            'screenshot_on_error?': bool
+        },
+        'templates?': {
+            'base_path': str,
+            'auto_resolution?': bool,
+            'supported_formats?': list
+        }
+    }
+    
     def __init__(self):
-        self.logger = setup_logger("config_generator", debug=True)
+        self.logger = _LOGGER
         
-        # 预定义的配置模板
-        self.templates = {
-            'minimal': self._get_minimal_config(),
-            'development': self._get_development_config(),
-            'production': self._get_production_config(),
-            'testing': self._get_testing_config()
+        # 预定义的配置模板，只有被用到的模板才会构建
+        self._template_builders = {
+            'minimal': self._get_minimal_config,
+            'development': self._get_development_config,
+            'production': self._get_production_config,
+            'testing': self._get_testing_config
         }
+        self.templates = _LazyTemplates(self._template_builders)
+        # 已序列化的模板内容，键为 (模板名称, 输出格式)
+        self._serialized: Dict[Tuple[str, str], bytes] = {}
     
     def _get_minimal_config(self) -> Dict[str, Any]:
         """获取最小配置"""
-        return {
-            'app': {
-                'name': 'Xiaoxin RPA Pro',
-                'version': '1.0.2'
-            },
-            'vision': {
-                'confidence_threshold': 0.8
-            },
-            'mouse': {
-                'click_delay': 0.1
-            }
-        }
+        return dict(_MINIMAL_TEMPLATE)
     
     def _get_development_config(self) -> Dict[str, Any]:
         """获取开发配置"""
-        return {
-            'app': {
-                'name': 'Xiaoxin RPA Pro',
-                'version': '1.0.2',
-                'debug': True
-            },
-            'logging': {
-                'level': 'DEBUG',
-                'file_enabled': True,
-                'console_enabled': True
-            },
-            'vision': {
-                'confidence_threshold': 0.7,
-                'match_method': 'TM_CCOEFF_NORMED',
-                'grayscale': True
-            },
-            'mouse': {
-                'click_delay': 0.05,
-                'move_duration': 0.2,
-                'fail_safe': False
-            },
-            'window': {
-                'search_timeout': 3.0,
-                'activate_timeout': 1.0
-            },
-            'workflow': {
-                'step_delay': 0.2,
-                'error_retry': 1,
-                'screenshot_on_error': True
-            },
-            'templates': {
-                'base_path': 'templates',
-                'auto_resolution': True,
-                'supported_formats': ['.png', '.jpg', '.jpeg']
-            }
-        }
+        return dict(_DEVELOPMENT_TEMPLATE)
     
     def _get_production_config(self) -> Dict[str, Any]:
         """获取生产配置"""
-        return {
-            'app': {
-                'name': 'Xiaoxin RPA Pro',
-                'version': '1.0.2',
-                'debug': False
-            },
-            'logging': {
-                'level': 'INFO',
-                'file_enabled': True,
-                'console_enabled': False
-            },
-            'vision': {
-                'confidence_threshold': 0.9,
-                'match_method': 'TM_CCOEFF_NORMED',
-                'grayscale': True
-            },
-            'mouse': {
-                'click_delay': 0.1,
-                'move_duration': 0.5,
-                'fail_safe': True
-            },
-            'window': {
-                'search_timeout': 10.0,
-                'activate_timeout': 3.0
-            },
-            'workflow': {
-                'step_delay': 0.5,
-                'error_retry': 3,
-                'screenshot_on_error': True
-            },
-            'templates': {
-                'base_path': 'templates',
-                'auto_resolution': True,
-                'supported_formats': ['.png', '.jpg', '.jpeg', '.bmp']
-            }
-        }
+        return dict(_PRODUCTION_TEMPLATE)
     
     def _get_testing_config(self) -> Dict[str, Any]:
         """获取测试配置"""
-        return {
-            'app': {
-                'name': 'Xiaoxin RPA Pro Test',
-                'version': '1.0.2',
-                'debug': True
-            },
-            'logging': {
-                'level': 'DEBUG',
-                'file_enabled': False,
-                'console_enabled': True
-            },
-            'vision': {
-                'confidence_threshold': 0.5,
-                'match_method': 'TM_CCOEFF_NORMED',
-                'grayscale': True
-            },
-            'mouse': {
-                'click_delay': 0.01,
-                'move_duration': 0.1,
-                'fail_safe': False
-            },
-            'window': {
-                'search_timeout': 1.0,
-                'activate_timeout': 0.5
-            },
-            'workflow': {
-                'step_delay': 0.1,
-                'error_retry': 1,
-                'screenshot_on_error': False
-            },
-            'templates': {
-                'base_path': 'test_templates',
-                'auto_resolution': False,
-                'supported_formats': ['.png']
-            }
-        }
+        return dict(_TESTING_TEMPLATE)
     
     def generate_config(self, template: str, output_path: str, format: str = 'yaml') -> bool:
         """
@@ -177,22 +455,22 @@ class ConfigGenerator:
             生成是否成功
         """
         try:
+            # 与模板名称常量共享同一对象，字典查找可直接按身份命中
+            template = sys.intern(template)
             if template not in self.templates:
                 self.logger.error(f"未知的配置模板: {template}")
                 return False
             
-            config_data = self.templates[template]
             output_file = Path(output_path)
+            content = self._serialize_template(template, format.lower())
             
-            # 创建输出目录
-            output_file.parent.mkdir(parents=True, exist_ok=True)
+            # 内容未变化时跳过写入
+            if _content_unchanged(output_file, content):
+                self.logger.info(f"配置文件未变化，跳过写入: {output_file}")
+                return True
             
-            # 保存配置文件
-            with open(output_file, 'w', encoding='utf-8') as f:
-                if format.lower() == 'json':
-                    json.dump(config_data, f, indent=2, ensure_ascii=False)
-                else:
-                    yaml.safe_dump(config_data, f, default_flow_style=False, allow_unicode=True)
+            # 创建输出目录并保存配置文件
+            _write_output(output_file, content)
             
             self.logger.info(f"配置文件已生成: {output_file}")
             return True
@@ -201,6 +479,25 @@ class ConfigGenerator:
             self.logger.error(f"生成配置文件失败: {e}")
             return False
     
+    def _serialize_template(self, template: str, format: str) -> bytes:
+        """
+        获取模板序列化后的字节内容，每个模板和格式只序列化一次
+        
+        Args:
+            template: 配置模板名称
+            format: 输出格式 ('yaml' 或 'json')
+        
+        Returns:
+            序列化后的字节内容
+        """
+        key = (template, format)
+        content = self._serialized.get(key)
+        if content is None:
+            config_data = self.templates[template]
+            content = _SERIALIZERS.get(format, _serialize_yaml)(config_data)
+            self._serialized[key] = content
+        return content
+    
     def validate_config(self, config_path: str) -> bool:
         """
         验证配置文件
@@ -214,45 +511,7 @@ class ConfigGenerator:
         try:
             config = Config(config_path)
             
-            # 基本结构验证
-            schema = {
-                'app': {
-                    'name': str,
-                    'version': str,
-                    'debug?': bool
-                },
-                'logging?': {
-                    'level': str,
-                    'file_enabled?': bool,
-                    'console_enabled?': bool
-                },
-                'vision?': {
-                    'confidence_threshold': (lambda x: 0.0 <= x <= 1.0),
-                    'match_method?': str,
-                    'grayscale?': bool
-                },
-                'mouse?': {
-                    'click_delay': (lambda x: x >= 0),
-                    'move_duration?': (lambda x: x >= 0),
-                    'fail_safe?': bool
-                },
-                'window?': {
-                    'search_timeout': (lambda x: x > 0),
-                    'activate_timeout?': (lambda x: x > 0)
-                },
-                'workflow?': {
-                    'step_delay?': (lambda x: x >= 0),
-                    'error_retry?': (lambda x: x >= 0),
-                    'screenshot_on_error?': bool
-                },
-                'templates?': {
-                    'base_path': str,
-                    'auto_resolution?': bool,
-                    'supported_formats?': list
-                }
-            }
-            
-            if config.validate(schema):
+            if config.validate(self._VALIDATION_SCHEMA):
                 self.logger.info("配置文件验证通过")
                 return True
             else:
@@ -285,13 +544,8 @@ class ConfigGenerator:
             
             # 保存合并后的配置
             output_file = Path(output_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(output_file, 'w', encoding='utf-8') as f:
-                if output_file.suffix.lower() == '.json':
-                    json.dump(merged_data, f, indent=2, ensure_ascii=False)
-                else:
-                    yaml.safe_dump(merged_data, f, default_flow_style=False, allow_unicode=True)
+            serializer = _SERIALIZERS.get(output_file.suffix.lower().lstrip('.'), _serialize_yaml)
+            _write_output(output_file, serializer(merged_data))
             
             self.logger.info(f"配置文件合并完成: {output_file}")
             return True
@@ -301,41 +555,48 @@ class ConfigGenerator:
             return False
     
     def _deep_merge(self, base_dict: Dict[str, Any], override_dict: Dict[str, Any]) -> None:
-        """深度合并字典"""
-        for key, value in override_dict.items():
-            if key in base_dict and isinstance(base_dict[key], dict) and isinstance(value, dict):
-                self._deep_merge(base_dict[key], value)
-            else:
-                base_dict[key] = value
+        """深度合并字典（使用显式栈迭代，避免深层嵌套时递归）"""
+        stack = deque([(base_dict, override_dict)])
+        while stack:
+            base, override = stack.pop()
+            # 没有重叠的键时整体合并，无需逐键比较
+            if base.keys().isdisjoint(override):
+                base.update(override)
+                continue
+            
+            for key, value in override.items():
+                base_value = base.get(key)
+                if isinstance(base_value, dict) and isinstance(value, dict):
+                    stack.append((base_value, value))
+                else:
+                    base[key] = value
     
     def list_templates(self) -> List[str]:
         """列出可用的配置模板"""
-        return list(self.templates.keys())
+        return list(self._template_builders.keys())
     
     def show_template(self, template: str) -> None:
         """显示配置模板内容"""
+        template = sys.intern(template)
         if template not in self.templates:
             print(f"未知的配置模板: {template}")
             return
         
         config_data = self.templates[template]
-        print(f"\n配置模板: {template}")
-        print("=" * 50)
-        print(yaml.dump(config_data, default_flow_style=False, allow_unicode=True))
+        content = _dump_template_yaml(config_data)
+        # 一次性写出，避免多次print
+        sys.stdout.write(f"\n配置模板: {template}\n{'=' * 50}\n{content}\n")
     
     def interactive_generate(self) -> None:
         """交互式生成配置"""
-        print("欢迎使用配置文件生成工具")
-        print("=" * 50)
+        templates = tuple(self._template_builders)
+        menu = "\n".join(f"{i}. {name}" for i, name in enumerate(templates, 1))
+        sys.stdout.write(f"欢迎使用配置文件生成工具\n{'=' * 50}\n\n可用的配置模板:\n{menu}\n")
         
         # 选择模板
-        print("\n可用的配置模板:")
-        for i, template in enumerate(self.list_templates(), 1):
-            print(f"{i}. {template}")
-        
         try:
             choice = int(input("\n请选择配置模板 (输入数字): ")) - 1
-            template = self.list_templates()[choice]
+            template = templates[choice]
         except (ValueError, IndexError):
             print("无效的选择，使用默认模板")
             template = 'minimal'
@@ -364,7 +625,7 @@ def main():
     
     # 生成配置命令
     generate_parser = subparsers.add_parser('generate', help='生成配置文件')
-    generate_parser.add_argument('--template', '-t', choices=['minimal', 'development', 'production', 'testing'],
+    generate_parser.add_argument('--template', '-t', choices=_TEMPLATE_NAMES,
                                 default='minimal', help='配置模板')
     generate_parser.add_argument('--output', '-o', required=True, help='输出文件路径')
     generate_parser.add_argument('--format', '-f', choices=['yaml', 'json'], default='yaml', help='输出格式')
@@ -384,7 +645,7 @@ def main():
     
     # 显示模板命令
     show_parser = subparsers.add_parser('show', help='显示模板内容')
-    show_parser.add_argument('template', choices=['minimal', 'development', 'production', 'testing'],
+    show_parser.add_argument('template', choices=_TEMPLATE_NAMES,
                             help='模板名称')
     
     # 交互式生成命令
@@ -400,6 +661,18 @@ def main():
         parser.print_help()
         return
     
+    args.command = sys.intern(args.command)
+    
+    # list/default 不需要构建生成器
+    if args.command == 'list':
+        print("可用的配置模板:\n" + "\n".join(f"  - {template}" for template in _TEMPLATE_NAMES))
+        return
+    
+    if args.command == 'default':
+        create_default_config(args.output)
+        print(f"默认配置文件已生成: {args.output}")
+        return
+    
     generator = ConfigGenerator()
     
     if args.command == 'generate':
@@ -414,21 +687,11 @@ def main():
         success = generator.merge_configs(args.base, args.override, args.output)
         sys.exit(0 if success else 1)
     
-    elif args.command == 'list':
-        print("可用的配置模板:")
-        for template in generator.list_templates():
-            print(f"  - {template}")
-    
     elif args.command == 'show':
         generator.show_template(args.template)
     
     elif args.command == 'interactive':
         generator.interactive_generate()
-    
-    elif args.command == 'default':
-        create_default_config(args.output)
-        print(f"默认配置文件已生成: {args.output}")
-
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -5,13 +5,20 @@
 """
 
 import argparse
+import copy
+import functools
+import itertools
+import os
+import re
 import sys
 import shutil
 from pathlib import Path
 import json
 import cv2
 import numpy as np
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Any, FrozenSet, Iterator, Optional, Tuple
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -20,6 +27,362 @@ from core.template import TemplateManager, TemplateConfig
 from core.vision import VisionEngine
 from core.logger import setup_logger
 
+try:
+    import imagesize
+    HAS_IMAGESIZE = True
+except ImportError:
+    HAS_IMAGESIZE = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def _json_bytes(data: Any, indent: bool = False) -> bytes:
+    """将数据编码为UTF-8 JSON字节串，安装了orjson时使用其更快的编码器，indent为True时缩进2格"""
+    if HAS_ORJSON:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+# 支持的模板图像扩展名
+_VALID_EXTS: FrozenSet[str] = frozenset({'.png', '.jpg', '.jpeg', '.bmp'})
+
+# 分辨率目录名称格式，如 1920x1080
+_RES_RE = re.compile(r'\d+x\d+')
+
+# generate_report 缓存的报告数量上限
+_REPORT_CACHE_SIZE = 8
+
+
+@functools.lru_cache(maxsize=32)
+def _load_image_cached(image_path: str, mtime_ns: int, file_size: int,
+                       flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+    """
+    解码图像并缓存，mtime_ns/file_size 作为缓存键的一部分，文件变化时缓存自动失效
+    
+    返回的数组为只读，需要修改时请先复制。
+    
+    Args:
+        image_path: 图像文件路径
+        mtime_ns: 文件修改时间（纳秒）
+        file_size: 文件大小
+        flags: cv2.imread 读取标志
+    
+    Returns:
+        BGR图像数组，无法读取时返回None
+    """
+    image = cv2.imread(image_path, flags)
+    if image is not None:
+        image.setflags(write=False)
+    return image
+
+
+def _load_image(image_path: Path, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+    """读取图像（只读），同一未修改的文件只解码一次"""
+    try:
+        stat = image_path.stat()
+    except OSError:
+        return None
+    return _load_image_cached(str(image_path), stat.st_mtime_ns, stat.st_size, flags)
+
+
+def _header_size(image_path: Path) -> Optional[Tuple[int, int]]:
+    """
+    只读取文件头获取图像尺寸
+    
+    Returns:
+        (宽, 高)，未安装imagesize或无法识别格式时返回None
+    """
+    if not HAS_IMAGESIZE:
+        return None
+    try:
+        width, height = imagesize.get(str(image_path))
+    except Exception:
+        return None
+    if width > 0 and height > 0:
+        return width, height
+    return None
+
+
+# 优化后模板的保存参数：模板很小，PNG 用低压缩级别换取更快的保存速度
+_WRITE_PARAMS: Dict[str, List[int]] = {
+    '.png': [cv2.IMWRITE_PNG_COMPRESSION, 1],
+    '.jpg': [cv2.IMWRITE_JPEG_QUALITY, 92, cv2.IMWRITE_JPEG_OPTIMIZE, 1],
+    '.jpeg': [cv2.IMWRITE_JPEG_QUALITY, 92, cv2.IMWRITE_JPEG_OPTIMIZE, 1],
+}
+
+# (缩小倍数, 读取标志)，从大到小排列
+_REDUCED_READ_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def _reduced_read_flag(size: Optional[Tuple[int, int]], max_side: int) -> int:
+    """
+    选择解码时直接缩小的读取标志，缩小后最长边仍不小于 max_side
+    
+    Args:
+        size: 原图 (宽, 高)，未知时为None
+        max_side: 后续缩放的目标最长边
+    
+    Returns:
+        cv2.imread 读取标志
+    """
+    if size is not None:
+        longest = max(size)
+        for factor, flag in _REDUCED_READ_FLAGS:
+            if longest >= max_side * factor:
+                return flag
+    return cv2.IMREAD_COLOR
+
+
+def _probe_dimensions(template_file: Path) -> Optional[Tuple[int, ...]]:
+    """
+    获取图像尺寸
+    
+    优先用imagesize只读取文件头；未安装或无法识别格式时回退到cv2.imread完整解码。
+    
+    Args:
+        template_file: 模板文件路径
+    
+    Returns:
+        与cv2.imread(...).shape相同形式的 (高, 宽, 3)，无法读取时返回None
+    """
+    size = _header_size(template_file)
+    if size is not None:
+        # cv2.imread默认按3通道BGR读取
+        return (size[1], size[0], 3)
+    
+    image = _load_image(template_file)
+    if image is None:
+        return None
+    return image.shape
+
+
+def _scan_resolution_dirs(workflow_dir: Path) -> List[os.DirEntry]:
+    """
+    列出工作流下的分辨率目录（名称形如 1920x1080 的子目录）
+    
+    使用 os.scandir，DirEntry 自带文件类型信息，无需为每个条目额外 stat。
+    """
+    with os.scandir(workflow_dir) as entries:
+        return [entry for entry in entries if _RES_RE.fullmatch(entry.name) and entry.is_dir()]
+
+
+def _tree_mtime_ns(templates_dir: Path, workflow_name: Optional[str] = None) -> int:
+    """
+    模板目录、工作流目录、分辨率目录及其中文件的最新修改时间（纳秒）
+    
+    增删模板文件只改变其所在分辨率目录的mtime，原地覆盖只改变文件自身的mtime，
+    只看模板目录会漏掉这些变化。scandir 在 Windows 上随目录项返回 stat 信息，无需逐个文件调用。
+    
+    Args:
+        templates_dir: 模板根目录
+        workflow_name: 工作流名称，None表示所有工作流
+    """
+    newest = templates_dir.stat().st_mtime_ns
+    with os.scandir(templates_dir) as entries:
+        workflow_dirs = [entry for entry in entries
+                         if (workflow_name is None or entry.name == workflow_name) and entry.is_dir()]
+    for workflow_dir in workflow_dirs:
+        newest = max(newest, workflow_dir.stat().st_mtime_ns)
+        for resolution_dir in _scan_resolution_dirs(workflow_dir.path):
+            newest = max(newest, resolution_dir.stat().st_mtime_ns)
+            with os.scandir(resolution_dir.path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        newest = max(newest, entry.stat().st_mtime_ns)
+    return newest
+
+
+def _scan_template_files(resolution_dir: str) -> List[Tuple[str, str]]:
+    """
+    列出分辨率目录中的模板图像
+    
+    Returns:
+        (模板名称, 文件路径) 列表
+    """
+    templates = []
+    with os.scandir(resolution_dir) as entries:
+        for entry in entries:
+            stem, suffix = os.path.splitext(entry.name)
+            if suffix.lower() in _VALID_EXTS and entry.is_file():
+                templates.append((stem, entry.path))
+    return templates
+
+
+def _check_template_file(result: Dict[str, Any], template_file: Path) -> None:
+    """
+    检查模板文件格式、尺寸和大小，结果原地写入 result
+    
+    不支持的格式直接判定无效，不再读取图像。
+    
+    Args:
+        result: 验证结果
+        template_file: 模板文件路径
+    """
+    # 检查文件格式
+    if result['format'] not in _VALID_EXTS:
+        result['issues'].append(f'不支持的文件格式: {result["format"]}')
+        return
+    
+    # 读取图像尺寸，只需要文件头，不解码像素
+    dimensions = _probe_dimensions(template_file)
+    if dimensions is None:
+        result['issues'].append('无法读取图像文件')
+        return
+    
+    result['readable'] = True
+    result['dimensions'] = dimensions
+    
+    # 检查图像尺寸
+    height, width = dimensions[:2]
+    if width > 500 or height > 500:
+        result['issues'].append(f'图像尺寸过大: {width}x{height}，建议小于500x500')
+    
+    if width < 10 or height < 10:
+        result['issues'].append(f'图像尺寸过小: {width}x{height}，建议大于10x10')
+    
+    # 检查文件大小
+    file_size = result['file_size']
+    if file_size > 1024 * 1024:  # 1MB
+        result['issues'].append(f'文件大小过大: {file_size} bytes，建议小于1MB')
+    
+    # 如果没有问题，标记为有效
+    if not result['issues']:
+        result['valid'] = True
+
+
+@functools.lru_cache(maxsize=4096)
+def _validate_cached(template_path: str, mtime_ns: int, file_size: int) -> Tuple[Tuple[str, Any], ...]:
+    """
+    验证已存在的模板文件，mtime_ns/file_size 作为缓存键的一部分，文件变化时缓存自动失效
+    
+    Args:
+        template_path: 模板文件路径
+        mtime_ns: 文件修改时间（纳秒）
+        file_size: 文件大小
+    
+    Returns:
+        验证结果的 (键, 值) 元组，issues 为元组
+    """
+    template_file = Path(template_path)
+    result = {
+        'valid': False,
+        'path': template_path,
+        'exists': True,
+        'readable': False,
+        'dimensions': None,
+        'file_size': file_size,
+        'format': template_file.suffix.lower(),
+        'issues': []
+    }
+    
+    try:
+        _check_template_file(result, template_file)
+    except Exception as e:
+        result['issues'].append(f'验证过程中发生错误: {str(e)}')
+    
+    result['issues'] = tuple(result['issues'])
+    return tuple(result.items())
+
+
+def _validate_template(template_path: str) -> Dict[str, Any]:
+    """
+    验证模板文件，结果按 (路径, 修改时间, 文件大小) 缓存
+    
+    Args:
+        template_path: 模板文件路径
+    
+    Returns:
+        验证结果
+    """
+    try:
+        stat = Path(template_path).stat()
+    except OSError:
+        return {
+            'valid': False,
+            'path': template_path,
+            'exists': False,
+            'readable': False,
+            'dimensions': None,
+            'file_size': 0,
+            'format': None,
+            'issues': ['文件不存在']
+        }
+    
+    result = dict(_validate_cached(template_path, stat.st_mtime_ns, stat.st_size))
+    result['issues'] = list(result['issues'])
+    return result
+
+
+def _report_workflow(templates_dir: str, workflow: str) -> Optional[Tuple[Dict[str, Any], Dict[str, int]]]:
+    """
+    生成单个工作流的报告，为模块级函数以便在子进程中执行
+    
+    Args:
+        templates_dir: 模板根目录
+        workflow: 工作流名称
+    
+    Returns:
+        (工作流报告, 模板计数)，工作流目录不存在时返回None
+    """
+    workflow_report = {
+        'name': workflow,
+        'resolutions': {},
+        'templates': {},
+        'issues': []
+    }
+    counts = {'total_templates': 0, 'valid_templates': 0, 'invalid_templates': 0}
+    
+    workflow_dir = Path(templates_dir) / workflow
+    if not workflow_dir.exists():
+        return None
+    
+    # 检查配置文件
+    config_file = workflow_dir / "template_config.json"
+    if not config_file.exists():
+        workflow_report['issues'].append('缺少配置文件')
+    
+    # 扫描分辨率目录
+    for resolution_entry in _scan_resolution_dirs(workflow_dir):
+        resolution = resolution_entry.name
+        resolution_report = {
+            'name': resolution,
+            'template_count': 0,
+            'templates': []
+        }
+        
+        # 扫描模板文件
+        for template_name, template_path in _scan_template_files(resolution_entry.path):
+            validation_result = _validate_template(template_path)
+            
+            template_report = {
+                'name': template_name,
+                'path': template_path,
+                'valid': validation_result['valid'],
+                'issues': validation_result['issues']
+            }
+            
+            resolution_report['templates'].append(template_report)
+            resolution_report['template_count'] += 1
+            
+            if validation_result['valid']:
+                counts['valid_templates'] += 1
+            else:
+                counts['invalid_templates'] += 1
+            
+            counts['total_templates'] += 1
+        
+        workflow_report['resolutions'][resolution] = resolution_report
+    
+    return workflow_report, counts
+
 
 class TemplateManagerTool:
     """模板管理工具类"""
@@ -39,6 +402,17 @@ class TemplateManagerTool:
             "1600x900",
             "1024x768"
         ]
+        
+        # 工作流列表缓存: (模板目录mtime_ns, 工作流列表)
+        self._workflows_cache: Optional[Tuple[int, List[str]]] = None
+        
+        # 报告缓存: (目录树及模板文件最新mtime_ns, 工作流名称) -> 报告，按LRU淘汰
+        self._report_cache: 'OrderedDict[Tuple[int, Optional[str]], Dict[str, Any]]' = OrderedDict()
+    
+    def invalidate_cache(self) -> None:
+        """清除工作流列表和报告缓存"""
+        self._workflows_cache = None
+        self._report_cache.clear()
     
     def create_workflow(self, workflow_name: str, template_names: List[str], 
                        resolutions: Optional[List[str]] = None) -> bool:
@@ -53,6 +427,7 @@ class TemplateManagerTool:
         Returns:
             创建是否成功
         """
+        self.invalidate_cache()
         try:
             if resolutions is None:
                 resolutions = self.common_resolutions
@@ -83,17 +458,16 @@ class TemplateManagerTool:
     def _create_readme(self, readme_path: Path, workflow_name: str, 
                       resolution: str, template_names: List[str]) -> None:
         """创建说明文件"""
+        template_list = "".join(
+            f"- **{template_name}.png** - {template_name}的模板图片\n" for template_name in template_names
+        )
         content = f"""# {workflow_name} - {resolution}
 
 ## 模板文件说明
 
 请将以下模板图片放置在此目录中：
 
-"""
-        for template_name in template_names:
-            content += f"- **{template_name}.png** - {template_name}的模板图片\n"
-        
-        content += f"""
+{template_list}
 ## 注意事项
 
 1. 模板图片应该清晰、准确地表示要识别的界面元素
@@ -109,8 +483,7 @@ class TemplateManagerTool:
 4. 可以使用图像编辑软件进行裁剪和优化
 """
         
-        with open(readme_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        readme_path.write_text(content, encoding='utf-8')
     
     def _create_config_file(self, config_path: Path, workflow_name: str) -> None:
         """创建配置文件"""
@@ -124,20 +497,23 @@ class TemplateManagerTool:
             retry_interval=0.5
         )
         
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config.to_dict(), f, indent=2, ensure_ascii=False)
+        config_path.write_bytes(_json_bytes(config.to_dict(), indent=True))
     
     def list_workflows(self) -> List[str]:
-        """列出所有工作流"""
-        if not self.templates_dir.exists():
+        """列出所有工作流，模板目录未变化时复用上次的结果"""
+        try:
+            mtime_ns = self.templates_dir.stat().st_mtime_ns
+        except OSError:
             return []
         
-        workflows = []
-        for item in self.templates_dir.iterdir():
-            if item.is_dir():
-                workflows.append(item.name)
+        if self._workflows_cache is not None and self._workflows_cache[0] == mtime_ns:
+            return list(self._workflows_cache[1])
+        
+        with os.scandir(self.templates_dir) as entries:
+            workflows = sorted(entry.name for entry in entries if entry.is_dir())
         
-        return sorted(workflows)
+        self._workflows_cache = (mtime_ns, workflows)
+        return list(workflows)
     
     def list_templates(self, workflow_name: Optional[str] = None) -> Dict[str, List[str]]:
         """
@@ -161,11 +537,9 @@ class TemplateManagerTool:
             templates = set()
             
             # 扫描所有分辨率目录
-            for resolution_dir in workflow_dir.iterdir():
-                if resolution_dir.is_dir() and 'x' in resolution_dir.name:
-                    for template_file in resolution_dir.iterdir():
-                        if template_file.is_file() and template_file.suffix.lower() in ['.png', '.jpg', '.jpeg', '.bmp']:
-                            templates.add(template_file.stem)
+            for resolution_entry in _scan_resolution_dirs(workflow_dir):
+                for stem, _ in _scan_template_files(resolution_entry.path):
+                    templates.add(stem)
             
             result[workflow] = sorted(list(templates))
         
@@ -175,76 +549,31 @@ class TemplateManagerTool:
         """
         验证模板文件
         
+        结果按 (路径, 修改时间, 文件大小) 缓存，文件变化后自动重新验证。
+        
         Args:
             template_path: 模板文件路径
         
         Returns:
             验证结果
         """
-        result = {
-            'valid': False,
-            'path': template_path,
-            'exists': False,
-            'readable': False,
-            'dimensions': None,
-            'file_size': 0,
-            'format': None,
-            'issues': []
-        }
-        
-        try:
-            template_file = Path(template_path)
-            
-            # 检查文件是否存在
-            if not template_file.exists():
-                result['issues'].append('文件不存在')
-                return result
-            
-            result['exists'] = True
-            result['file_size'] = template_file.stat().st_size
-            result['format'] = template_file.suffix.lower()
-            
-            # 检查文件格式
-            if result['format'] not in ['.png', '.jpg', '.jpeg', '.bmp']:
-                result['issues'].append(f'不支持的文件格式: {result["format"]}')
-            
-            # 尝试读取图像
-            image = cv2.imread(str(template_file))
-            if image is None:
-                result['issues'].append('无法读取图像文件')
-                return result
-            
-            result['readable'] = True
-            result['dimensions'] = image.shape
-            
-            # 检查图像尺寸
-            height, width = image.shape[:2]
-            if width > 500 or height > 500:
-                result['issues'].append(f'图像尺寸过大: {width}x{height}，建议小于500x500')
-            
-            if width < 10 or height < 10:
-                result['issues'].append(f'图像尺寸过小: {width}x{height}，建议大于10x10')
-            
-            # 检查文件大小
-            if result['file_size'] > 1024 * 1024:  # 1MB
-                result['issues'].append(f'文件大小过大: {result["file_size"]} bytes，建议小于1MB')
-            
-            # 如果没有问题，标记为有效
-            if not result['issues']:
-                result['valid'] = True
-            
-        except Exception as e:
-            result['issues'].append(f'验证过程中发生错误: {str(e)}')
-        
-        return result
+        return _validate_template(template_path)
+    
+    def clear_cache(self) -> None:
+        """清除模板验证、图像解码和报告缓存"""
+        _validate_cached.cache_clear()
+        _load_image_cached.cache_clear()
+        self._report_cache.clear()
     
-    def optimize_template(self, template_path: str, output_path: Optional[str] = None) -> bool:
+    def optimize_template(self, template_path: str, output_path: Optional[str] = None,
+                          denoise: bool = False) -> bool:
         """
         优化模板文件
         
         Args:
             template_path: 输入模板路径
             output_path: 输出路径，None表示覆盖原文件
+            denoise: 是否在锐化前进行双边滤波降噪（开销最大的一步，默认关闭）
         
         Returns:
             优化是否成功
@@ -255,17 +584,19 @@ class TemplateManagerTool:
                 self.logger.error(f"模板文件不存在: {template_path}")
                 return False
             
-            # 读取图像
-            image = cv2.imread(str(template_file))
-            if image is None:
+            # 读取图像（只读缓存，后续处理均输出到新数组）
+            # 大图需要缩小时，让解码器直接输出缩小的图像，减少解码开销
+            size = _header_size(template_file)
+            optimized_image = _load_image(template_file, _reduced_read_flag(size, 300))
+            if optimized_image is None:
                 self.logger.error(f"无法读取图像: {template_path}")
                 return False
             
-            # 优化操作
-            optimized_image = image.copy()
-            
-            # 1. 调整尺寸（如果过大）
-            height, width = optimized_image.shape[:2]
+            # 1. 调整尺寸（如果过大），目标尺寸按原图计算
+            if size is not None:
+                width, height = size
+            else:
+                height, width = optimized_image.shape[:2]
             if width > 300 or height > 300:
                 scale = min(300 / width, 300 / height)
                 new_width = int(width * scale)
@@ -273,19 +604,24 @@ class TemplateManagerTool:
                 optimized_image = cv2.resize(optimized_image, (new_width, new_height), interpolation=cv2.INTER_AREA)
                 self.logger.info(f"图像尺寸调整: {width}x{height} -> {new_width}x{new_height}")
             
-            # 2. 降噪
-            optimized_image = cv2.bilateralFilter(optimized_image, 9, 75, 75)
+            # 2. 降噪（可选）
+            if denoise:
+                optimized_image = cv2.bilateralFilter(optimized_image, 5, 75, 75)
             
-            # 3. 锐化
-            kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-            optimized_image = cv2.filter2D(optimized_image, -1, kernel)
+            # 3. 锐化：反锐化掩模，结果直接写回模糊缓冲区
+            sharpened = cv2.GaussianBlur(optimized_image, (0, 0), 1.0)
+            cv2.addWeighted(optimized_image, 1.5, sharpened, -0.5, 0, dst=sharpened)
+            optimized_image = sharpened
             
             # 保存优化后的图像
             if output_path is None:
                 output_path = template_path
             
-            success = cv2.imwrite(str(output_path), optimized_image)
+            write_params = _WRITE_PARAMS.get(Path(output_path).suffix.lower(), [])
+            success = cv2.imwrite(str(output_path), optimized_image, write_params)
             if success:
+                # 覆盖已有文件不会改变模板目录的mtime，需主动丢弃缓存的报告
+                self._report_cache.clear()
                 self.logger.info(f"模板优化完成: {output_path}")
                 return True
             else:
@@ -296,6 +632,53 @@ class TemplateManagerTool:
             self.logger.error(f"优化模板失败: {e}")
             return False
     
+    def optimize_directory(self, workflow: str, resolution: str, denoise: bool = False,
+                           max_workers: Optional[int] = None) -> Dict[str, int]:
+        """
+        并行优化某个工作流分辨率目录下的所有模板
+        
+        OpenCV在读写、缩放和滤波时会释放GIL，因此用线程池即可并行处理；
+        批处理期间将OpenCV内部线程数设为1，避免与线程池争抢CPU。
+        
+        Args:
+            workflow: 工作流名称
+            resolution: 分辨率目录名称
+            denoise: 是否进行双边滤波降噪
+            max_workers: 最大线程数，None表示使用CPU核心数
+        
+        Returns:
+            统计结果 {'total': 总数, 'succeeded': 成功数, 'failed': 失败数}
+        """
+        stats = {'total': 0, 'succeeded': 0, 'failed': 0}
+        
+        template_dir = self.templates_dir / workflow / resolution
+        if not template_dir.exists():
+            self.logger.error(f"模板目录不存在: {template_dir}")
+            return stats
+        
+        template_files = [
+            str(template_file) for template_file in template_dir.iterdir()
+            if template_file.suffix.lower() in _VALID_EXTS and template_file.is_file()
+        ]
+        stats['total'] = len(template_files)
+        if not template_files:
+            return stats
+        
+        cv_threads = cv2.getNumThreads()
+        cv2.setNumThreads(1)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+                results = list(executor.map(
+                    lambda path: self.optimize_template(path, denoise=denoise), template_files
+                ))
+        finally:
+            cv2.setNumThreads(cv_threads)
+        
+        stats['succeeded'] = sum(results)
+        stats['failed'] = stats['total'] - stats['succeeded']
+        self.logger.info(f"批量优化完成: {workflow}/{resolution}，成功 {stats['succeeded']}，失败 {stats['failed']}")
+        return stats
+    
     def copy_template(self, source_workflow: str, target_workflow: str, 
                      source_resolution: str, target_resolution: str) -> bool:
         """
@@ -310,6 +693,7 @@ class TemplateManagerTool:
         Returns:
             复制是否成功
         """
+        self.invalidate_cache()
         try:
             source_dir = self.templates_dir / source_workflow / source_resolution
             target_dir = self.templates_dir / target_workflow / target_resolution
@@ -323,9 +707,10 @@ class TemplateManagerTool:
             # 复制所有模板文件
             copied_count = 0
             for template_file in source_dir.iterdir():
-                if template_file.is_file() and template_file.suffix.lower() in ['.png', '.jpg', '.jpeg', '.bmp']:
+                if template_file.suffix.lower() in _VALID_EXTS and template_file.is_file():
                     target_file = target_dir / template_file.name
-                    shutil.copy2(template_file, target_file)
+                    # 模板无需保留元数据，copyfile 可走系统的零拷贝快速路径
+                    shutil.copyfile(template_file, target_file)
                     copied_count += 1
             
             self.logger.info(f"复制完成: {copied_count} 个模板文件从 {source_workflow}/{source_resolution} 到 {target_workflow}/{target_resolution}")
@@ -394,86 +779,127 @@ class TemplateManagerTool:
         
         return result
     
-    def generate_report(self, workflow_name: Optional[str] = None) -> Dict[str, Any]:
+    def generate_report(self, workflow_name: Optional[str] = None, parallel: bool = False) -> Dict[str, Any]:
         """
         生成模板报告
         
         Args:
             workflow_name: 工作流名称，None表示所有工作流
+            parallel: 是否用多进程并行处理各工作流（工作流较多时使用）
         
         Returns:
-            报告数据
+            报告数据，模板目录树未变化时返回缓存报告的副本
         """
+        try:
+            key = (_tree_mtime_ns(self.templates_dir, workflow_name), workflow_name)
+        except OSError:
+            key = None
+        
+        if key is not None and key in self._report_cache:
+            self._report_cache.move_to_end(key)
+            return copy.deepcopy(self._report_cache[key])
+        
         report = {
             'timestamp': str(Path(__file__).stat().st_mtime),
             'workflows': {},
-            'summary': {
-                'total_workflows': 0,
-                'total_templates': 0,
-                'valid_templates': 0,
-                'invalid_templates': 0
-            }
+            'summary': self._new_summary()
         }
         
-        workflows = [workflow_name] if workflow_name else self.list_workflows()
+        for workflow, workflow_report in self._iter_workflow_reports(workflow_name, report['summary'], parallel):
+            report['workflows'][workflow] = workflow_report
         
-        for workflow in workflows:
-            workflow_report = {
-                'name': workflow,
-                'resolutions': {},
-                'templates': {},
-                'issues': []
-            }
+        if key is not None:
+            self._report_cache[key] = copy.deepcopy(report)
+            if len(self._report_cache) > _REPORT_CACHE_SIZE:
+                self._report_cache.popitem(last=False)
+        
+        return report
+    
+    def generate_report_streaming(self, output_path: str, workflow_name: Optional[str] = None,
+                                  parallel: bool = False) -> Optional[Dict[str, int]]:
+        """
+        生成模板报告并逐个工作流写入JSON文件，不在内存中保留完整报告
+        
+        文件内容与 generate_report 的返回值结构相同。
+        
+        Args:
+            output_path: 输出文件路径
+            workflow_name: 工作流名称，None表示所有工作流
+            parallel: 是否用多进程并行处理各工作流
+        
+        Returns:
+            汇总信息，失败时返回None
+        """
+        summary = self._new_summary()
+        try:
+            output_file = Path(output_path)
+            output_file.parent.mkdir(parents=True, exist_ok=True)
             
-            workflow_dir = self.templates_dir / workflow
-            if not workflow_dir.exists():
-                workflow_report['issues'].append('工作流目录不存在')
-                continue
+            with open(output_file, 'wb') as f:
+                f.write(b'{"timestamp":' + _json_bytes(str(Path(__file__).stat().st_mtime)) + b',"workflows":{')
+                separator = b''
+                for workflow, workflow_report in self._iter_workflow_reports(workflow_name, summary, parallel):
+                    f.write(separator + _json_bytes(workflow) + b':' + _json_bytes(workflow_report))
+                    separator = b','
+                f.write(b'},"summary":' + _json_bytes(summary) + b'}')
             
-            # 检查配置文件
-            config_file = workflow_dir / "template_config.json"
-            if not config_file.exists():
-                workflow_report['issues'].append('缺少配置文件')
-            
-            # 扫描分辨率目录
-            for resolution_dir in workflow_dir.iterdir():
-                if resolution_dir.is_dir() and 'x' in resolution_dir.name:
-                    resolution = resolution_dir.name
-                    resolution_report = {
-                        'name': resolution,
-                        'template_count': 0,
-                        'templates': []
-                    }
-                    
-                    # 扫描模板文件
-                    for template_file in resolution_dir.iterdir():
-                        if template_file.is_file() and template_file.suffix.lower() in ['.png', '.jpg', '.jpeg', '.bmp']:
-                            template_name = template_file.stem
-                            validation_result = self.validate_template(str(template_file))
-                            
-                            template_report = {
-                                'name': template_name,
-                                'path': str(template_file),
-                                'valid': validation_result['valid'],
-                                'issues': validation_result['issues']
-                            }
-                            
-                            resolution_report['templates'].append(template_report)
-                            resolution_report['template_count'] += 1
-                            
-                            if validation_result['valid']:
-                                report['summary']['valid_templates'] += 1
-                            else:
-                                report['summary']['invalid_templates'] += 1
-                            
-                            report['summary']['total_templates'] += 1
-                    
-                    workflow_report['resolutions'][resolution] = resolution_report
+            self.logger.info(f"模板报告已写入: {output_file}")
+            return summary
             
-            report['workflows'][workflow] = workflow_report
-            report['summary']['total_workflows'] += 1
+        except Exception as e:
+            self.logger.error(f"写入模板报告失败: {e}")
+            return None
+    
+    @staticmethod
+    def _new_summary() -> Dict[str, int]:
+        """创建空的报告汇总"""
+        return {
+            'total_workflows': 0,
+            'total_templates': 0,
+            'valid_templates': 0,
+            'invalid_templates': 0
+        }
+    
+    def _iter_workflow_reports(self, workflow_name: Optional[str], summary: Dict[str, int],
+                               parallel: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        逐个生成工作流报告，同时累加汇总信息
         
-        return report
+        Args:
+            workflow_name: 工作流名称，None表示所有工作流
+            summary: 汇总信息，原地更新
+            parallel: 是否用多进程并行处理各工作流
+        
+        Yields:
+            (工作流名称, 工作流报告)，顺序与工作流列表一致
+        """
+        workflows = [workflow_name] if workflow_name else self.list_workflows()
+        templates_dir = itertools.repeat(str(self.templates_dir))
+        
+        if parallel and len(workflows) > 1:
+            max_workers = min(8, os.cpu_count() or 1, len(workflows))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                yield from self._merge_workflow_reports(
+                    workflows, executor.map(_report_workflow, templates_dir, workflows), summary
+                )
+        else:
+            yield from self._merge_workflow_reports(
+                workflows, map(_report_workflow, templates_dir, workflows), summary
+            )
+    
+    @staticmethod
+    def _merge_workflow_reports(workflows: List[str], results: Iterator[Any],
+                                summary: Dict[str, int]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """将各工作流的计数累加到汇总信息中，跳过不存在的工作流"""
+        for workflow, result in zip(workflows, results):
+            if result is None:
+                continue
+            
+            workflow_report, counts = result
+            for key, value in counts.items():
+                summary[key] += value
+            summary['total_workflows'] += 1
+            yield workflow, workflow_report
     
     def print_report(self, report: Dict[str, Any]) -> None:
         """打印报告"""
@@ -533,6 +959,14 @@ def main():
     optimize_parser = subparsers.add_parser('optimize', help='优化模板文件')
     optimize_parser.add_argument('template', help='模板文件路径')
     optimize_parser.add_argument('--output', '-o', help='输出路径')
+    optimize_parser.add_argument('--denoise', action='store_true', help='锐化前进行双边滤波降噪')
+    
+    # 批量优化模板命令
+    optimize_dir_parser = subparsers.add_parser('optimize-dir', help='并行优化目录下的所有模板')
+    optimize_dir_parser.add_argument('workflow', help='工作流名称')
+    optimize_dir_parser.add_argument('resolution', help='分辨率')
+    optimize_dir_parser.add_argument('--denoise', action='store_true', help='锐化前进行双边滤波降噪')
+    optimize_dir_parser.add_argument('--workers', type=int, help='线程数，默认为CPU核心数')
     
     # 复制模板命令
     copy_parser = subparsers.add_parser('copy', help='复制模板文件')
@@ -549,6 +983,8 @@ def main():
     # 生成报告命令
     report_parser = subparsers.add_parser('report', help='生成模板报告')
     report_parser.add_argument('--workflow', '-w', help='指定工作流')
+    report_parser.add_argument('--output', '-o', help='将JSON报告流式写入文件，不打印详细信息')
+    report_parser.add_argument('--parallel', action='store_true', help='多进程并行处理各工作流')
     
     args = parser.parse_args()
     
@@ -591,9 +1027,14 @@ def main():
                 print(f"  - {issue}")
     
     elif args.command == 'optimize':
-        success = tool.optimize_template(args.template, args.output)
+        success = tool.optimize_template(args.template, args.output, args.denoise)
         sys.exit(0 if success else 1)
     
+    elif args.command == 'optimize-dir':
+        stats = tool.optimize_directory(args.workflow, args.resolution, args.denoise, args.workers)
+        print(f"共 {stats['total']} 个模板，成功 {stats['succeeded']}，失败 {stats['failed']}")
+        sys.exit(0 if stats['failed'] == 0 else 1)
+    
     elif args.command == 'copy':
         success = tool.copy_template(
             args.source_workflow, args.target_workflow,
@@ -612,8 +1053,14 @@ def main():
             print(f"测试失败: {result['error']}")
     
     elif args.command == 'report':
-        report = tool.generate_report(args.workflow)
-        tool.print_report(report)
+        if args.output:
+            summary = tool.generate_report_streaming(args.output, args.workflow, args.parallel)
+            if summary is None:
+                sys.exit(1)
+            tool.print_report({'summary': summary, 'workflows': {}})
+        else:
+            report = tool.generate_report(args.workflow, args.parallel)
+            tool.print_report(report)
 
 
 if __name__ == '__main__':
@@ -3,91 +3,21 @@
 演示如何使用RPA框架的基本功能
 """
 
+import time
+
 from core.workflow import BaseWorkflow, WorkflowStep
+from core.steps import WaitForTemplateStep, ClickTemplateStep
 from core.vision import VisionEngine
 from core.mouse import MouseController
 from core.window import WindowManager
 from core.template import TemplateManager
 
 
-class WaitForTemplateStep(WorkflowStep):
-    """等待模板出现步骤"""
-    
-    def __init__(self, name: str, config: dict):
-        super().__init__(name, config)
-        self.template_name = config.get('template_name')
-        self.timeout = config.get('timeout', 10.0)
-        self.region = config.get('region')
-    
-    def execute(self, context: dict) -> bool:
-        """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager):
-            return False
-        
-        # 获取模板
-        template_item = template_manager.get_template(self.template_name)
-        if not template_item:
-            return False
-        
-        # 等待模板出现
-        result = vision_engine.wait_for_template(
-            template_item.path,
-            timeout=self.timeout,
-            region=self.region
-        )
-        
-        if result:
-            context['last_match'] = result
-            return True
-        
-        return False
-
-
-class ClickTemplateStep(WorkflowStep):
-    """点击模板步骤"""
-    
-    def __init__(self, name: str, config: dict):
-        super().__init__(name, config)
-        self.template_name = config.get('template_name')
-        self.use_last_match = config.get('use_last_match', False)
-    
-    def execute(self, context: dict) -> bool:
-        """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        mouse_controller = context.get('mouse_controller')
-        
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager) or not isinstance(mouse_controller, MouseController):
-            return False
-        
-        # 如果使用上次匹配结果
-        if self.use_last_match and 'last_match' in context:
-            match_result = context['last_match']
-        else:
-            # 获取模板
-            template_item = template_manager.get_template(self.template_name)
-            if not template_item:
-                return False
-            
-            # 查找模板
-            match_result = vision_engine.find_on_screen(template_item.path)
-            if not match_result:
-                return False
-        
-        # 点击模板中心
-        success = mouse_controller.click_match_result(match_result)
-        if success:
-            context['last_click'] = match_result.center
-        
-        return success
-
-
 class WaitForWindowStep(WorkflowStep):
     """等待窗口出现步骤"""
     
+    required_components = {'window_manager': WindowManager}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.window_title = config.get('window_title')
@@ -97,10 +27,7 @@ class WaitForWindowStep(WorkflowStep):
     
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        window_manager = context.get('window_manager')
-        
-        if not isinstance(window_manager, WindowManager):
-            return False
+        window_manager = self._window_manager
         
         windows = window_manager.get_all_windows()
         print(windows)
@@ -123,16 +50,15 @@ class WaitForWindowStep(WorkflowStep):
 class ActivateWindowStep(WorkflowStep):
     """激活窗口步骤"""
     
+    required_components = {'window_manager': WindowManager}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.use_current_window = config.get('use_current_window', True)
     
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        window_manager = context.get('window_manager')
-        
-        if not isinstance(window_manager, WindowManager):
-            return False
+        window_manager = self._window_manager
         
         # 获取要激活的窗口
         if self.use_current_window and 'current_window' in context:
@@ -141,20 +67,38 @@ class ActivateWindowStep(WorkflowStep):
             return False
         
         # 激活窗口
-        return window_manager.activate_window(window_info)
+        success = window_manager.activate_window(window_info)
+        if success:
+            # 后续模板查找只截取窗口区域
+            context['window_rect'] = window_manager.get_window_rect(window_info)
+        
+        return success
 
 
 class DelayStep(WorkflowStep):
     """延迟步骤"""
     
+    # 睡眠函数，子类或测试可替换
+    _sleep = staticmethod(time.sleep)
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.delay = config.get('delay', 1.0)
     
+    def bind(self, context: dict) -> None:
+        """绑定上下文，并生成捕获了延迟时间的专用 execute"""
+        super().bind(context)
+        sleep, delay = self._sleep, self.delay
+        
+        def execute(context: dict) -> bool:
+            sleep(delay)
+            return True
+        
+        self.execute = execute
+    
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        import time
-        time.sleep(self.delay)
+        self._sleep(self.delay)
         return True
 
 
@@ -250,16 +194,26 @@ class SimpleClickWorkflow(BaseWorkflow):
 class SimpleClickStep(WorkflowStep):
     """简单点击步骤"""
     
+    required_components = {'mouse_controller': MouseController}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.x = config.get('x', 0)
         self.y = config.get('y', 0)
     
-    def execute(self, context: dict) -> bool:
-        """执行步骤"""
-        mouse_controller = context.get('mouse_controller')
+    def bind(self, context: dict) -> None:
+        """绑定上下文，并生成直接调用鼠标控制器的专用 execute"""
+        super().bind(context)
         
+        mouse_controller = self._mouse_controller
         if not isinstance(mouse_controller, MouseController):
-            return False
+            # 恢复通用实现，缺少组件由 check_components 报告
+            self.__dict__.pop('execute', None)
+            return
         
-        return mouse_controller.click(self.x, self.y)
\ No newline at end of file
+        click, x, y = mouse_controller.click, self.x, self.y
+        self.execute = lambda context: click(x, y)
+    
+    def execute(self, context: dict) -> bool:
+        """执行步骤"""
+        return self._mouse_controller.click(self.x, self.y)
\ No newline at end of file
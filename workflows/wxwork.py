@@ -2,9 +2,13 @@
 企业微信 肥龙工作流
 """
 
+import threading
 import time
+from operator import attrgetter
 from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 from core.workflow import BaseWorkflow, WorkflowStep, LoopStartStep, LoopEndStep, ConditionalJumpStep
+from core.steps import WaitForTemplateStep, ClickTemplateStep
 from core.vision import VisionEngine
 from core.mouse import MouseController, MouseButton
 from core.window import WindowManager
@@ -12,9 +16,79 @@ from core.template import TemplateManager
 from core.config import Config
 from core.utils import interruptible_sleep, interruptible_sleep_event, WXWorkCacheCleaner
 
+# 企业微信策略配置，工作流每次启动时读取
+_STRATEGY_CONFIG_PATH = Path("config/wxwork_strategy.yaml")
+# 上次读取的策略配置，键为 (修改时间, 文件大小)
+_strategy_config_cache: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
+
+
+def _load_strategy_config() -> Dict[str, Any]:
+    """
+    读取企业微信策略配置，文件未修改时复用上次的结果，修改后下次启动时生效
+    
+    Returns:
+        策略配置，文件不存在时返回空字典
+    """
+    global _strategy_config_cache
+    try:
+        stat = _STRATEGY_CONFIG_PATH.stat()
+    except OSError:
+        return {}
+    
+    key = (stat.st_mtime_ns, stat.st_size)
+    if _strategy_config_cache is None or _strategy_config_cache[0] != key:
+        _strategy_config_cache = (key, Config(_STRATEGY_CONFIG_PATH).get_all())
+    return _strategy_config_cache[1].copy()
+
+
+# 后台读取用户输入的线程，跨多次运行复用：停止后仍在等待回车的读取由下次运行沿用，
+# 不会再启动一个线程与它争抢同一次回车
+_input_lock = threading.Lock()
+_input_reader: Optional[threading.Thread] = None
+_input_answered = threading.Event()
+
+
+def _wait_input_async(prompt: str) -> threading.Event:
+    """
+    在后台线程等待用户回车，上次的读取仍在等待时沿用它
+    
+    Args:
+        prompt: 提示信息
+    
+    Returns:
+        用户回车后被设置的事件
+    """
+    global _input_reader
+    with _input_lock:
+        if _input_reader is not None and _input_reader.is_alive():
+            # 上次的提示已被其他输出冲掉，重新显示一次
+            print(prompt, end='', flush=True)
+            return _input_answered
+        
+        _input_answered.clear()
+        
+        def read_input() -> None:
+            try:
+                input(prompt)
+            except EOFError:
+                pass
+            _input_answered.set()
+        
+        _input_reader = threading.Thread(target=read_input, daemon=True)
+        _input_reader.start()
+        return _input_answered
+
+
+# 上次找到的企业微信窗口句柄。每次运行都会新建工作流和步骤，保存在模块级才能在下次运行时
+# 先校验该窗口，不必枚举所有窗口
+_last_wxwork_hwnd: Optional[int] = None
+
+
 class WaitForWxWorkWindowStep(WorkflowStep):
     """等待企业微信窗口出现"""
 
+    required_components = {'window_manager': WindowManager}
+
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.window_title = config.get('window_title')
@@ -24,20 +98,20 @@ class WaitForWxWorkWindowStep(WorkflowStep):
 
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        window_manager = context.get('window_manager')
+        global _last_wxwork_hwnd
+        window_manager = self._window_manager
         
-        if not isinstance(window_manager, WindowManager):
-            return False
-        
-        # 等待窗口出现
-        window_info = window_manager.wait_for_window(
+        # 等待窗口出现，由窗口事件唤醒而不是轮询
+        window_info = window_manager.wait_for_window_event(
             title=self.window_title,
             class_name=self.window_class,
             process_name=self.process_name,
-            timeout=self.timeout
+            timeout=self.timeout,
+            hwnd_hint=_last_wxwork_hwnd
         )
         
         if window_info:
+            _last_wxwork_hwnd = window_info.hwnd
             context['current_window'] = window_info
             return True
         
@@ -46,6 +120,8 @@ class WaitForWxWorkWindowStep(WorkflowStep):
 class ActivateWindowStep(WorkflowStep):
     """激活窗口步骤"""
     
+    required_components = {'window_manager': WindowManager}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.use_current_window = config.get('use_current_window', True)
@@ -60,10 +136,7 @@ class ActivateWindowStep(WorkflowStep):
     
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        window_manager = context.get('window_manager')
-        
-        if not isinstance(window_manager, WindowManager):
-            return False
+        window_manager = self._window_manager
         
         # 获取要激活的窗口
         if self.use_current_window and 'current_window' in context:
@@ -95,6 +168,9 @@ class ActivateWindowStep(WorkflowStep):
             else:
                 self.logger.warning(f"窗口大小调整失败，但继续执行")
         
+        # 后续模板查找只截取窗口区域
+        context['window_rect'] = window_manager.get_window_rect(window_info)
+        
         return True
     
 class WaitUserOperationStep(WorkflowStep):
@@ -106,85 +182,25 @@ class WaitUserOperationStep(WorkflowStep):
 
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        input("请把转发窗口按出来，如果准备好了，接下来就可以点击y了：")
-        return True
-        
-class WaitForTemplateStep(WorkflowStep):
-    """等待模板出现步骤"""
-    
-    def __init__(self, name: str, config: dict):
-        super().__init__(name, config)
-        self.template_name = config.get('template_name')
-        self.timeout = config.get('timeout', 10.0)
-        self.region = config.get('region')
-    
-    def execute(self, context: dict) -> bool:
-        """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager):
-            return False
-        
-        # 获取模板
-        template_item = template_manager.get_template(self.template_name)
-        if not template_item:
-            return False
-        
-        # 等待模板出现
-        result = vision_engine.wait_for_template(
-            template_item.path,
-            timeout=self.timeout,
-            region=self.region
-        )
-        
-        if result:
-            context['last_match'] = result
+        prompt = "请把转发窗口按出来，如果准备好了，接下来就可以点击y了："
+        stop_event = context.get('_stop_event')
+        if stop_event is None:
+            input(prompt)
             return True
         
-        return False
-
-class ClickTemplateStep(WorkflowStep):
-    """点击模板步骤"""
-    
-    def __init__(self, name: str, config: dict):
-        super().__init__(name, config)
-        self.template_name = config.get('template_name')
-        self.use_last_match = config.get('use_last_match', False)
-    
-    def execute(self, context: dict) -> bool:
-        """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        mouse_controller = context.get('mouse_controller')
-        
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager) or not isinstance(mouse_controller, MouseController):
-            return False
-        
-        # 如果使用上次匹配结果
-        if self.use_last_match and 'last_match' in context:
-            match_result = context['last_match']
-        else:
-            # 获取模板
-            template_item = template_manager.get_template(self.template_name)
-            if not template_item:
-                return False
-            
-            # 查找模板
-            match_result = vision_engine.find_on_screen(template_item.path)
-            if not match_result:
+        # 在后台线程等待用户输入，工作流线程同时响应停止事件，停止时不必等用户回车
+        answered = _wait_input_async(prompt)
+        while not answered.wait(timeout=0.1):
+            if stop_event.is_set():
                 return False
         
-        # 点击模板中心
-        success = mouse_controller.click_match_result(match_result)
-        if success:
-            context['last_click'] = match_result.center
+        return True
         
-        return success
-    
 class ClickMultiTemplateStep(WorkflowStep):
     """跳开第一个多选框，从第二个开始点选指定数量的多选框"""
     
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager, 'mouse_controller': MouseController}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         # 支持单个模板名称或多个模板名称列表
@@ -197,24 +213,28 @@ class ClickMultiTemplateStep(WorkflowStep):
         self.max_clicks = config.get('max_clicks', 9)  # 最大点击数量
         self.click_delay = config.get('click_delay', 0.1)  # 点击间隔
         self.min_matches = config.get('min_matches', 10)  # 最少匹配数量
+        self.pyramid_levels = config.get('pyramid_levels', 2)  # 金字塔查找层数，1表示原始分辨率全图匹配
+        self.nms_iou = config.get('nms_iou', 0.3)  # 重叠匹配去重的交并比阈值，None表示不去重
+        self.region = config.get('region')  # 搜索区域 (x, y, width, height)，默认为企业微信窗口区域
+        self.merge_templates = config.get('merge_templates', False)  # 合并所有模板的匹配结果，而不是取第一个有匹配的模板
 
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        mouse_controller = context.get('mouse_controller')
-
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager) or not isinstance(mouse_controller, MouseController):
-            return False
-
-        # 尝试每个模板，直到找到匹配结果
-        match_results = []
-        for template_name in self.template_names:
-            template_item = template_manager.get_template(template_name)
-            if template_item:
-                match_results = vision_engine.find_all_on_screen(template_item.path)
-                if match_results:
-                    break
+        vision_engine = self._vision_engine
+        mouse_controller = self._mouse_controller
+
+        # 在同一帧截图上尝试每个模板，直到找到匹配结果（或合并所有模板的结果）；只在窗口区域内查找
+        template_items = [self._get_template(template_name) for template_name in self.template_names]
+        match_results = vision_engine.find_all_any_on_screen(
+            [item for item in template_items if item],
+            region=self.region or context.get('window_rect'),
+            pyramid_levels=self.pyramid_levels,
+            merge=self.merge_templates
+        )
+        
+        # 同一个多选框附近的多个位置只保留一个，避免重复点击把选中又取消
+        if self.nms_iou is not None:
+            match_results = vision_engine.nms(match_results, self.nms_iou)
         
         if not match_results:
             return False
@@ -224,7 +244,7 @@ class ClickMultiTemplateStep(WorkflowStep):
             return False
 
         # 排序，按照y坐标排序，y坐标最大的排在最前面，y坐标最小的排在最后面
-        match_results.sort(key=lambda x: x.y)
+        match_results.sort(key=attrgetter('y'))
 
         # 确定要点击的结果
         if self.skip_first:
@@ -236,38 +256,41 @@ class ClickMultiTemplateStep(WorkflowStep):
         if self.max_clicks > 0:
             targets = targets[:self.max_clicks]
 
-        # 点击所有目标
-        clicked_count = 0
-        for i, match_result in enumerate(targets):
-            success = mouse_controller.click_match_result(match_result)
-            if success:
-                clicked_count += 1
-                if self.click_delay > 0:
-                    stop_event = context.get('_stop_event')
-                    if not interruptible_sleep_event(self.click_delay, stop_event):
-                        return False
-            else:
-                pass
+        # 点击所有目标，按开始时间排定每次点击，间隔误差不累积；
+        # click_delay 为0时使用鼠标控制器的点击延迟，不会把所有点击无间隔地一次注入。
+        # 任一次点击失败或被停止即返回False，不再以"至少点中一个"为成功
+        if not targets:
+            return False
 
-        return clicked_count > 0
+        return mouse_controller.click_many([match_result.center for match_result in targets],
+                                           self.click_delay or None, context.get('_stop_event'))
 
 class ClickSpecialTemplateStep(WorkflowStep):
     """特殊点击多选框序列"""
     
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager, 'mouse_controller': MouseController}
+    
+    # 特殊手法：左键按下、右键按下、右键抬起、左键抬起
+    special_press = [(MouseButton.LEFT, True), (MouseButton.RIGHT, True),
+                     (MouseButton.RIGHT, False), (MouseButton.LEFT, False)]
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.template_name = config.get('template_name')
+        self.pyramid_levels = config.get('pyramid_levels', 2)  # 金字塔查找层数，1表示原始分辨率全图匹配
+        self.nms_iou = config.get('nms_iou', 0.3)  # 重叠匹配去重的交并比阈值，None表示不去重
+        # 点击后直接复用第一次查找的结果，不再重新匹配；模板只匹配某一种选中状态时不能开启
+        self.reuse_matches = config.get('reuse_matches', False)
+        # 特殊手法中相邻鼠标事件的间隔；目标程序不漏事件时可调小，0表示同一目标的事件连续注入
+        self.press_interval = config.get('press_interval', 0.05)
+        self.region = config.get('region')  # 搜索区域 (x, y, width, height)，默认为企业微信窗口区域
         
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        mouse_controller = context.get('mouse_controller')
+        vision_engine = self._vision_engine
+        mouse_controller = self._mouse_controller
         stop_event = context.get('_stop_event')
-        
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager) or \
-            not isinstance(mouse_controller, MouseController):
-            return False
+        region = self.region or context.get('window_rect')
         
         # 往下滚动鼠标
         # mouse_controller.scroll(clicks=1, direction='down', strategy='multiple')
@@ -284,12 +307,17 @@ class ClickSpecialTemplateStep(WorkflowStep):
         time.sleep(0.5)
 
         # 获取模板
-        template_item = template_manager.get_template(self.template_name)
+        template_item = self._get_template(self.template_name)
         if not template_item:
             return False
         
         # 查找模板匹配到的所有结果
-        match_results = vision_engine.find_all_on_screen(template_item.path)
+        match_results = vision_engine.find_all_template_on_screen(
+            template_item, region, pyramid_levels=self.pyramid_levels
+        )
+        # 同一个多选框附近的多个位置只保留一个，避免重复点击把选中又取消
+        if self.nms_iou is not None:
+            match_results = vision_engine.nms(match_results, self.nms_iou)
         if not match_results:
             return False
         
@@ -297,21 +325,15 @@ class ClickSpecialTemplateStep(WorkflowStep):
         if len(match_results) < 3:
             return False
 
-        match_results.sort(key=lambda x: x.y)
+        match_results.sort(key=attrgetter('y'))
 
         # step1: 特殊手法点击一遍
         for match_result in match_results[:3]:
-            mouse_controller.mouse_down(match_result.center[0], match_result.center[1], button=MouseButton.LEFT)
-            if not interruptible_sleep_event(0.05, stop_event):
-                return False
-            mouse_controller.mouse_down(match_result.center[0], match_result.center[1], button=MouseButton.RIGHT)
-            if not interruptible_sleep_event(0.05, stop_event):
-                return False
-            mouse_controller.mouse_up(match_result.center[0], match_result.center[1], button=MouseButton.RIGHT)
-            if not interruptible_sleep_event(0.05, stop_event):
+            center_x, center_y = match_result.center
+            if not mouse_controller.press_sequence(center_x, center_y, self.special_press,
+                                                   self.press_interval, stop_event):
                 return False
-            mouse_controller.mouse_up(match_result.center[0], match_result.center[1], button=MouseButton.LEFT)
-            if not interruptible_sleep_event(0.05, stop_event):
+            if not interruptible_sleep_event(self.press_interval, stop_event):
                 return False
 
         # step2: 取消选中他们再选中他们
@@ -321,17 +343,30 @@ class ClickSpecialTemplateStep(WorkflowStep):
             mouse_controller.click_match_result(match_result)
             mouse_controller.click_match_result(match_result)
 
-        # 重新找模板
-        match_results = vision_engine.find_all_on_screen(template_item.path)
-        if not match_results:
-            return False
+        # 重新找模板，没有滚动，多选框位置不变，只在上次结果的外接矩形附近查找
+        if not self.reuse_matches:
+            margin = max(match_results[0].width, match_results[0].height)
+            left = max(min(m.x for m in match_results) - margin, 0)
+            top = max(min(m.y for m in match_results) - margin, 0)
+            right = max(m.x + m.width for m in match_results) + margin
+            bottom = max(m.y + m.height for m in match_results) + margin
+            if region:
+                right = min(right, region[0] + region[2])
+                bottom = min(bottom, region[1] + region[3])
+            match_results = vision_engine.find_all_template_on_screen(
+                template_item, (left, top, right - left, bottom - top), pyramid_levels=self.pyramid_levels
+            )
+            if self.nms_iou is not None:
+                match_results = vision_engine.nms(match_results, self.nms_iou)
+            if not match_results:
+                return False
 
-        # 排序，按照y坐标排序，y坐标最大的排在最前面，y坐标最小的排在最后面
-        match_results.sort(key=lambda x: x.y)
+            # 排序，按照y坐标排序，y坐标最大的排在最前面，y坐标最小的排在最后面
+            match_results.sort(key=attrgetter('y'))
 
-        # 点击所有目标
-        for match_result in match_results:
-            mouse_controller.click_match_result(match_result)
+        # 点击所有目标，按 click_delay 间隔注入
+        mouse_controller.click_many([match_result.center for match_result in match_results],
+                                    stop_event=stop_event)
 
         # 往下滚动鼠标
         # mouse_controller.win32scroll(-120)
@@ -343,8 +378,7 @@ class ClickSpecialTemplateStep(WorkflowStep):
         # center_x += 50
         # # 1) 获取进程窗口的底部y坐标
         # click_y = context['current_window'].rect[3] - 10
-        # mouse_controller.click(center_x, click_y, clicks=500, interval=0.05)
-        # mouse_controller.click(center_x, click_y, clicks=500, interval=0.05)
+        # mouse_controller.click_burst(center_x, click_y, clicks=1000, interval=0.05, stop_event=stop_event)
 
         return True
 
@@ -357,6 +391,8 @@ class DelayStep(WorkflowStep):
         self.condition_key = config.get('condition_key')  # 检查上下文中的键
         self.condition_value = config.get('condition_value')  # 期望的值
         self.condition_type = config.get('condition_type', 'equals')  # equals, not_equals, exists, not_exists
+        self.prefetch_lead = config.get('prefetch_lead', 0)  # 延迟结束前多少秒预取截图，0表示不预取
+        self.prefetch_ttl = config.get('prefetch_ttl', 0.3)  # 延迟结束后预取截图的有效期
     
     def execute(self, context: dict) -> bool:
         """执行步骤"""
@@ -366,42 +402,54 @@ class DelayStep(WorkflowStep):
                 if self.condition_type == 'equals':
                     if context[self.condition_key] == self.condition_value:
                         return True
-        return interruptible_sleep_event(self.delay, stop_event)
+        
+        lead = min(self.prefetch_lead, self.delay)
+        if lead <= 0 or self._vision_engine is None:
+            return interruptible_sleep_event(self.delay, stop_event)
+        
+        # 在等待的最后阶段预取截图，下一步的首次查找直接使用
+        if not interruptible_sleep_event(self.delay - lead, stop_event):
+            return False
+        start = time.perf_counter()
+        self._vision_engine.prefetch_screenshot(lead + self.prefetch_ttl)
+        return interruptible_sleep_event(lead - (time.perf_counter() - start), stop_event)
 
 class CalculateChatBoxRectStep(WorkflowStep):
     """计算聊天框矩形区域"""
     
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.chatbox_bigadd_template = config.get('chatbox_bigadd_template')
         self.chatbox_rightbottom_template = config.get('chatbox_rightbottom_template')
+        self.region = config.get('region')  # 搜索区域 (x, y, width, height)，默认为企业微信窗口区域
 
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager):
-            return False
+        vision_engine = self._vision_engine
 
         # 获取模板
-        chatbox_bigadd_template = template_manager.get_template(self.chatbox_bigadd_template)
+        chatbox_bigadd_template = self._get_template(self.chatbox_bigadd_template)
         if not chatbox_bigadd_template:
             return False
         # 查找聊天框右下角
-        chatbox_rightbottom_template = template_manager.get_template(self.chatbox_rightbottom_template)
+        chatbox_rightbottom_template = self._get_template(self.chatbox_rightbottom_template)
         if not chatbox_rightbottom_template:
             return False
         
-        # 查找聊天框大加号
-        chatbox_bigadd_match = vision_engine.find_on_screen(chatbox_bigadd_template.path)
-        if not chatbox_bigadd_match:
-            return False
+        # 两次查找之间屏幕不变，共用一帧截图
+        region = self.region or context.get('window_rect')
+        with vision_engine.shared_screenshot():
+            # 查找聊天框大加号
+            chatbox_bigadd_match = vision_engine.find_template_on_screen(chatbox_bigadd_template, region)
+            if not chatbox_bigadd_match:
+                return False
 
-        # 查找聊天框右下角
-        chatbox_rightbottom_match = vision_engine.find_on_screen(chatbox_rightbottom_template.path)
-        if not chatbox_rightbottom_match:
-            return False
+            # 查找聊天框右下角
+            chatbox_rightbottom_match = vision_engine.find_template_on_screen(chatbox_rightbottom_template, region)
+            if not chatbox_rightbottom_match:
+                return False
 
         # 计算聊天框矩形区域
         chatbox_rect = (
@@ -432,6 +480,8 @@ class CalculateChatBoxRectStep(WorkflowStep):
 class MoveToChatBoxAndScrollStep(WorkflowStep):
     """移动到聊天框中心点并向上滚动"""
     
+    required_components = {'mouse_controller': MouseController}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.scroll_count = config.get('scroll_count', 3)  # 默认滚动3次
@@ -439,10 +489,7 @@ class MoveToChatBoxAndScrollStep(WorkflowStep):
     
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        mouse_controller = context.get('mouse_controller')
-        
-        if not isinstance(mouse_controller, MouseController):
-            return False
+        mouse_controller = self._mouse_controller
         
         # 获取聊天框矩形区域
         chatbox_rect = context.get('chatbox_rect')
@@ -467,6 +514,8 @@ class MoveToChatBoxAndScrollStep(WorkflowStep):
 class WaitForMessageStep(WorkflowStep):
     """等待消息出现"""
     
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.message_templates = config.get('message_templates', [
@@ -478,25 +527,18 @@ class WaitForMessageStep(WorkflowStep):
 
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        mouse_controller = context.get('mouse_controller')
+        vision_engine = self._vision_engine
 
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager) or not isinstance(mouse_controller, MouseController):
-            return False
-        
-        # 获取聊天框矩形区域
-        chatbox_rect = context['chatbox_rect']
+        # 获取聊天框矩形区域 (left, top, right, bottom)，转换为截图区域
+        left, top, right, bottom = context['chatbox_rect']
+        region = (left, top, right - left, bottom - top)
 
-        # 查找微信消息
-        message_found = None
-        for template_name in self.message_templates:
-            template_item = template_manager.get_template(template_name)
-            if template_item:
-                match_result = vision_engine.wait_for_template(template_item.path, timeout=self.timeout, region=chatbox_rect)
-                if match_result:
-                    message_found = match_result
-                    break
+        # 查找微信消息，每次检查只截图一次，所有消息模板在同一帧上匹配
+        template_items = [self._get_template(template_name) for template_name in self.message_templates]
+        found = vision_engine.wait_for_any_template(
+            [item for item in template_items if item], timeout=self.timeout, region=region
+        )
+        message_found = found[1] if found else None
         
         if not message_found:
             return False
@@ -509,6 +551,8 @@ class WaitForMessageStep(WorkflowStep):
 class WaitForMessageWithTimeoutStep(WorkflowStep):
     """等待消息出现（支持超时标记）"""
     
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.message_templates = config.get('message_templates', [
@@ -520,25 +564,18 @@ class WaitForMessageWithTimeoutStep(WorkflowStep):
 
     def execute(self, context: dict) -> bool:
         """执行步骤 - 超时时不返回False，而是设置标记"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        mouse_controller = context.get('mouse_controller')
+        vision_engine = self._vision_engine
 
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager) or not isinstance(mouse_controller, MouseController):
-            return False
-        
-        # 获取聊天框矩形区域
-        chatbox_rect = context['chatbox_rect']
+        # 获取聊天框矩形区域 (left, top, right, bottom)，转换为截图区域
+        left, top, right, bottom = context['chatbox_rect']
+        region = (left, top, right - left, bottom - top)
 
-        # 查找微信消息
-        message_found = None
-        for template_name in self.message_templates:
-            template_item = template_manager.get_template(template_name)
-            if template_item:
-                match_result = vision_engine.wait_for_template(template_item.path, timeout=self.timeout, region=chatbox_rect)
-                if match_result:
-                    message_found = match_result
-                    break
+        # 查找微信消息，每次检查只截图一次，所有消息模板在同一帧上匹配
+        template_items = [self._get_template(template_name) for template_name in self.message_templates]
+        found = vision_engine.wait_for_any_template(
+            [item for item in template_items if item], timeout=self.timeout, region=region
+        )
+        message_found = found[1] if found else None
         
         if not message_found:
             # 超时时设置标记而不是返回False
@@ -597,33 +634,34 @@ class WXWorkCacheCleanStep(WorkflowStep):
 class FindExternalButtonStep(WorkflowStep):
     """查找并点击【外部】按钮"""
     
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager, 'mouse_controller': MouseController}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.template_name = config.get('template_name', 'waibu')
         self.click_delay = config.get('click_delay', 2.0)
+        self.region = config.get('region')  # 搜索区域 (x, y, width, height)，默认为企业微信窗口区域
     
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        mouse_controller = context.get('mouse_controller')
+        vision_engine = self._vision_engine
+        mouse_controller = self._mouse_controller
         stop_event = context.get('_stop_event')
         
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager) or not isinstance(mouse_controller, MouseController):
-            return False
-        
         # 获取模板
-        template_item = template_manager.get_template(self.template_name)
+        template_item = self._get_template(self.template_name)
         if not template_item:
             return False
         
         # 查找所有匹配的外部按钮
-        match_results = vision_engine.find_all_on_screen(template_item.path)
+        match_results = vision_engine.find_all_template_on_screen(
+            template_item, self.region or context.get('window_rect')
+        )
         if not match_results:
             return False
         
         # 按y坐标排序，点击最上面的按钮
-        match_results.sort(key=lambda x: x.y)
+        match_results.sort(key=attrgetter('y'))
         topmost_button = match_results[0]
         
         # 点击外部按钮
@@ -639,6 +677,8 @@ class FindExternalButtonStep(WorkflowStep):
 class MultiSelectMessagesStep(WorkflowStep):
     """查找微信消息并设置多选"""
     
+    required_components = {'mouse_controller': MouseController, 'template_manager': TemplateManager, 'vision_engine': VisionEngine}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.multiselect_template = config.get('multiselect_template')
@@ -646,14 +686,10 @@ class MultiSelectMessagesStep(WorkflowStep):
     
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        mouse_controller = context.get('mouse_controller')
-        template_manager = context.get('template_manager')
-        vision_engine = context.get('vision_engine')
+        mouse_controller = self._mouse_controller
+        vision_engine = self._vision_engine
         stop_event = context.get('_stop_event')
 
-        if not isinstance(mouse_controller, MouseController) or not isinstance(template_manager, TemplateManager) or not isinstance(vision_engine, VisionEngine):
-            return False
-        
         # 查找微信消息
         message_found = context['message_found']
         
@@ -668,11 +704,12 @@ class MultiSelectMessagesStep(WorkflowStep):
             return False
         
         # 查找并点击多选按钮
-        multiselect_template = template_manager.get_template(self.multiselect_template)
+        multiselect_template = self._get_template(self.multiselect_template)
         if not multiselect_template:
             return False
         
-        multiselect_match = vision_engine.find_on_screen(multiselect_template.path)
+        # 右键菜单在光标处弹出，可能超出企业微信窗口，因此搜索全屏
+        multiselect_match = vision_engine.find_template_on_screen(multiselect_template)
         if not multiselect_match:
             return False
         
@@ -688,6 +725,8 @@ class MultiSelectMessagesStep(WorkflowStep):
 class SelectGroupsStep(WorkflowStep):
     """选择群组并执行相关操作"""
     
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager, 'mouse_controller': MouseController}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.group_template = config.get('group_template')
@@ -696,33 +735,31 @@ class SelectGroupsStep(WorkflowStep):
     
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        mouse_controller = context.get('mouse_controller')
+        vision_engine = self._vision_engine
+        mouse_controller = self._mouse_controller
         stop_event = context.get('_stop_event')
         
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager) or not isinstance(mouse_controller, MouseController):
-            return False
-        
         # 查找群组按钮
-        group_template = template_manager.get_template(self.group_template)
+        group_template = self._get_template(self.group_template)
         if not group_template:
             return False
         
-        group_matches = vision_engine.find_all_on_screen(group_template.path)
+        # 转发对话框是独立窗口，可能超出企业微信窗口，因此搜索全屏
+        group_matches = vision_engine.find_all_template_on_screen(group_template)
         
-        # 点击所有群组按钮
-        for match_result in group_matches:
-            mouse_controller.click_match_result(match_result)
-            if not interruptible_sleep_event(self.click_delay, stop_event):
-                return False
+        # 点击所有群组按钮，按 click_delay 间隔注入，等待间隔时响应停止
+        mouse_controller.click_many(
+            [match_result.center for match_result in group_matches], self.click_delay, stop_event
+        )
+        if group_matches and not interruptible_sleep_event(self.click_delay, stop_event):
+            return False
         
         # 查找并点击逐条转发按钮
-        forward_template = template_manager.get_template(self.forward_template)
+        forward_template = self._get_template(self.forward_template)
         if not forward_template:
             return True  # 群组选择已完成，转发按钮可选
         
-        forward_match = vision_engine.find_on_screen(forward_template.path)
+        forward_match = vision_engine.find_template_on_screen(forward_template)
         if forward_match:
             mouse_controller.click_match_result(forward_match)
             if not interruptible_sleep_event(self.click_delay, stop_event):
@@ -735,6 +772,8 @@ class SelectGroupsStep(WorkflowStep):
 class SendMessageStep(WorkflowStep):
     """发送消息并清理聊天记录"""
     
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager, 'mouse_controller': MouseController}
+    
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.send_template = config.get('send_template')
@@ -743,23 +782,22 @@ class SendMessageStep(WorkflowStep):
         self.location_template = config.get('location_template')
         self.confirm_template = config.get('confirm_template')
         self.final_wait = config.get('final_wait', 30.0)
+        self.ui_wait = config.get('ui_wait', 2.0)  # 点击后等待界面出现的最长时间，出现即继续
+        self.region = config.get('region')  # 搜索区域 (x, y, width, height)，默认为企业微信窗口区域
     
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        mouse_controller = context.get('mouse_controller')
+        vision_engine = self._vision_engine
+        mouse_controller = self._mouse_controller
         stop_event = context.get('_stop_event')
         
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager) or not isinstance(mouse_controller, MouseController):
-            return False
-        
         # 查找并点击发送按钮
-        send_template = template_manager.get_template(self.send_template)
+        send_template = self._get_template(self.send_template)
         if not send_template:
             return False
         
-        send_match = vision_engine.find_on_screen(send_template.path)
+        # 发送按钮在转发对话框中，可能超出企业微信窗口，因此搜索全屏
+        send_match = vision_engine.find_template_on_screen(send_template)
         if not send_match:
             return False
         
@@ -773,23 +811,25 @@ class SendMessageStep(WorkflowStep):
             return False
         
         # 清理聊天记录
-        menu_template = template_manager.get_template(self.menu_template)
+        menu_template = self._get_template(self.menu_template)
         if not menu_template:
             return False
-        menu_match = vision_engine.find_on_screen(menu_template.path)
+        # 菜单按钮和聊天信息面板在企业微信窗口内
+        region = self.region or context.get('window_rect')
+        menu_match = vision_engine.find_template_on_screen(menu_template, region)
         if not menu_match:
             return False
         success = mouse_controller.click_match_result(menu_match)
         if not success:
             return False
-        if not interruptible_sleep_event(2.0, stop_event):
-            return False 
+        if stop_event is not None and stop_event.is_set():
+            return False
 
-        # 找到聊天信息这个定位后，鼠标挪过去，并且向下滚动
-        location_template = template_manager.get_template(self.location_template)
+        # 找到聊天信息这个定位后，鼠标挪过去，并且向下滚动；菜单展开后立即继续，不再固定等待
+        location_template = self._get_template(self.location_template)
         if not location_template:
             return False
-        location_match = vision_engine.find_on_screen(location_template.path)
+        location_match = vision_engine.wait_for_template_adaptive(location_template, timeout=self.ui_wait, region=region)
         if not location_match:
             return False
         right_bottom_x = location_match.x + location_match.width
@@ -798,25 +838,30 @@ class SendMessageStep(WorkflowStep):
         mouse_controller.scroll_down(clicks=10, strategy='multiple')
 
         # 找到清空聊天记录这个定位后，鼠标挪过去，并且点击
-        clear_template = template_manager.get_template(self.clear_template)
+        clear_template = self._get_template(self.clear_template)
         if not clear_template:
             return False
-        clear_match = vision_engine.find_on_screen(clear_template.path)
+        clear_match = vision_engine.find_template_on_screen(clear_template, region)
         if not clear_match:
             return False
         mouse_controller.click_match_result(clear_match)
-        if not interruptible_sleep_event(2.0, stop_event):
+        if stop_event is not None and stop_event.is_set():
             return False
 
-        # 找到确认这个定位后，鼠标挪过去，并且点击
-        confirm_template = template_manager.get_template(self.confirm_template)
+        # 找到确认这个定位后，鼠标挪过去，并且点击；确认框弹出后立即继续
+        confirm_template = self._get_template(self.confirm_template)
         if not confirm_template:
             return False
-        confirm_match = vision_engine.find_on_screen(confirm_template.path)
+        confirm_match = vision_engine.wait_for_template_adaptive(confirm_template, timeout=self.ui_wait)
         if not confirm_match:
             return False
         mouse_controller.click_match_result(confirm_match)
-        if not interruptible_sleep_event(2.0, stop_event):
+
+        # 确认框关闭后立即关闭菜单，最多等待 ui_wait 秒
+        confirm_image = vision_engine.prepare_template_item(confirm_template)
+        if not vision_engine.wait_until_gone(confirm_match, confirm_image, timeout=self.ui_wait):
+            self.logger.warning("确认框未在等待时间内关闭，继续关闭菜单")
+        if stop_event is not None and stop_event.is_set():
             return False
 
         # 关闭菜单
@@ -827,39 +872,50 @@ class SendMessageStep(WorkflowStep):
 class ScrollAndSelectMultiBoxStep(WorkflowStep):
     """滚动并全选多选框"""
 
+    required_components = {'vision_engine': VisionEngine, 'template_manager': TemplateManager, 'mouse_controller': MouseController}
+
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.scroll_count = config.get('scroll_count', 8)
         self.scroll_direction = config.get('scroll_direction', 'down')
+        self.pyramid_levels = config.get('pyramid_levels', 2)  # 金字塔查找层数，1表示原始分辨率全图匹配
+        self.region = config.get('region')  # 搜索区域 (x, y, width, height)，默认为企业微信窗口区域
 
     def execute(self, context: dict) -> bool:
         """执行步骤"""
-        vision_engine = context.get('vision_engine')
-        template_manager = context.get('template_manager')
-        mouse_controller = context.get('mouse_controller')
+        vision_engine = self._vision_engine
+        mouse_controller = self._mouse_controller
         stop_event = context.get('_stop_event')
         
-        if not isinstance(vision_engine, VisionEngine) or not isinstance(template_manager, TemplateManager) or not isinstance(mouse_controller, MouseController):
+        # 多选框模板在循环外解析并解码一次，循环内只截图匹配
+        multi_box_template = self._get_template('wxwork_semi_auto.multi_box')
+        if not multi_box_template:
+            return False
+        
+        try:
+            template = vision_engine.prepare_template_item(multi_box_template)
+        except Exception as e:
+            self.logger.error(f"加载模板失败: {e}")
             return False
         
         # 往下滚动，然后查找多选框并且全选多选框，再往下滚动，如此往复，直到没有多选框出现
+        region = self.region or context.get('window_rect')
         for i in range(self.scroll_count):
             mouse_controller.scroll(clicks=10, direction=self.scroll_direction, strategy='multiple')
             # if not interruptible_sleep_event(1.0, stop_event): # 这里不睡眠，可以快一点
             #     return False
 
             # 查找所有多选框
-            multi_box_template = template_manager.get_template('wxwork_semi_auto.multi_box')
-            if not multi_box_template:
-                return False
-            multi_box_matches = vision_engine.find_all_on_screen(multi_box_template.path)
+            multi_box_matches = vision_engine.find_all_image_on_screen(
+                template, region, pyramid_levels=self.pyramid_levels
+            )
             if not multi_box_matches:
                 self.logger.info(f"没有找到多选框，停止滚动")
                 break
             
-            # 全选多选框
-            for match_result in multi_box_matches:
-                mouse_controller.click_match_result(match_result)
+            # 全选多选框，按 click_delay 间隔注入
+            mouse_controller.click_many([match_result.center for match_result in multi_box_matches],
+                                        stop_event=stop_event)
         
         return True
 
@@ -878,11 +934,7 @@ class WxworkSemiAutoWorkflow(BaseWorkflow):
         """设置工作流步骤"""
         
         # 加载策略配置
-        strategy_config_path = Path("config/wxwork_strategy.yaml")
-        strategy_config = {}
-        if strategy_config_path.exists():
-            strategy_config_loader = Config(strategy_config_path)
-            strategy_config = strategy_config_loader.get_all()
+        strategy_config = _load_strategy_config()
         
         # 初始化核心组件
         vision_config = self.config.get('vision', {})
@@ -891,7 +943,9 @@ class WxworkSemiAutoWorkflow(BaseWorkflow):
         template_config = self.config.get('templates', {})
 
         self.context['vision_engine'] = VisionEngine(
-            confidence_threshold=vision_config.get('confidence_threshold', 0.8)
+            confidence_threshold=vision_config.get('confidence_threshold', 0.8),
+            use_gpu=vision_config.get('use_gpu', False),
+            use_opencl=vision_config.get('use_opencl', False)
         )
         self.context['mouse_controller'] = MouseController(
             click_delay=mouse_config.get('click_delay', 0.1),
@@ -905,6 +959,20 @@ class WxworkSemiAutoWorkflow(BaseWorkflow):
         self.context['template_manager'] = TemplateManager(
             templates_dir=template_config.get('base_path', 'templates')
         )
+        
+        # 后台预先解码本工作流的模板，与等待窗口、等待用户操作重叠
+        threading.Thread(
+            target=self.context['vision_engine'].warmup_templates,
+            args=(list(self.context['template_manager'].get_templates(self.workflow_name).values()),),
+            name='template-warmup',
+            daemon=True
+        ).start()
+        
+        # 可选：为本工作流的模板建立ORB描述子索引，VisionEngine.locate_any 一次截图查询所有模板
+        if vision_config.get('orb_index', False):
+            self.context['vision_engine'].build_orb_index(
+                self.context['template_manager'].get_templates(self.workflow_name)
+            )
 
         self.add_step(WaitForWxWorkWindowStep("等待企业微信窗口出现", {
             'window_title': '企业微信',
@@ -968,11 +1036,7 @@ class WxworkAutoWorkflow(BaseWorkflow):
         """设置工作流步骤"""
         
         # 加载策略配置
-        strategy_config_path = Path("config/wxwork_strategy.yaml")
-        strategy_config = {}
-        if strategy_config_path.exists():
-            strategy_config_loader = Config(strategy_config_path)
-            strategy_config = strategy_config_loader.get_all()
+        strategy_config = _load_strategy_config()
         
         # 初始化核心组件
         vision_config = self.config.get('vision', {})
@@ -981,7 +1045,9 @@ class WxworkAutoWorkflow(BaseWorkflow):
         template_config = self.config.get('templates', {})
 
         self.context['vision_engine'] = VisionEngine(
-            confidence_threshold=vision_config.get('confidence_threshold', 0.8)
+            confidence_threshold=vision_config.get('confidence_threshold', 0.8),
+            use_gpu=vision_config.get('use_gpu', False),
+            use_opencl=vision_config.get('use_opencl', False)
         )
         self.context['mouse_controller'] = MouseController(
             click_delay=mouse_config.get('click_delay', 0.1),
@@ -995,6 +1061,14 @@ class WxworkAutoWorkflow(BaseWorkflow):
         self.context['template_manager'] = TemplateManager(
             templates_dir=template_config.get('base_path', 'templates')
         )
+        
+        # 后台预先解码本工作流的模板，与等待窗口、等待用户操作重叠
+        threading.Thread(
+            target=self.context['vision_engine'].warmup_templates,
+            args=(list(self.context['template_manager'].get_templates(self.workflow_name).values()),),
+            name='template-warmup',
+            daemon=True
+        ).start()
 
         self.add_step(WaitForWxWorkWindowStep("等待企业微信窗口出现", {
             'window_title': '企业微信',
@@ -1121,7 +1195,8 @@ class WxworkAutoWorkflow(BaseWorkflow):
         #     'skip_first': False,
         #     'max_clicks': 9,
         #     'click_delay': 0,
-        #     'min_matches': 0
+        #     'min_matches': 0,
+        #     'merge_templates': True
         # }))
 
         # 5. 发送消息并清理聊天记录